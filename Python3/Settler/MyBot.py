@@ -3,17 +3,71 @@ Modified Settler Bot
 """
 # Let's start by importing the Halite Starter Kit so we can interface with the Halite engine
 import hlt
+import math
 import time
 from datetime import datetime
 import logging
 import pprint
 
-from random import sample, randint
+import numpy as np
+
+from random import sample
+from collections import Counter
 from collections import defaultdict
+from collections import namedtuple
+from functools import partial
+from types import SimpleNamespace
 
 VERSION = "0.9.6"
 DEBUG = False
 
+# seconds the turn pipeline plans for; the engine allows 2
+TURN_SECONDS = 1.9
+
+# a ship's navigation attempts, tried in order; value and cost are what the scheduler orders ships by
+Move = namedtuple('Move', 'ship attempts target speed value cost')
+# a cluster of enemy ships, as a target: centroid, the distance from it to the furthest member, and member count
+Swarm = namedtuple('Swarm', 'cluster x y radius size')
+
+# enemies closer than this can be in weapon range by next turn
+THREAT_RANGE = hlt.constants.WEAPON_RADIUS + 2 * hlt.constants.MAX_SPEED
+# urgency of a ship under threat (scaled by how close) and of one that can dock
+URGENCY_THREAT = 3
+URGENCY_DOCK = 2
+# urgency added by the target a ship is after
+VALUE_DOCKED_SHIP = 1
+VALUE_ENEMY_PLANET = 1
+VALUE_PLANET = 0.5
+
+# target assignment: planets are always preferred to docked ships, and those to other ships
+ASSIGN_PENALTY_SHIP = 1000
+# distance a planet counts as further away per enemy ship more than we have around it
+ASSIGN_PENALTY_UNSAFE = 20
+# ... and per enemy ship found around it on (decayed) average over the past turns
+ASSIGN_PENALTY_CONTESTED = 5
+# how many ships may go after one docked enemy ship, and how many (per ship per enemy) after any other
+ASSIGN_DOCKED_SHIP_CAPACITY = 2
+ASSIGN_ENEMY_SHIP_SHARE = 2
+# engagements are played this many turns ahead, among the ships this close to the engaging ship
+ENGAGE_TURNS = 2
+ENGAGE_RADIUS = 2 * hlt.constants.MAX_SPEED + hlt.constants.WEAPON_RADIUS
+# turns a contested region is played forward for each candidate joint policy
+ROLLOUT_TURNS = 3
+# the phases change by the largest fleet the production forecast expects FORECAST_TURNS from now
+FORECAST_TURNS = 20
+PHASE_MIDGAME_FLEET = 80
+PHASE_ENDGAME_FLEET = 160
+# past this many undocked ships, nearby ships that share a target move as squads: the leaders plan the moves and
+# the members copy them, each in its own formation slot, SQUAD_SPACING from the next (clear of thrust rounding)
+SQUAD_FLEET = 200
+SQUAD_RADIUS = 2 * hlt.constants.MAX_SPEED
+SQUAD_SIZE = 12
+SQUAD_SPACING = 2 * hlt.constants.SHIP_RADIUS + 1
+# ships this close to each other can back each other up in a fight, and are targeted and avoided as one
+CLUSTER_RADIUS = hlt.combat.FIRING_RANGE
+# ships further than this from a planet follow its shared flow field instead of navigating
+FLOW_FIELD_NEAR_DISTANCE = 2 * hlt.constants.MAX_SPEED
+
 
 def closest_target_from_list(gamemap, source, target_list, max_distance=1000):
     '''find closest entity to an source entity using a calculate_distance_between loop'''
@@ -49,66 +103,10 @@ def find_nearby_target(gamemap, entity, max_distance=40):
     return None
 
 
-def find_closest_owned_planet_with_docking(game_map, ship, planetlist, max_distance=1000, already_targetted=None):
-    '''find one of my planets that has open docking slots, not including ships in docking process'''
-    logger = logging.getLogger(__name__)
-    best_planet = None
-    best_distance = max_distance
-    try:
-        for planet in planetlist:
-            distance = ship.calculate_distance_between(planet)
-            targetted = 0 if not already_targetted else already_targetted[planet.id]
-            if (distance < best_distance and ship.owner == planet.owner and
-                        planet.num_docking_spots > len(planet._docked_ships) + targetted):
-                best_planet = planet
-                best_distance = distance
-        if best_planet:
-            logger.debug("find_closest_owned_planet_with_docking ship: {} returning planet {} distance {} max,current {},{}"
-                         .format(ship.id, best_planet.id, best_distance,
-                                 best_planet.num_docking_spots, len(best_planet._docked_ships)))
-    except TypeError as exc:
-        logger.error("find_closest_owned_planet_with_docking(,{},{},{},{}) returning due to error: {}"
-                     .format(ship.id, len(planetlist), len(already_targetted), max_distance, str(exc)))
-    return best_planet
-
-
-def find_closest_owned_planet(game_map, ship, planetlist, max_distance=1000):
-    '''find one of my planets'''
-    logger = logging.getLogger(__name__)
-    best_planet = None
-    best_distance = max_distance
-    for planet in planetlist:
-        distance = ship.calculate_distance_between(planet)
-        if (distance < best_distance and ship.owner == planet.owner):
-            best_planet = planet
-            best_distance = distance
-            logger.debug("ship: {} updating closest planet {} distance {}"
-                         .format(ship.id, planet.id, distance,
-                                 planet.num_docking_spots, len(planet._docked_ships)))
-    if best_planet:
-        logger.debug("find_closest_owned_planet_with_docking ship: {} returning planet {} distance {} max,current {},{}"
-                     .format(ship.id, best_planet.id, best_distance,
-                             best_planet.num_docking_spots, len(best_planet._docked_ships)))
-    return best_planet
-
-
-def find_closest_unowned_planet(gamemap, ship, planetlist, max_distance=1000):
-    logger = logging.getLogger(__name__)
-    best_planet = None
-    best_distance = max_distance
-    for planet in planetlist:
-        distance = ship.calculate_distance_between(planet)
-        if distance < best_distance:
-            best_planet = planet
-            best_distance = distance
-    if best_planet:
-        logger.debug(" ship: id,x,y {},{},{} find_closest_unowned_planet: id,x,y {},{},{}"
-                     .format(ship.id, ship.x, ship.y,
-                             best_planet.id, best_planet.x, best_planet.y))
-    return best_planet
-
-
-def nearby_planet_if_dockable(gamemap, ship):
+def nearby_planet_if_dockable(gamemap, ship, dockable_planets=None):
+    '''with dockable_planets (unowned, or mine and not full; by id) the map's dock zone index answers in one lookup'''
+    if dockable_planets is not None:
+        return gamemap.dock_zones().dockable(ship, dockable_planets)
     for planet in gamemap.all_planets():
         if ship.can_dock(planet) and not planet.is_owned():
             return planet
@@ -164,452 +162,1008 @@ def navigate_away_from_dict(source, entity_dict):
     return target
 
 
-def navigate(ship, destination, game_map, speed=hlt.constants.MAX_SPEED / 2, ignore_ships=True):
-    return ship.navigate(destination, game_map, speed, ignore_ships=ignore_ships)
+def navigate(ship, destination, game_map, speed=hlt.constants.MAX_SPEED / 2, ignore_ships=True, budget=None):
+    '''Navigate within the given budget; a cut-short search still returns its best command'''
+    logger = logging.getLogger(__name__)
+    command, quality = ship.navigate_within(destination, game_map, speed, budget, ignore_ships=ignore_ships)
+    if quality is ship.NavigationQuality.PARTIAL:
+        logger.debug("ship: {} navigation budget ran out after {} obstacle tests, best effort: {}"
+                     .format(ship.id, budget.work, command))
+    return command
 
 
-def halite2_main():
+def navigate_by_flow(ship, flow_fields, key, planet, radius, speed, budget=None):
+    '''Follow the shared flow field toward a planet while far from it, None once close (or unreachable).
+    Takes a budget only to be interchangeable with navigate: a heading is a single lookup.'''
+    if ship.calculate_distance_between(planet) - radius < FLOW_FIELD_NEAR_DISTANCE:
+        return None
+    heading = flow_fields.heading(ship, key, planet.x, planet.y, radius, static=True)
+    if heading is None:
+        return None
+    return ship.thrust(speed, heading)
+
+
+def navigate_by_path(ship, paths, flow_fields, key, planet, radius, goal, game_map, speed, ignore_ships,
+                     budget=None):
+    '''Fly the ship's stored waypoint path toward goal while far from it, planning one if it has none.
+    None once close (or unreachable).'''
+    if ship.calculate_distance_between(goal) < FLOW_FIELD_NEAR_DISTANCE:
+        return None
+    waypoint = paths.waypoint(ship, key, goal)
+    if waypoint is None:
+        field = flow_fields.field(key, planet.x, planet.y, radius, static=True)
+        waypoint = paths.plan(ship, key, goal, field, game_map)
+        if waypoint is None:
+            return None
+    return navigate(ship, waypoint, game_map, speed=speed, ignore_ships=ignore_ships, budget=budget)
+
+
+def avoid_friendly_collisions(game_map, command_queue):
+    '''Slow down thrusts that would run two of my ships into each other during the turn, until none do (see
+    hlt.collision.slow_until_clear): a ship slowed down still moves where it can, the ships cut to 0 are held.'''
     logger = logging.getLogger(__name__)
-    # GAME START
-    # Here we define the bot's name as Settler and initialize the game, including communication with the Halite engine.
-    game = hlt.Game("Settler %s" % VERSION)
-    turn = 0
+    thrusts = {}
+    for command in command_queue:
+        fields = command.split()
+        if fields[0] == 't':
+            thrusts[int(fields[1])] = (int(fields[2]), int(fields[3]))
+    if not thrusts:
+        return command_queue
 
-    # save ship_skip_list between turns
-    ship_skip_list = list()
+    my_ships = game_map.get_me().all_ships()
+    ids = [s.id for s in my_ships]
+    speed = np.array([thrusts[s.id][0] if s.id in thrusts else 0 for s in my_ships], dtype=np.int64)
+    angle = np.radians([thrusts[s.id][1] if s.id in thrusts else 0 for s in my_ships])
+    magnitude = hlt.collision.slow_until_clear([s.x for s in my_ships], [s.y for s in my_ships], speed, angle)
+
+    changed = {ids[k]: int(magnitude[k]) for k in np.flatnonzero(magnitude != speed).tolist()}
+    if changed:
+        held = sorted(ship_id for ship_id, cut in changed.items() if cut == 0)
+        logger.info("avoid_friendly_collisions: slowed {} ships, holding ships {}".format(len(changed), held))
+    queue = []
+    for command in command_queue:
+        fields = command.split()
+        ship_id = int(fields[1]) if fields[0] == 't' else None
+        if ship_id not in changed:
+            queue.append(command)
+        elif changed[ship_id] > 0:
+            queue.append("t {} {} {}".format(ship_id, changed[ship_id], thrusts[ship_id][1]))
+    return queue
+
+
+def ship_urgency(game_map, ships, enemy_ships, dockable_planets):
+    '''how much each ship's decision matters this turn (by id): enemies about to be in range, a planet to dock at'''
+    urgency = {}
+    if not ships:
+        return urgency
+    threat = np.zeros(len(ships))
+    if enemy_ships:
+        xs = np.array([s.x for s in ships])[:, None]
+        ys = np.array([s.y for s in ships])[:, None]
+        distances = np.hypot(xs - np.array([s.x for s in enemy_ships]),
+                             ys - np.array([s.y for s in enemy_ships])).min(axis=1)
+        threat = np.clip(1 - distances / THREAT_RANGE, 0, 1) * URGENCY_THREAT
+    for ship, ship_threat in zip(ships, threat.tolist()):
+        dock = nearby_planet_if_dockable(game_map, ship, dockable_planets)
+        urgency[ship.id] = ship_threat + (URGENCY_DOCK if dock else 0)
+    return urgency
+
+
+def add_move(state, ship, attempts, target, speed, value=0):
+    '''queue navigation attempts for a ship; value is how much its target adds to the ship's urgency'''
+    state.moves.append(Move(ship, attempts, target, speed, value, len(attempts) * state.navigate_cost))
+    # next turn's baseline heads here until the ship is given something better
+    state.targets[ship.id] = target
+
+
+def try_attempts(attempts, budget):
+    '''the first command any of the attempts comes up with'''
+    for attempt in attempts:
+        command = attempt(budget=budget)
+        if command:
+            return command
+    return None
+
+
+def fallback_thrust(ship, target, game_map, speed):
+    '''cheap stand-in for navigate: straight at the target, but no further than is clear of every planet'''
+    clear = game_map.distance_field().lower_bound(ship.x, ship.y) - ship.radius - 0.1
+    speed = min(speed, ship.calculate_distance_between(target), clear)
+    if speed < 1:
+        return None
+    return ship.thrust(speed, ship.calculate_angle_between(target))
+
+
+def phase_parameters(turn, game_map, my_undocked_ships, projected_fleet=0):
+    '''policy for this phase of the game, and the ships that act on it this turn; projected_fleet is the
+    largest fleet any player is forecast to have FORECAST_TURNS from now'''
+    #
+    # defaults which may not need tuning
+    #
+    planet_navigate_distance = 2
+    ship_navigate_distance = 2
+    # squads: only the squad leaders are action_ships, the members follow them
+    squads = False
+
+    # ship_time_limit: total seconds permitted
+    # ship_speed: limit navigation speed
+    # ship_action_limit: total permitted navigate calls or other expensive checks
+    # action_ships: give the above limit, these ships will act this turn
+    #               sample/shuffle ships to avoid deadlocks
+
+    # e.g. action_planet_claim_percent: percentage of above (by role bucket, see hlt.roles) that will dock
+    # percents have order:
+    #   action_destroy_planet_percent 
+    #   action_planet_refill_percent 
+    #   action_planet_claim_percent 
+    #   action_collide_docked_percent
+    #   action_target_docked_percent 
+
+    if len(my_undocked_ships) > SQUAD_FLEET:
+        squads = True
+        ship_time_limit = 1.5
+        ship_speed = hlt.constants.MAX_SPEED 
+        ship_action_limit = 30
+        ship_dock_ratio = 1
+        ship_dock_enemy_watch_range = 16
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
+        #action_ship_long_range = int(max(1000, game_map.width, game_map.height))
+        action_ship_long_range = 50
+        action_planet_long_range = 1000
+        action_planet_target_limit = 10
+        action_target_docked_range = 1000
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 30
+        action_planet_refill_percent = 50
+        action_planet_claim_percent = 50
+        action_collide_docked_percent = 90
+        action_target_docked_percent = 100
+    elif projected_fleet > PHASE_ENDGAME_FLEET and len(my_undocked_ships) > 100:
+        ship_time_limit = 1.5
+        ship_speed = hlt.constants.MAX_SPEED * 0.8
+        ship_action_limit = 30
+        ship_dock_ratio = 4
+        ship_dock_enemy_watch_range = 16
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
+        #action_ship_long_range = int(max(1000, game_map.width, game_map.height))
+        action_ship_long_range = 50
+        action_planet_long_range = int(max(1000, game_map.width * game_map.height))
+        action_planet_target_limit = 2
+        action_target_docked_range = 1000
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 25
+        action_planet_refill_percent = 40
+        action_planet_claim_percent = 40
+        action_collide_docked_percent = 60
+        action_target_docked_percent = 70
+    elif projected_fleet > PHASE_MIDGAME_FLEET or len(my_undocked_ships) > 100:
+        ship_time_limit = 1.7
+        ship_speed = hlt.constants.MAX_SPEED * 0.8
+        ship_action_limit = 50
+        ship_dock_ratio = 3
+        ship_dock_enemy_watch_range = 14
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
+        #action_ship_long_range = int(max(game_map.width, game_map.height) / 2)
+        action_ship_long_range = 100
+        action_planet_long_range = int(max(game_map.width, game_map.height) / 2)
+        action_planet_target_limit = 0
+        action_target_docked_range = 150
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 15
+        action_planet_refill_percent = 30
+        action_planet_claim_percent = 50
+        action_collide_docked_percent = 55
+        action_target_docked_percent = 90
+    elif turn > 50:
+        ship_time_limit = 1.8
+        ship_speed = hlt.constants.MAX_SPEED * 0.95
+        ship_action_limit = 100
+        ship_dock_ratio = 2
+        ship_dock_enemy_watch_range = 14
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
+        action_ship_long_range = 100
+        action_planet_long_range = 100
+        action_planet_target_limit = 0
+        action_target_docked_range = 100
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 0
+        action_planet_refill_percent = 40
+        action_planet_claim_percent = 50
+        action_collide_docked_percent = 0
+        action_target_docked_percent = 90
+    elif turn > 25:
+        ship_time_limit = 1.9
+        ship_speed = hlt.constants.MAX_SPEED
+        ship_action_limit = 100
+        ship_dock_ratio = 1
+        ship_dock_enemy_watch_range = 30
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships
+        action_ship_long_range = 75
+        action_planet_long_range = 200
+        action_planet_target_limit = 0
+        action_target_docked_range = 100
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 0
+        action_planet_refill_percent = 50
+        action_planet_claim_percent = 70
+        action_collide_docked_percent = 0
+        action_target_docked_percent = 95
+    elif turn > 10:
+        ship_time_limit = 1.9
+        ship_speed = hlt.constants.MAX_SPEED
+        ship_action_limit = 100
+        ship_dock_ratio = 1
+        ship_dock_enemy_watch_range = 30
+        ship_shun_center_planets = False
+        action_ships = my_undocked_ships
+        action_ship_long_range = 50
+        action_planet_long_range = 200
+        action_planet_target_limit = 2
+        action_target_docked_range = 100
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 0
+        action_planet_refill_percent = 85
+        action_planet_claim_percent = 95
+        action_collide_docked_percent = 0
+        action_target_docked_percent = 100
+    else:
+        ship_time_limit = 1.9
+        ship_speed = hlt.constants.MAX_SPEED
+        ship_action_limit = 100
+        ship_dock_ratio = 1
+        ship_dock_enemy_watch_range = 30
+        ship_shun_center_planets = True
+        action_ships = sample(my_undocked_ships, min(ship_action_limit, len(my_undocked_ships)))
+        action_ship_long_range = 50
+        action_planet_long_range = 100
+        action_planet_target_limit = 2
+        action_target_docked_range = 100
+        navigate_ignore_ships_threshold = 100
+        action_destroy_planet_percent = 0
+        action_planet_refill_percent = 80
+        action_planet_claim_percent = 100
+        action_collide_docked_percent = 0
+        action_target_docked_percent = 0
+
+    return SimpleNamespace(
+        planet_navigate_distance=planet_navigate_distance,
+        squads=squads,
+        ship_navigate_distance=ship_navigate_distance,
+        ship_time_limit=ship_time_limit,
+        ship_speed=ship_speed,
+        ship_action_limit=ship_action_limit,
+        ship_dock_ratio=ship_dock_ratio,
+        ship_dock_enemy_watch_range=ship_dock_enemy_watch_range,
+        ship_shun_center_planets=ship_shun_center_planets,
+        action_ships=action_ships,
+        action_ship_long_range=action_ship_long_range,
+        action_planet_long_range=action_planet_long_range,
+        action_planet_target_limit=action_planet_target_limit,
+        action_target_docked_range=action_target_docked_range,
+        navigate_ignore_ships_threshold=navigate_ignore_ships_threshold,
+        action_destroy_planet_percent=action_destroy_planet_percent,
+        action_planet_refill_percent=action_planet_refill_percent,
+        action_planet_claim_percent=action_planet_claim_percent,
+        action_collide_docked_percent=action_collide_docked_percent,
+        action_target_docked_percent=action_target_docked_percent)
+
+
+def parse_stage(state, budget):
+    '''bring what is kept across turns up to date with this turn's map'''
+    logger = logging.getLogger(__name__)
+    state.forecast.update(state.game_map, state.game.events)
+    state.projected_fleets = state.forecast.fleets(FORECAST_TURNS)[-1]
+    logger.debug("turn: {} fleets: {} in {} turns: {}".format(
+        state.turn, state.forecast.fleet.tolist(), FORECAST_TURNS, state.projected_fleets.tolist()))
+    state.flow_fields.begin_turn(state.game_map, state.turn)
+    logger.debug("turn: {} events: {}".format(
+        state.turn, dict(Counter(event.kind.name for event in state.game.events))))
+    state.roles.begin_turn(state.game.events)
+    dropped = state.paths.begin_turn(state.game_map, state.turn, state.game.events)
+    if dropped:
+        logger.debug("turn: {} dropped paths: {}".format(state.turn, dropped))
+
+
+def index_stage(state, budget):
+    '''variables that may factor in policy'''
+    logger = logging.getLogger(__name__)
+    game_map = state.game_map
+    # the map's views are built once per turn and shared, so they must not be modified
+    state.enemy_ships = game_map.enemy_ships()
+    state.enemy_docked_ships = game_map.enemy_ships(docked=True)
+    state.enemy_undocked_ships = game_map.enemy_ships(docked=False)
+    state.enemy_owned_planets = game_map.enemy_planets()
+    state.enemy_ships_by_id = {s.id: s for s in state.enemy_ships}
+    clusters = state.clusters = game_map.ship_clusters(CLUSTER_RADIUS)
+    enemy = clusters.of_owner(game_map.my_id, mine=False)
+    state.enemy_swarms = [Swarm(*fields) for fields in zip(
+        enemy.tolist(), clusters.x[enemy].tolist(), clusters.y[enemy].tolist(), clusters.radius[enemy].tolist(),
+        clusters.size[enemy].tolist())]
+
+    state.my_ships = game_map.ships_of(game_map.my_id)
+    state.my_docked_ships = game_map.ships_of(game_map.my_id, docked=True)
+    state.my_undocked_ships = [s for s in game_map.ships_of(game_map.my_id, docked=False)
+                               if s.id not in state.ship_skip_list]
+    state.ship_skip_list = list()
+
+    logger.info("turn: {} enemy: {} enemy docked: {} my ships: {} my undocked: {} clusters enemy: {} mine: {}"
+                .format(state.turn, len(state.enemy_ships), len(state.enemy_docked_ships),
+                        len(state.my_ships), len(state.my_undocked_ships), len(state.enemy_swarms),
+                        len(clusters) - len(state.enemy_swarms)))
+
+
+def assess_stage(state, budget):
+    '''pick this turn's policy, the planets it can go for and the ships that act on it, most urgent first'''
+    game_map = state.game_map
+    state.refill_planets = [p for p in game_map.planets_with_free_spots()
+                            if p.is_owned() and p.owner.id == game_map.my_id]
+    state.dockable_planets = {p.id: p for p in game_map.planets_with_free_spots()
+                              if not p.is_owned() or p in state.refill_planets}
+    state.urgency = ship_urgency(game_map, state.my_undocked_ships, state.enemy_undocked_ships,
+                                 state.dockable_planets)
+    # when not every ship can act, the ones that matter most do
+    state.my_undocked_ships.sort(key=lambda s: -state.urgency[s.id])
+
+    params = state.params = phase_parameters(state.turn, game_map, state.my_undocked_ships,
+                                             int(state.projected_fleets.max()))
+    params.action_ships.sort(key=lambda s: (-state.urgency[s.id], s.id))
+    state.squads = []
+    if params.squads:
+        # most urgent first, as the ships are
+        squads = hlt.squads.form(state.my_undocked_ships, [squad_key(state, s) for s in state.my_undocked_ships],
+                                 SQUAD_RADIUS, SQUAD_SIZE)
+        # every squad acts, so the whole fleet does: a squad costs one navigate, whatever its size
+        state.squads = squads
+        params.action_ships = [squad.leader for squad in state.squads]
+        params.ship_action_limit = len(params.action_ships)
+    if params.ship_dock_enemy_watch_range > 0:
+        state.watch.update_ships(state.enemy_ships, params.ship_dock_enemy_watch_range)
+    # who could be shot at next turn, and who could shoot back
+    state.threat.update_ships(state.enemy_undocked_ships, hlt.influence.ATTACK_REACH)
+    state.support.update_ships(game_map.ships_of(game_map.my_id, docked=False), hlt.influence.ATTACK_REACH)
+    state.enemy_heat.update_ships(state.enemy_undocked_ships)
+    state.unowned_planets = sorted(game_map.planets_of(None), key=lambda x: x.id)
+    if params.ship_shun_center_planets:
+        state.unowned_planets = [p for p in state.unowned_planets if p.id > 3]
+    # as they stand before this turn's targets fill them up: one set, and one label raster, for the whole turn
+    state.claim_planets = list(state.unowned_planets)
+
+    state.ignore_ships = (len(state.my_undocked_ships) + len(state.enemy_undocked_ships) >
+                          params.navigate_ignore_ships_threshold)
+    # scheduler cost of one navigate attempt: about one test per obstacle
+    state.navigate_cost = len(game_map.obstacle_arrays(hlt.entity.Ship if state.ignore_ships else ())[0])
+
+
+def squad_key(state, ship):
+    '''what a ship shares with the rest of its squad: the target of its standing order. A ship that can dock now
+    goes on its own.'''
+    if nearby_planet_if_dockable(state.game_map, ship, state.dockable_planets):
+        return ('dock', ship.id)
+    order = state.orders.get(ship.id)
+    return (order.kind, order.target_id) if order is not None else None
+
+
+def baseline_stage(state, budget):
+    '''a cheap command for every ship that still has a target, so the turn is complete whenever time runs out'''
+    game_map = state.game_map
+    ships = game_map.ships_of(game_map.my_id, docked=False)
+    state.targets = {s.id: state.targets[s.id] for s in ships if s.id in state.targets}
+    for ship in ships:
+        target = state.targets.get(ship.id)
+        if target is not None:
+            state.commands.baseline(ship.id, fallback_thrust(ship, target, game_map, state.params.ship_speed))
+
+
+def count_planet_target(state, ship, planet):
+    '''limit number of ships navigating to the same planet'''
+    logger = logging.getLogger(__name__)
+    if state.params.action_planet_target_limit > 0:
+        state.planet_targetting[planet.id] += 1
+        if (not planet.is_owned() and
+                state.planet_targetting[planet.id] > (planet.num_docking_spots)):
+            logger.info("turn: {} ship: {} removing planet from unowned targetting {}"
+                        .format(state.turn, ship.id, planet.id))
+            state.unowned_planets.remove(planet)
+
+
+def destroy_move(state, ship, planet):
+    '''crash into an enemy planet'''
+    target_point = ship.closest_point_to(planet, -1)
+    add_move(state, ship, [
+        partial(navigate_by_flow, ship, state.flow_fields, ('destroy', planet.id), planet,
+                planet.radius, hlt.constants.MAX_SPEED),
+        partial(navigate, ship, target_point, state.game_map,
+                speed=hlt.constants.MAX_SPEED, ignore_ships=True)],
+        target_point, hlt.constants.MAX_SPEED, VALUE_ENEMY_PLANET)
+
+
+def refill_move(state, ship, planet):
+    '''head for one of my planets with free docking spots'''
+    params = state.params
+    target_point = ship.closest_point_to(planet, params.planet_navigate_distance)
+    key = ('refill', planet.id)
+    radius = planet.radius + params.planet_navigate_distance
+    if state.ignore_ships:
+        attempts = [partial(navigate_by_flow, ship, state.flow_fields, key, planet, radius, params.ship_speed)]
+    else:
+        attempts = [partial(navigate_by_path, ship, state.paths, state.flow_fields, key, planet, radius,
+                            target_point, state.game_map, params.ship_speed, False)]
+    attempts.append(partial(navigate, ship, target_point,
+                            state.game_map, speed=params.ship_speed, ignore_ships=state.ignore_ships))
+    add_move(state, ship, attempts, target_point, params.ship_speed, VALUE_PLANET)
+    count_planet_target(state, ship, planet)
+
+
+def claim_move(state, ship, planet):
+    '''head for an unowned planet'''
+    params = state.params
+    target_point = ship.closest_point_to(planet, params.planet_navigate_distance)
+    add_move(state, ship, [
+        partial(navigate_by_path, ship, state.paths, state.flow_fields, ('claim', planet.id), planet,
+                planet.radius + params.planet_navigate_distance, target_point, state.game_map,
+                params.ship_speed, state.ignore_ships),
+        partial(navigate, ship, target_point,
+                state.game_map, speed=params.ship_speed, ignore_ships=state.ignore_ships)],
+        target_point, params.ship_speed, VALUE_PLANET)
+    count_planet_target(state, ship, planet)
 
-    while True:
-        # TURN START
-        # Update the map for the new turn and get the latest version
-
-        turn_start_time = time.time()
-        turn += 1
-
-        logger.info("turn: {} start at: {}".format(turn, datetime.now().isoformat('T')))
-        game_map = game.update_map()
-        logger.info("turn: {} game.update_map took: {}"
-                    .format(turn, time.time() - turn_start_time))
-
-        #
-        # variables that may factor in policy
-        #
-        enemy_ships = [s for s in game_map._all_ships() if s.owner != game_map.get_me()]
-        enemy_docked_ships = [s for s in enemy_ships if s.docking_status != s.DockingStatus.UNDOCKED]
-        enemy_undocked_ships = [s for s in enemy_ships if s.docking_status == s.DockingStatus.UNDOCKED]
-        enemy_owned_planets = [p for p in game_map.all_planets() if p.is_owned() and p.owner != game_map.get_me()]
-
-        my_ships = game_map.get_me().all_ships()
-        my_docked_ships = [s for s in my_ships if s.docking_status != s.DockingStatus.UNDOCKED]
-        my_undocked_ships = [s for s in my_ships
-                             if s.docking_status == s.DockingStatus.UNDOCKED
-                             and s.id not in ship_skip_list]
-        ship_skip_list = list()
-
-        logger.info("turn: {} enemy: {} enemy docked: {} my ships: {} my undocked: {}"
-                    .format(turn, len(enemy_ships), len(enemy_docked_ships),
-                            len(my_ships), len(my_undocked_ships)))
-
-        #
-        # defaults which may not need tuning
-        #
-        planet_navigate_distance = 2
-        ship_navigate_distance = 2
-
-        # ship_time_limit: total seconds permitted
-        # ship_speed: limit navigation speed
-        # ship_action_limit: total permitted navigate calls or other expensive checks
-        # action_ships: give the above limit, these ships will act this turn
-        #               sample/shuffle ships to avoid deadlocks
-
-        # e.g. action_planet_claim_percent: percentage of above (based on id hash) that will dock
-        # percents have order:
-        #   action_destroy_planet_percent 
-        #   action_planet_refill_percent 
-        #   action_planet_claim_percent 
-        #   action_collide_docked_percent
-        #   action_target_docked_percent 
-
-        if len(my_undocked_ships) > 200:
-            ship_time_limit = 1.5
-            ship_speed = hlt.constants.MAX_SPEED 
-            ship_action_limit = 5
-            ship_dock_ratio = 1
-            ship_dock_enemy_watch_range = 16
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
-            #action_ship_long_range = int(max(1000, game_map.width, game_map.height))
-            action_ship_long_range = 50
-            action_planet_long_range = 1000
-            action_planet_target_limit = 10
-            action_target_docked_range = 1000
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 30
-            action_planet_refill_percent = 50
-            action_planet_claim_percent = 50
-            action_collide_docked_percent = 90
-            action_target_docked_percent = 100
-        elif turn > 200 and len(my_undocked_ships) > 100:
-            ship_time_limit = 1.5
-            ship_speed = hlt.constants.MAX_SPEED * 0.8
-            ship_action_limit = 30
-            ship_dock_ratio = 4
-            ship_dock_enemy_watch_range = 16
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
-            #action_ship_long_range = int(max(1000, game_map.width, game_map.height))
-            action_ship_long_range = 50
-            action_planet_long_range = int(max(1000, game_map.width * game_map.height))
-            action_planet_target_limit = 2
-            action_target_docked_range = 1000
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 25
-            action_planet_refill_percent = 40
-            action_planet_claim_percent = 40
-            action_collide_docked_percent = 60
-            action_target_docked_percent = 70
-        elif turn > 100 or len(my_undocked_ships) > 100:
-            ship_time_limit = 1.7
-            ship_speed = hlt.constants.MAX_SPEED * 0.8
-            ship_action_limit = 50
-            ship_dock_ratio = 3
-            ship_dock_enemy_watch_range = 14
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
-            #action_ship_long_range = int(max(game_map.width, game_map.height) / 2)
-            action_ship_long_range = 100
-            action_planet_long_range = int(max(game_map.width, game_map.height) / 2)
-            action_planet_target_limit = 0
-            action_target_docked_range = 150
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 15
-            action_planet_refill_percent = 30
-            action_planet_claim_percent = 50
-            action_collide_docked_percent = 55
-            action_target_docked_percent = 90
-        elif turn > 50:
-            ship_time_limit = 1.8
-            ship_speed = hlt.constants.MAX_SPEED * 0.95
-            ship_action_limit = 100
-            ship_dock_ratio = 2
-            ship_dock_enemy_watch_range = 14
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships[:min(ship_action_limit, len(my_undocked_ships))]
-            action_ship_long_range = 100
-            action_planet_long_range = 100
-            action_planet_target_limit = 0
-            action_target_docked_range = 100
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 0
-            action_planet_refill_percent = 40
-            action_planet_claim_percent = 50
-            action_collide_docked_percent = 0
-            action_target_docked_percent = 90
-        elif turn > 25:
-            ship_time_limit = 1.9
-            ship_speed = hlt.constants.MAX_SPEED
-            ship_action_limit = 100
-            ship_dock_ratio = 1
-            ship_dock_enemy_watch_range = 30
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships
-            action_ship_long_range = 75
-            action_planet_long_range = 200
-            action_planet_target_limit = 0
-            action_target_docked_range = 100
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 0
-            action_planet_refill_percent = 50
-            action_planet_claim_percent = 70
-            action_collide_docked_percent = 0
-            action_target_docked_percent = 95
-        elif turn > 10:
-            ship_time_limit = 1.9
-            ship_speed = hlt.constants.MAX_SPEED
-            ship_action_limit = 100
-            ship_dock_ratio = 1
-            ship_dock_enemy_watch_range = 30
-            ship_shun_center_planets = False
-            action_ships = my_undocked_ships
-            action_ship_long_range = 50
-            action_planet_long_range = 200
-            action_planet_target_limit = 2
-            action_target_docked_range = 100
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 0
-            action_planet_refill_percent = 85
-            action_planet_claim_percent = 95
-            action_collide_docked_percent = 0
-            action_target_docked_percent = 100
-        else:
-            ship_time_limit = 1.9
-            ship_speed = hlt.constants.MAX_SPEED
-            ship_action_limit = 100
-            ship_dock_ratio = 1
-            ship_dock_enemy_watch_range = 30
-            ship_shun_center_planets = True
-            action_ships = sample(my_undocked_ships, min(ship_action_limit, len(my_undocked_ships)))
-            action_ship_long_range = 50
-            action_planet_long_range = 100
-            action_planet_target_limit = 2
-            action_target_docked_range = 100
-            navigate_ignore_ships_threshold = 100
-            action_destroy_planet_percent = 0
-            action_planet_refill_percent = 80
-            action_planet_claim_percent = 100
-            action_collide_docked_percent = 0
-            action_target_docked_percent = 0
-
-        action_ships.sort(key=lambda x: x.id)
-        owned_planets = [p for p in game_map.all_planets() if p.owner == game_map.get_me()]
-        unowned_planets = [p for p in game_map.all_planets() if not p.is_owned()]
-        unowned_planets.sort(key=lambda x: x.id)
-        if ship_shun_center_planets:
-            unowned_planets = [p for p in unowned_planets if p.id > 3]
-
-        if len(my_undocked_ships) + len(enemy_undocked_ships) > navigate_ignore_ships_threshold:
-            ignore_ships = True
-        else:
-            ignore_ships = False
-
-        logger.info("turn: {} end of prep, start of ship loop after: {:.03f}"
-                    .format(turn, (time.time() - turn_start_time)))
-
-        #
-        # local variables
-        #
-        ship_actions = 0
-        ship_navigate = 0
-        ship_nowork = 0
-        ship_dock = 0
-        ship_dockwait = 0
-
-        # limit number of ships docking to the same planet
-        planet_docking = dict()
-        for p in game_map.all_planets():
-            planet_docking[p.id] = p.num_docking_spots - len(p._docked_ship_ids)
-        # limit number of ships navigating to the same planet
-        planet_targetting = defaultdict(int)
-        # Here we define the set of commands to be sent to the Halite engine at the end of the turn
-        command_queue = []
 
-        for ship in action_ships:
-            if (time.time() - turn_start_time) > ship_time_limit:
-                logger.warn("turn: {} ship: {} skipping due to time {}"
-                            .format(turn, ship.id, (time.time() - turn_start_time)))
+def collide_move(state, ship, target_planet, target_ship):
+    '''crash into an enemy ship docked at target_planet'''
+    ship_speed = state.params.ship_speed
+    target_point = ship.closest_point_to(target_ship, 0)
+    add_move(state, ship, [
+        partial(navigate_by_flow, ship, state.flow_fields, ('docked', target_planet.id), target_planet,
+                target_planet.radius + hlt.constants.DOCK_RADIUS, ship_speed),
+        partial(navigate, ship, target_point, state.game_map,
+                speed=ship_speed, ignore_ships=True)],
+        target_point, ship_speed, VALUE_DOCKED_SHIP)
+
+
+def attack_move(state, ship, target_ship):
+    '''close in on an enemy ship, to just short of it'''
+    params = state.params
+    distance = params.ship_navigate_distance + (ship.id % 3) * 0.5
+    target_point = hlt.prediction.lead_target(ship, target_ship, distance, params.ship_speed)
+    add_move(state, ship, [partial(navigate, ship, target_point, state.game_map, speed=params.ship_speed,
+                                   ignore_ships=state.ignore_ships)],
+             target_point, params.ship_speed,
+             VALUE_DOCKED_SHIP if target_ship.docking_status != target_ship.DockingStatus.UNDOCKED else 0)
+
+
+def assign_targets(state, ships, budget):
+    '''One global min-cost assignment of ships to planet docking spots, docked enemy ships and enemy swarms, in
+    place of each ship in turn taking its closest target. Which kinds of target a ship may take still follows its
+    role; planets come before docked ships, and docked ships before the rest, whatever the distance. A ship
+    sent to a swarm attacks its closest member. Returns {ship id: (kind, target)} for the ships that got one.'''
+    logger = logging.getLogger(__name__)
+    params = state.params
+    if not ships:
+        return {}
+    roles = state.roles
+    ship_ids = [ship.id for ship in ships]
+    xs = [ship.x for ship in ships]
+    ys = [ship.y for ship in ships]
+
+    targets = []
+    blocks = []
+    capacities = []
+
+    def unsafe(planet):
+        radius = planet.radius + hlt.constants.DOCK_RADIUS
+        return max(state.threat.peak(planet.x, planet.y, radius) - state.support.peak(planet.x, planet.y, radius), 0)
+
+    def contested(planet):
+        return state.enemy_heat.presence(planet.x, planet.y, planet.radius + hlt.influence.ATTACK_REACH)
+
+    def add_targets(kind, entities, capacity, eligible, max_distance, penalty=0):
+        if not entities:
+            return
+        costs = hlt.assignment.distance_costs(xs, ys, [e.x for e in entities], [e.y for e in entities],
+                                              [e.radius for e in entities], max_distance) + penalty
+        if kind in ('refill', 'claim'):
+            # enemies that outnumber us around a planet would pick off ships docking there, and enemies that keep
+            # coming back are likely to
+            costs += np.array([ASSIGN_PENALTY_UNSAFE * unsafe(p) + ASSIGN_PENALTY_CONTESTED * contested(p)
+                               for p in entities])
+        costs[~eligible] = math.inf
+        targets.extend((kind, e) for e in entities)
+        blocks.append(costs)
+        capacities.extend(capacity(e) for e in entities)
+
+    add_targets('refill', state.refill_planets,
+                lambda p: p.num_docking_spots - len(p._docked_ships) - state.planet_targetting[p.id],
+                roles.mask(ship_ids, 'refill'), params.action_planet_long_range)
+    add_targets('claim', state.unowned_planets,
+                lambda p: p.num_docking_spots - state.planet_targetting[p.id],
+                roles.mask(ship_ids, 'claim'), 100)
+    # the kind taken at a docked ship depends on the ship that takes it, see below
+    add_targets('docked', state.enemy_docked_ships, lambda s: ASSIGN_DOCKED_SHIP_CAPACITY,
+                roles.mask(ship_ids, 'collide') | roles.mask(ship_ids, 'target docked'),
+                params.action_target_docked_range, ASSIGN_PENALTY_SHIP)
+    add_targets('attack', state.enemy_swarms,
+                lambda w: max(1, -(-len(ships) // len(state.enemy_ships))) * ASSIGN_ENEMY_SHIP_SHARE * w.size,
+                np.ones(len(ships), dtype=bool), params.action_ship_long_range, 2 * ASSIGN_PENALTY_SHIP)
+    if not targets:
+        return {}
+
+    solution = hlt.assignment.solve(np.hstack(blocks), capacities, budget, 3 * ASSIGN_PENALTY_SHIP)
+    logger.debug("turn: {} assigned {} ships to {} targets by {}"
+                 .format(state.turn, len(ships), len(targets), solution.method))
+    state.counts['assign ' + solution.method] += 1
+    assignment = {}
+    for ship, index in zip(ships, solution.targets.tolist()):
+        if index == hlt.assignment.UNASSIGNED:
+            continue
+        kind, target = targets[index]
+        if kind == 'docked':
+            kind = 'collide' if roles.allows(ship.id, 'collide') else 'attack'
+        elif kind == 'attack':
+            target = swarm_member(state, target, ship)
+        assignment[ship.id] = (kind, target)
+    return assignment
+
+
+def nearest_planet_target(state, ship):
+    '''for a ship the assignment left without a target: the nearest of my planets with a spot nobody is headed for,
+    or else the nearest such unowned planet, as far as its role allows, from the planet index's label rasters.
+    Returns (kind, planet), or None.'''
+    def free(planet):
+        docked = len(planet._docked_ships) if planet.is_owned() else 0
+        return planet.num_docking_spots - docked - state.planet_targetting[planet.id] > 0
+
+    for kind, planets in (('refill', state.refill_planets), ('claim', state.claim_planets)):
+        if planets and state.roles.allows(ship.id, kind):
+            planet = state.planet_index.closest(ship, planets, state.params.action_planet_long_range, accept=free,
+                                                surface=True)
+            if planet is not None:
+                return kind, planet
+    return None
+
+
+def engagement_odds(state, engagements):
+    '''Play every (ship, enemy) engagement ENGAGE_TURNS forward with the ship closing in on the enemy, in one
+    batch, among all ships within ENGAGE_RADIUS of it. An engagement is favourable when the other side loses at
+    least as much health as mine.'''
+    if not engagements:
+        return []
+    game_map = state.game_map
+    columns = game_map.ship_columns()
+    groups = []
+    closing = []
+    for ship, target_ship in engagements:
+        near = np.flatnonzero(np.hypot(columns.x - ship.x, columns.y - ship.y) <= ENGAGE_RADIUS)
+        groups.append(near.tolist())
+        closing.append(int(np.searchsorted(near, columns.row_of(ship.id))))
+    rows, real = hlt.combat.pack(groups, max(len(group) for group in groups))
+    fights = np.arange(len(engagements))
+
+    # the engaging ship heads for its target, stopping just inside firing range; everyone else keeps their velocity
+    vel_xs = np.where(real, columns.vel_x[rows], 0.0)
+    vel_ys = np.where(real, columns.vel_y[rows], 0.0)
+    dx = np.array([target.x - ship.x for ship, target in engagements])
+    dy = np.array([target.y - ship.y for ship, target in engagements])
+    distance = np.maximum(np.hypot(dx, dy), 1e-9)
+    speed = np.clip(distance - hlt.combat.FIRING_RANGE + 1, 0, hlt.constants.MAX_SPEED)
+    vel_xs[fights, closing] = dx / distance * speed
+    vel_ys[fights, closing] = dy / distance * speed
+
+    owners = np.where(real, columns.owner[rows], -1)
+    health = np.where(real, columns.health[rows], 0)
+    outcome = hlt.combat.resolve(columns.x[rows], columns.y[rows], owners, health, columns.weapon_cooldown[rows],
+                                 ~columns.undocked()[rows], vel_xs, vel_ys, turns=ENGAGE_TURNS)
+    lost = health - outcome.health
+    mine = owners == game_map.my_id
+    return ((lost * (real & ~mine)).sum(axis=1) >= (lost * mine).sum(axis=1)).tolist()
+
+
+def contested_regions(engagements):
+    '''group the engagements whose ships are within ENGAGE_RADIUS of the first ship of a group'''
+    regions = []
+    for index, (ship, target_ship) in enumerate(engagements):
+        for region in regions:
+            anchor = engagements[region[0]][0]
+            if math.hypot(ship.x - anchor.x, ship.y - anchor.y) <= ENGAGE_RADIUS:
+                region.append(index)
                 break
+        else:
+            regions.append([index])
+    return regions
+
+
+def engagement_plans(state, engagements, budget):
+    '''Which engagements to take. Each contested region is played ROLLOUT_TURNS forward, the enemy charging in,
+    under three joint policies of mine: each ship takes its fight only when engagement_odds() finds it favourable,
+    every ship takes it, or every ship falls back. Regions the budget does not reach go by the odds alone.'''
+    taken = engagement_odds(state, engagements)
+    game_map = state.game_map
+    columns = game_map.ship_columns()
+    for region in contested_regions(engagements):
+        if budget.exhausted():
+            break
+        anchor = engagements[region[0]][0]
+        near = np.flatnonzero(np.hypot(columns.x - anchor.x, columns.y - anchor.y) <= 2 * ENGAGE_RADIUS)
+        ship_rows = [columns.row_of(engagements[i][0].id) for i in region]
+        target_rows = [columns.row_of(engagements[i][1].id) for i in region]
+        rows = np.union1d(near, ship_rows + target_rows)
+        frame = hlt.simulation.Frame.from_map(game_map, rows)
+        engaging = np.searchsorted(rows, ship_rows)
+        targets = np.searchsorted(rows, target_rows)
+
+        def plan(chosen):
+            def policy(frame):
+                # the ships not engaging hold; the engaging ones close in on their target or head straight away
+                xs, ys, stop = frame.x.copy(), frame.y.copy(), np.zeros(len(frame))
+                xs[engaging] = np.where(chosen, frame.x[targets], 2 * frame.x[engaging] - frame.x[targets])
+                ys[engaging] = np.where(chosen, frame.y[targets], 2 * frame.y[engaging] - frame.y[targets])
+                stop[engaging] = np.where(chosen, hlt.combat.FIRING_RANGE - 1, 0)
+                thrust_x, thrust_y = hlt.simulation.toward(frame, xs, ys, stop)
+                return hlt.simulation.Commands(thrust_x, thrust_y, np.zeros(len(frame), dtype=bool))
+            return hlt.simulation.joint({game_map.my_id: policy}, default=hlt.simulation.charge)
+
+        choices = [np.array([taken[i] for i in region]), np.ones(len(region), dtype=bool),
+                   np.zeros(len(region), dtype=bool)]
+        result = hlt.simulation.rollout(frame, [plan(chosen) for chosen in choices], game_map.my_id, budget,
+                                        ROLLOUT_TURNS)
+        if result.best is not None:
+            state.counts['rollout'] += 1
+            for i, chosen in zip(region, choices[result.best].tolist()):
+                taken[i] = chosen
+    return taken
+
+
+def swarm_member(state, swarm, ship):
+    '''the ship of an enemy swarm closest to one of mine'''
+    columns = state.game_map.ship_columns()
+    rows = state.clusters.members(swarm.cluster)
+    return columns.ships[rows[np.hypot(columns.x[rows] - ship.x, columns.y[rows] - ship.y).argmin()]]
+
+
+def closest_swarm_target(state, ship, max_distance):
+    '''the closest ship of the closest enemy swarm (measured to its edge), rather than a loop over every enemy
+    ship; None when no swarm is within max_distance'''
+    if not state.enemy_swarms:
+        return None
+    distances = [math.hypot(swarm.x - ship.x, swarm.y - ship.y) - swarm.radius for swarm in state.enemy_swarms]
+    best = int(np.argmin(distances))
+    if distances[best] >= max_distance:
+        return None
+    return swarm_member(state, state.enemy_swarms[best], ship)
+
+
+def swarm_center(state, ship):
+    '''the centroid of the cluster a ship is in'''
+    clusters = state.clusters
+    cluster = clusters.label[state.game_map.ship_columns().row_of(ship.id)]
+    return hlt.entity.Position(clusters.x[cluster], clusters.y[cluster])
+
+
+def retreat_point(game_map, ship, enemy):
+    '''a full thrust straight away from the enemy, kept on the map'''
+    dx = ship.x - enemy.x
+    dy = ship.y - enemy.y
+    distance = max(math.hypot(dx, dy), 1e-9)
+    x = min(max(ship.x + dx / distance * hlt.constants.MAX_SPEED, 1), game_map.width - 1)
+    y = min(max(ship.y + dy / distance * hlt.constants.MAX_SPEED, 1), game_map.height - 1)
+    return hlt.entity.Position(x, y)
+
+
+def follow_order(state, ship, order):
+    '''rebuild a ship's move from its standing order; False if the order no longer fits this turn'''
+    if order.target_is_planet:
+        planet = state.game_map.get_planet(order.target_id)
+        if order.kind == 'destroy':
+            destroy_move(state, ship, planet)
+            return True
+        if (order.kind == 'refill' and planet in state.refill_planets and
+                planet.num_docking_spots > len(planet._docked_ships) + state.planet_targetting[planet.id]):
+            refill_move(state, ship, planet)
+            return True
+        if order.kind == 'claim' and planet in state.unowned_planets:
+            claim_move(state, ship, planet)
+            return True
+        return False
+    target_ship = state.enemy_ships_by_id.get(order.target_id)
+    if order.kind == 'collide' and target_ship.planet is not None:
+        collide_move(state, ship, target_ship.planet, target_ship)
+        return True
+    if order.kind == 'attack':
+        attack_move(state, ship, target_ship)
+        return True
+    return False
 
-            # limit the number of ships we look at per turn, just in case
-            ship_actions += 1
-            if ship_actions > ship_action_limit:
-                logger.warn("turn: {} ship: {} skipping due to ship actions {} after {:.03f} seconds"
-                            .format(turn, ship.id, ship_actions, time.time() - turn_start_time))
+
+def assign_stage(state, budget):
+    '''decide what every acting ship does: keep its standing order, dock now, or pick a new target'''
+    logger = logging.getLogger(__name__)
+    turn, game_map, params, counts = state.turn, state.game_map, state.params, state.counts
+    orders = state.orders
+    enemy_ships, enemy_docked_ships = state.enemy_ships, state.enemy_docked_ships
+    enemy_owned_planets = state.enemy_owned_planets
+    ship_speed = params.ship_speed
+
+    percents = {'destroy': params.action_destroy_planet_percent, 'refill': params.action_planet_refill_percent,
+                'claim': params.action_planet_claim_percent, 'collide': params.action_collide_docked_percent,
+                'target docked': params.action_target_docked_percent}
+    if percents != state.roles.percents:
+        moved = state.roles.rebalance(percents)
+        logger.debug("turn: {} new phase {}, {} ships change role".format(turn, percents, len(moved)))
+        # orders were given under the old policy
+        orders.clear()
+    logger.debug("turn: {} ships by role: {}".format(turn, state.roles.counts()))
+    dropped = orders.begin_turn(game_map, params.ship_dock_enemy_watch_range)
+    if dropped:
+        logger.debug("turn: {} dropped orders: {}".format(turn, dropped))
+
+    # limit number of ships docking to the same planet
+    planet_docking = dict()
+    for p in game_map.all_planets():
+        planet_docking[p.id] = p.num_docking_spots - len(p._docked_ship_ids)
+    # limit number of ships navigating to the same planet
+    state.planet_targetting = defaultdict(int)
+    # ships left to the global assignment, and ships with an enemy in watch range
+    pending = []
+    engagements = []
+
+    for ship in params.action_ships:
+        if budget.exhausted():
+            logger.warn("turn: {} ship: {} skipping due to time {}"
+                        .format(turn, ship.id, (time.time() - state.turn_start_time)))
+            break
+
+        # limit the number of ships we look at per turn, just in case
+        counts['actions'] += 1
+        if counts['actions'] > params.ship_action_limit:
+            logger.warn("turn: {} ship: {} skipping due to ship actions {} after {:.03f} seconds"
+                        .format(turn, ship.id, counts['actions'], time.time() - state.turn_start_time))
+            continue
+
+        if turn == 1:
+            logger.debug("turn: {} ship: {} calling with my_undocked_ships: {}"
+                         .format(turn, ship.id, pprint.pformat(state.my_undocked_ships)))
+            avoidance = navigate_away_from_list(ship, state.my_undocked_ships)
+            logger.debug("turn: {} ship: {} collision avoidance: {},{}"
+                         .format(turn, ship.id, avoidance.x, avoidance.y))
+            add_move(state, ship, [partial(navigate, ship, avoidance, game_map, speed=hlt.constants.MAX_SPEED,
+                                           ignore_ships=False)],
+                     avoidance, hlt.constants.MAX_SPEED)
+            continue
+
+        # nothing that matters to a standing order has changed: skip the searches below
+        order = orders.get(ship.id)
+        if order is not None:
+            if follow_order(state, ship, order):
+                counts['kept'] += 1
                 continue
+            orders.cancel(ship.id)
 
-            if turn == 1:
-                logger.debug("turn: {} ship: {} calling with my_undocked_ships: {}"
-                             .format(turn, ship.id, pprint.pformat(my_undocked_ships)))
-                avoidance = navigate_away_from_list(ship, my_undocked_ships)
-                logger.debug("turn: {} ship: {} collision avoidance: {},{}"
-                             .format(turn, ship.id, avoidance.x, avoidance.y))
-                navigate_command = ship.navigate(avoidance,
-                                                 game_map, speed=hlt.constants.MAX_SPEED,
-                                                 ignore_ships=False)
-                ship_navigate += 1
-                if navigate_command:
-                    command_queue.append(navigate_command)
+        # Before docking check for nearby enemies
+        target_ship = None
+        # the watch map rules out most ships without looking at a single enemy
+        if params.ship_dock_enemy_watch_range > 0 and state.watch.at(ship.x, ship.y) > 0:
+            target_ship = closest_target_from_list(game_map, ship,
+                                                   enemy_ships, params.ship_dock_enemy_watch_range)
+            if target_ship:
+                # whether to take the fight is decided for all engagements at once, below
+                engagements.append((ship, target_ship))
                 continue
 
-            # Before docking check for nearby enemies
-            if ship_dock_enemy_watch_range > 0:
-                target_ship = closest_target_from_list(game_map, ship,
-                                                       enemy_ships, ship_dock_enemy_watch_range)
-                if target_ship:
-                    logger.info("turn: {} ship: {} defensive targetting ship: {}"
-                                .format(turn, ship.id, target_ship.id))
-                    navigate_command = ship.navigate(ship.closest_point_to(target_ship, ship_navigate_distance),
-                                                     game_map, speed=ship_speed,
-                                                     ignore_ships=ignore_ships)
-                    ship_navigate += 1
-                    if navigate_command:
-                        command_queue.append(navigate_command)
-                    continue
-
-            # if we're next to a planet, maybe do that
-            #if ship_dock_ratio > 0 and (hash(ship.id) % ship_dock_ratio) == 0:
-            if ship_dock_ratio == 1 or randint(0, ship_dock_ratio-1) == 0:
-                logger.debug("ship id {} hash {} checking for dock, ship_dock_ratio {}"
-                             .format(ship.id, hash(ship.id) % 100, ship_dock_ratio))
-                docking_target = nearby_planet_if_dockable(game_map, ship)
-                if docking_target:
-                    if planet_docking[docking_target.id] > 0:
-                        logger.info("turn: {} ship: {} docking to planet: {}"
-                                    .format(turn, ship.id, docking_target.id))
-                        planet_docking[docking_target.id] -= 1
-                        command_queue.append(ship.dock(docking_target))
-                        ship_dock += 1
-                    else:
-                        ship_dockwait += 1
-                        # this will not fall through and instead wait a turn and check again
-                    continue
-                # else fall through to planet/ship navigation
-
-            if hash(ship.id) % 100 < action_destroy_planet_percent: 
-                # move to an enemy planet
-                logger.debug("ship: {} targetting the planet! ...".format(ship.id))
-                time_1 = time.time()
-                planet = closest_target_from_list(game_map, ship, enemy_owned_planets, action_planet_long_range)
-                if planet:
-                    logger.debug("ship: {} targetting closest returned planet id,x,y {},{},{} in {:.06f}"
-                                 .format(ship.id, planet.id, planet.x, planet.y, time.time() - time_1))
-                    target_point = ship.closest_point_to(planet, -1)
-                    navigate_command = ship.navigate(target_point, game_map,
-                                                     speed=hlt.constants.MAX_SPEED,
-                                                     ignore_ships=True)
-                    ship_navigate += 1
-                    if navigate_command:
-                        command_queue.append(navigate_command)
-                        continue
-                # else fall through
-
-            if hash(ship.id) % 100 < action_planet_refill_percent:
-                # find ship's closest owned planet with empty docking slots
-                logger.debug("ship id {} hash {} is planet refill action (percent: {})"
-                             .format(ship.id, hash(ship.id) % 100, action_planet_refill_percent))
-                planet = find_closest_owned_planet_with_docking(game_map, ship, owned_planets,
-                                                                action_planet_long_range,
-                                                                planet_targetting)
-                if planet:
-                    logger.info("turn: {} ship: {} x,y {},{} off to refill planet: {} x,y {},{}"
-                                .format(turn, ship.id, ship.x, ship.y,
-                                        planet.id, planet.x, planet.y))
-                    target_point = ship.closest_point_to(planet, planet_navigate_distance)
-                    navigate_command = ship.navigate(target_point, game_map,
-                                                     speed=ship_speed,
-                                                     ignore_ships=ignore_ships)
-                    ship_navigate += 1
-                    if navigate_command:
-                        command_queue.append(navigate_command)
-                    if action_planet_target_limit > 0:
-                        planet_targetting[planet.id] += 1
-                        if (not planet.is_owned() and
-                                planet_targetting[planet.id] > (planet.num_docking_spots)):
-                            logger.info("turn: {} ship: {} removing planet from unowned targetting {}"
-                                        .format(turn, ship.id, planet.id))
-                            unowned_planets.remove(planet)
-                    continue
-
-            if hash(ship.id) % 100 < action_planet_claim_percent:
-                # find ship's closest planet to navigate to
-                logger.debug("ship id {} hash {} is planet claim action (percent: {})"
-                             .format(ship.id, hash(ship.id) % 100, action_planet_claim_percent))
-                planet = find_closest_unowned_planet(game_map, ship, unowned_planets, 100)
-                if planet:
-                    logger.info("turn: {} ship: {} x,y {},{} off to planet: {} x,y {},{}"
-                                .format(turn, ship.id, ship.x, ship.y,
-                                        planet.id, planet.x, planet.y))
-                    target_point = ship.closest_point_to(planet, planet_navigate_distance)
-                    navigate_command = ship.navigate(target_point, game_map,
-                                                     speed=ship_speed,
-                                                     ignore_ships=ignore_ships)
-                    ship_navigate += 1
-                    if ship_shun_center_planets and planet.id < 4:
-                        logger.debug("planet: {} used when shunned".format(planet.id))
-                    if navigate_command:
-                        command_queue.append(navigate_command)
-                    if action_planet_target_limit > 0:
-                        planet_targetting[planet.id] += 1
-                        if (not planet.is_owned() and
-                                planet_targetting[planet.id] > (planet.num_docking_spots)):
-                            logger.info("turn: {} ship: {} removing planet from unowned targetting {}"
-                                        .format(turn, ship.id, planet.id))
-                            unowned_planets.remove(planet)
-                    continue
-                # else this will fall through to aggressive anti-ship behavior
-
-            # anti-ship action 
-            logger.debug("ship id {} hash {} is ship action"
-                         .format(ship.id, hash(ship.id) % 100))
-            if hash(ship.id) % 100 < action_collide_docked_percent and len(enemy_docked_ships) > 0:
-                logger.debug("ship: {} colliding with docked ...".format(ship.id))
-                time_1 = time.time()
-                target_planet = closest_target_from_list(game_map, ship,
-                                                         enemy_owned_planets,
-                                                         action_target_docked_range)
-                if target_planet:
-                    target_ship_index = hash(ship.id) % len(target_planet._docked_ship_ids)
-                    target_ship = target_planet._docked_ships[target_planet._docked_ship_ids[target_ship_index]]
-                    logger.debug("ship: {} targetting planet {} docked id,x,y {},{},{} in {:.06f}"
-                                 .format(ship.id, target_planet.id,
-                                         target_ship.id, target_ship.x, target_ship.y,
-                                         time.time() - time_1))
-                    navigate_command = ship.navigate(ship.closest_point_to(target_ship, 0),
-                                                     game_map, speed=ship_speed,
-                                                     ignore_ships=True)
-                    ship_navigate += 1
-                    if navigate_command:
-                        command_queue.append(navigate_command)
-                        continue
-                # else fall through
-
-            if hash(ship.id) % 100 < action_target_docked_percent and len(enemy_docked_ships) > 0:
-                time_1 = time.time()
-                target_planet = closest_target_from_list(game_map, ship,
-                                                         enemy_owned_planets,
-                                                         action_target_docked_range)
-                if target_planet:
-                    target_ship_index = hash(ship.id) % len(target_planet._docked_ship_ids)
-                    target_ship = target_planet._docked_ships[target_planet._docked_ship_ids[target_ship_index]]
-                    logger.debug("ship: {} targetting planet {} docked id,x,y {},{},{} in {:.06f}"
-                                 .format(ship.id, target_planet.id,
-                                         target_ship.id, target_ship.x, target_ship.y,
-                                         time.time() - time_1))
-            else:
-                logger.debug("ship: {} hash {} not less than {} or no docked ships"
-                             .format(ship.id, hash(ship.id) % 100, action_target_docked_percent))
-
-            if not target_ship:
-                time_1 = time.time()
-                target_ship = closest_target_from_list(game_map, ship, enemy_ships, action_ship_long_range)
-                if target_ship:
-                    logger.debug("ship: {} targetting closest returned id,x,y {},{},{} in {:.06f}"
-                                 .format(ship.id,
-                                         target_ship.id, target_ship.x, target_ship.y,
-                                         time.time() - time_1))
+        # if we're next to a planet, maybe do that
+        # every ship checks once every ship_dock_ratio turns, the ships taking turns by role bucket
+        if (state.roles.bucket(ship.id) + turn) % params.ship_dock_ratio == 0:
+            logger.debug("ship id {} bucket {} checking for dock, ship_dock_ratio {}"
+                         .format(ship.id, state.roles.bucket(ship.id), params.ship_dock_ratio))
+            docking_target = nearby_planet_if_dockable(game_map, ship, state.dockable_planets)
+            if docking_target:
+                if planet_docking[docking_target.id] > 0:
+                    logger.info("turn: {} ship: {} docking to planet: {}"
+                                .format(turn, ship.id, docking_target.id))
+                    planet_docking[docking_target.id] -= 1
+                    state.commands.refine(ship.id, ship.dock(docking_target))
+                    counts['dock'] += 1
                 else:
-                    logger.debug("ship: {} didn't find closest_target_from_list(,,len={},range={})"
-                                 .format(ship.id, len(enemy_ships), action_ship_long_range))
-                    maybe_ship = closest_target_from_list(game_map, ship, enemy_ships, 2000)
-                    if maybe_ship:
-                        logger.debug("ship: {} would've found ship: {} at x,y {},{} distance {}"
-                                     .format(ship.id, maybe_ship.id, maybe_ship.x, maybe_ship.y,
-                                             ship.calculate_distance_between(maybe_ship)))
+                    state.commands.refine(ship.id, None)
+                    counts['dockwait'] += 1
+                    # this will not fall through and instead wait a turn and check again
+                state.targets.pop(ship.id, None)
+                continue
+            # else fall through to planet/ship navigation
 
-            if target_ship:
+        if state.roles.allows(ship.id, 'destroy'):
+            # move to an enemy planet
+            logger.debug("ship: {} targetting the planet! ...".format(ship.id))
+            time_1 = time.time()
+            planet = closest_target_from_list(game_map, ship, enemy_owned_planets, params.action_planet_long_range)
+            if planet:
+                logger.debug("ship: {} targetting closest returned planet id,x,y {},{},{} in {:.06f}"
+                             .format(ship.id, planet.id, planet.x, planet.y, time.time() - time_1))
+                destroy_move(state, ship, planet)
+                orders.issue(ship, 'destroy', planet, turn, arrive_distance=0)
+                continue
+            # else fall through
+
+        pending.append(ship)
+
+    for (ship, target_ship), favourable in zip(engagements, engagement_plans(state, engagements, budget.share(4))):
+        if favourable:
+            logger.info("turn: {} ship: {} defensive targetting ship: {}"
+                        .format(turn, ship.id, target_ship.id))
+            target_point = hlt.prediction.lead_target(ship, target_ship, params.ship_navigate_distance, ship_speed)
+        else:
+            logger.info("turn: {} ship: {} falling back from ship: {}"
+                        .format(turn, ship.id, target_ship.id))
+            # fall back from the whole swarm the enemy is part of, not just the one ship
+            target_point = retreat_point(game_map, ship, swarm_center(state, target_ship))
+            counts['retreat'] += 1
+        add_move(state, ship, [partial(navigate, ship, target_point, game_map, speed=ship_speed,
+                                       ignore_ships=state.ignore_ships)],
+                 target_point, ship_speed)
+
+    # everyone else shares out the docking spots and enemy ships in one go
+    assignment = assign_targets(state, pending, budget.share(2))
+    for ship in pending:
+        if budget.exhausted():
+            logger.warn("turn: {} ship: {} skipping due to time {}"
+                        .format(turn, ship.id, (time.time() - state.turn_start_time)))
+            break
+        kind, target = assignment.get(ship.id, (None, None))
+        if kind is None:
+            kind, target = nearest_planet_target(state, ship) or (None, None)
+        if kind == 'refill':
+            logger.info("turn: {} ship: {} x,y {},{} off to refill planet: {} x,y {},{}"
+                        .format(turn, ship.id, ship.x, ship.y, target.id, target.x, target.y))
+            refill_move(state, ship, target)
+            orders.issue(ship, 'refill', target, turn)
+        elif kind == 'claim':
+            logger.info("turn: {} ship: {} x,y {},{} off to planet: {} x,y {},{}"
+                        .format(turn, ship.id, ship.x, ship.y, target.id, target.x, target.y))
+            claim_move(state, ship, target)
+            orders.issue(ship, 'claim', target, turn)
+        elif kind == 'collide':
+            logger.debug("ship: {} colliding with docked id,x,y {},{},{}"
+                         .format(ship.id, target.id, target.x, target.y))
+            collide_move(state, ship, target.planet, target)
+            orders.issue(ship, 'collide', target, turn, arrive_distance=0)
+        else:
+            if kind is None:
+                # more ships than targets can take: fall back to the closest enemy, however busy
+                target = closest_swarm_target(state, ship, params.action_ship_long_range)
+            if target:
                 logger.info("turn: {} ship: {} targetting ship: {}"
-                            .format(turn, ship.id, target_ship.id))
-                distance = ship_navigate_distance + (ship.id % 3) * 0.5
-                navigate_command = ship.navigate(ship.closest_point_to(target_ship, distance),
-                                                 game_map, speed=ship_speed,
-                                                 ignore_ships=ignore_ships)
-                ship_navigate += 1
-                if navigate_command:
-                    command_queue.append(navigate_command)
+                            .format(turn, ship.id, target.id))
+                attack_move(state, ship, target)
+                orders.issue(ship, 'attack', target, turn, arrive_distance=hlt.constants.WEAPON_RADIUS)
             else:
-                ship_nowork += 1
-                ship_skip_list.append(ship.id)  # skip check next turn
+                counts['nowork'] += 1
+                state.ship_skip_list.append(ship.id)  # skip check next turn
+                state.targets.pop(ship.id, None)
+                state.commands.refine(ship.id, None)
                 logger.debug("turn: {} ship: {} at x,y {},{} no work"
                              .format(turn, ship.id, ship.x, ship.y))
 
-        # Send our set of commands to the Halite engine for this turn
-        turn_end_presend = time.time()
-        logger.info("turn: {} end ships time: {:.03f} actions {} navigate {} dock {} dockwait {} nowork {}"
-                    .format(turn, turn_end_presend - turn_start_time,
-                            ship_actions, ship_navigate, ship_dock, ship_dockwait, ship_nowork))
-        game.send_command_queue(command_queue)
-        # logger.debug("turn: {} send_command_queue len: {} took: {:.03f}"
-        #             .format(turn, len(command_queue), time.time() - turn_end_presend))
-        logger.info("turn: {} end, sent {} commands, took: {:.03f}"
-                    .format(turn, len(command_queue), time.time() - turn_start_time))
+
+def navigate_stage(state, budget):
+    '''turn every ship's moves into a command, most urgent ships first; the rest get a cheap fallback'''
+    logger = logging.getLogger(__name__)
+    # the phase's own time limit still holds when the pipeline would allow more
+    deadline = state.turn_start_time + state.params.ship_time_limit - time.time() + time.perf_counter()
+    budget = hlt.budget.Budget(deadline=min(budget.deadline, deadline))
+    for move in state.moves:
+        state.scheduler.add(move.ship.id, state.urgency.get(move.ship.id, 0) + move.value, move.cost,
+                            partial(try_attempts, move.attempts),
+                            partial(fallback_thrust, move.ship, move.target, state.game_map, move.speed))
+    for ship_id, command, ran in state.scheduler.run(budget):
+        state.counts['navigate' if ran else 'fallback'] += 1
+        if ran or command:
+            state.commands.refine(ship_id, command)
+    # squad members copy their leader's move, and take on its order
+    for squad in state.squads:
+        commands = hlt.squads.follow(squad, state.commands.get(squad.leader.id), state.game_map, SQUAD_SPACING)
+        for ship_id, command in commands.items():
+            state.commands.refine(ship_id, command)
+            state.counts['follow'] += 1
+        target = state.targets.get(squad.leader.id)
+        if not commands and target is not None:
+            # the leader holds: its members head for its target on their own; with no target, they keep
+            # their baseline
+            for ship in squad.members:
+                state.commands.refine(ship.id, fallback_thrust(ship, target, state.game_map, state.params.ship_speed))
+                state.counts['fallback'] += 1
+        order = state.orders.get(squad.leader.id)
+        if order is not None:
+            for ship in squad.members:
+                state.orders.share(ship, order)
+    if state.counts['fallback']:
+        logger.warn("turn: {} {} ships fell back to a straight thrust after {:.03f} seconds"
+                    .format(state.turn, state.counts['fallback'], time.time() - state.turn_start_time))
+
+
+def emit_stage(state, budget):
+    '''send the commands'''
+    logger = logging.getLogger(__name__)
+    command_queue = avoid_friendly_collisions(state.game_map, state.commands.commands())
+
+    # Send our set of commands to the Halite engine for this turn
+    counts = state.counts
+    logger.info("turn: {} end ships time: {:.03f} actions {} kept orders {} navigate {} fallback {} dock {} dockwait {}"
+                " nowork {} retreat {} rollouts {} squads {} followers {} flow field hits {} misses {}"
+                " planet index hits {} misses {} paths {} planned {}"
+                .format(state.turn, time.time() - state.turn_start_time,
+                        counts['actions'], counts['kept'], counts['navigate'], counts['fallback'],
+                        counts['dock'], counts['dockwait'], counts['nowork'], counts['retreat'], counts['rollout'],
+                        len(state.squads), counts['follow'],
+                        state.flow_fields.hits, state.flow_fields.misses,
+                        state.planet_index.hits, state.planet_index.misses,
+                        len(state.paths), state.paths.planned))
+    state.game.send_command_queue(command_queue)
+    logger.info("turn: {} end, sent {} commands ({} baseline), took: {:.03f}"
+                .format(state.turn, len(command_queue), state.commands.baselines(),
+                        time.time() - state.turn_start_time))
+
+
+def halite2_main():
+    logger = logging.getLogger(__name__)
+    # GAME START
+    # Here we define the bot's name as Settler and initialize the game, including communication with the Halite engine.
+    game = hlt.Game("Settler %s" % VERSION)
+    hlt.geometry.use('numpy')
+    # Planets never move: build their distance field and docking ranges now rather than on the clock in turn 1
+    game.map.distance_field()
+    game.map.dock_zones()
+    state = SimpleNamespace(game=game, turn=0,
+                            flow_fields=hlt.flow_field.FlowFieldCache(game.map.width, game.map.height),
+                            paths=hlt.paths.PathBook(),
+                            # enemies within watch range, and the ships that can fire next turn, on both sides
+                            watch=hlt.influence.InfluenceMap(game.map.width, game.map.height),
+                            threat=hlt.influence.InfluenceMap(game.map.width, game.map.height),
+                            support=hlt.influence.InfluenceMap(game.map.width, game.map.height),
+                            # where enemy ships have been hanging around, lately
+                            enemy_heat=hlt.heatmap.Heatmap(game.map.width, game.map.height),
+                            # what the planets will produce, and for whom
+                            forecast=hlt.forecast.ProductionForecast(),
+                            # save ship_skip_list between turns
+                            ship_skip_list=list(),
+                            # where each ship was last sent, for its baseline command
+                            targets=dict(),
+                            scheduler=hlt.scheduler.DeadlineScheduler(),
+                            # nearest-planet label rasters, per set of planets (e.g. unowned, mine with spots)
+                            planet_index=hlt.voronoi.NearestPlanetIndex(game.map.width, game.map.height),
+                            # standing orders
+                            orders=hlt.orders.OrderBook(),
+                            # each ship's role bucket, balanced to the policy's percentages
+                            roles=hlt.roles.RoleTable())
+    # every planet starts out unowned: label them for claims now rather than on the clock in turn 1
+    state.planet_index.labels(game.map.all_planets(), surface=True)
+
+    # seconds per stage; an overrun shrinks what the stages after it get
+    pipeline = hlt.pipeline.TurnPipeline(TURN_SECONDS)
+    pipeline.add_stage('parse', parse_stage, 0.05)
+    pipeline.add_stage('index', index_stage, 0.05)
+    pipeline.add_stage('assess', assess_stage, 0.05)
+    pipeline.add_stage('baseline', baseline_stage, 0.05)
+    pipeline.add_stage('assign', assign_stage, 0.5)
+    pipeline.add_stage('navigate', navigate_stage, 1.1)
+    pipeline.add_stage('emit', emit_stage, 0.1)
+
+    while True:
+        # TURN START
+        state.moves = []  # (ship, [navigation attempts])
+        # Here we define the set of commands to be sent to the Halite engine at the end of the turn
+        state.commands = hlt.commands.CommandTable()
+        state.counts = defaultdict(int)
+        # the turn's clock starts once its frame is in: waiting for the engine and the other bots is not our time
+        state.game_map = game.update_map()
+        frame_arrived = time.perf_counter()
+        state.turn += 1
+        state.turn_start_time = time.time()
+        logger.info("turn: {} start at: {}".format(state.turn, datetime.now().isoformat('T')))
+        pipeline.run(state, start=frame_arrived)
+        logger.info("turn: {} stages {}".format(state.turn, pipeline.format_report()))
         # TURN END
         # GAME END
 
@@ -0,0 +1,248 @@
+"""
+Benchmarks and self-checks for the hlt kit, run outside of a game:
+
+    python bench.py
+
+Note: maps here are synthetic (random planets and ships), sized like the ones game.sh/game4.sh play on.
+"""
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import hlt
+
+MAP_SIZES = ((240, 160), (336, 224))
+
+
+def synthetic_frame(width, height, players=2, ships_per_player=100, planets=20, seed=0):
+    '''Build a game engine map string with randomly placed, non-overlapping planets and ships'''
+    rng = random.Random(seed)
+    placed = []
+    planet_tokens = []
+    while len(placed) < planets:
+        r = rng.uniform(3, 12)
+        x, y = rng.uniform(r + 5, width - r - 5), rng.uniform(r + 5, height - r - 5)
+        if all(math.hypot(x - px, y - py) > r + pr + 10 for px, py, pr in placed):
+            planet_tokens += [len(placed), x, y, int(r * 255), r, max(2, int(r / 3)), 0, int(r * 200), 0, 0, 0]
+            placed.append((x, y, r))
+
+    ship_tokens = [players]
+    ship_id = 0
+    for player in range(players):
+        ship_tokens += [player, ships_per_player]
+        for _ in range(ships_per_player):
+            while True:
+                x, y = rng.uniform(1, width - 1), rng.uniform(1, height - 1)
+                if all(math.hypot(x - px, y - py) > pr + 1 for px, py, pr in placed):
+                    break
+            ship_tokens += [ship_id, x, y, 255, 0, 0, 0, 0, 0, 0]
+            ship_id += 1
+    return " ".join(str(token) for token in ship_tokens + [planets] + planet_tokens)
+
+
+def synthetic_map(width, height, **kwargs):
+    game_map = hlt.game_map.Map(0, width, height)
+    game_map._parse(synthetic_frame(width, height, **kwargs))
+    return game_map
+
+
+def navigation_cases(game_map, count, seed=0):
+    '''(ship, target) pairs for navigate() runs'''
+    rng = random.Random(seed)
+    ships = game_map.get_me().all_ships()
+    return [(rng.choice(ships), hlt.entity.Position(rng.uniform(0, game_map.width), rng.uniform(0, game_map.height)))
+            for _ in range(count)]
+
+
+def commands_with_backend(backend, game_map, cases):
+    hlt.geometry.use(backend)
+    return [ship.navigate(target, game_map, hlt.constants.MAX_SPEED) for ship, target in cases]
+
+
+def per_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def geometry_report():
+    print("== geometry backends: parity ==")
+    game_map = synthetic_map(*MAP_SIZES[0])
+    cases = navigation_cases(game_map, 300)
+    reference = commands_with_backend('python', game_map, cases)
+    for backend in hlt.geometry.available():
+        commands = commands_with_backend(backend, game_map, cases)
+        changed = sum(1 for a, b in zip(reference, commands) if a != b)
+        print("{:8} navigate commands changed: {} of {}".format(backend, changed, len(cases)))
+
+    print("\n== geometry backends: microseconds per call ==")
+    print("{:8} {:>9} {:>9} {:>9} {:>9} {:>11} {:>9}"
+          .format("backend", "distance", "angle", "closest", "segment", "obstacles", "navigate"))
+    ship, target = cases[0]
+    planet = game_map.all_planets()[0]
+    for backend in hlt.geometry.available():
+        hlt.geometry.use(backend)
+        game_map.obstacles_between(ship, target)  # warm the per-parse caches (and any JIT)
+        row = [per_call(lambda: ship.calculate_distance_between(target), 20000),
+               per_call(lambda: ship.calculate_angle_between(target), 20000),
+               per_call(lambda: ship.closest_point_to(planet), 20000),
+               per_call(lambda: hlt.collision.intersect_segment_circle(ship, target, planet), 20000),
+               per_call(lambda: game_map.obstacles_between(ship, target), 500),
+               per_call(lambda: [s.navigate(t, game_map, 7) for s, t in cases[:20]], 5) / 20]
+        print("{:8} ".format(backend) + " ".join("{:9.2f}".format(value * 1e6) for value in row[:4]) +
+              " {:11.2f} {:9.2f}".format(row[4] * 1e6, row[5] * 1e6))
+    hlt.geometry.use('python')
+
+
+def legacy_navigate(ship, target, game_map, speed, avoid_obstacles=True, max_corrections=90, angular_step=1,
+                    ignore_ships=False, ignore_planets=False):
+    '''Ship.navigate as it was before it went allocation-free (one Position and one stack frame per correction)'''
+    if max_corrections <= 0:
+        return None
+    distance = ship.calculate_distance_between(target)
+    angle = ship.calculate_angle_between(target)
+    ignore = () if not (ignore_ships or ignore_planets) \
+        else hlt.entity.Ship if (ignore_ships and not ignore_planets) \
+        else hlt.entity.Planet if (ignore_planets and not ignore_ships) \
+        else hlt.entity.Entity
+    if avoid_obstacles and game_map.obstacles_between(ship, target, ignore):
+        new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
+        new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
+        new_target = hlt.entity.Position(ship.x + new_target_dx, ship.y + new_target_dy)
+        return legacy_navigate(ship, new_target, game_map, speed, True, max_corrections - 1, angular_step)
+    speed = speed if (distance >= speed) else distance
+    return ship.thrust(speed, angle)
+
+
+def allocated_blocks(function, repeat):
+    '''Memory blocks taken from the allocator per call, counting those freed again before the call returns'''
+    total = 0
+    level = 0
+
+    def count(frame, event, arg):
+        # sys.getallocatedblocks() only tells the net number in use, so add up its growth between every call and
+        # return inside the function, leaving out what this profiler does itself
+        nonlocal total, level
+        now = sys.getallocatedblocks()
+        if now > level:
+            total += now - level
+        level = sys.getallocatedblocks()
+
+    level = sys.getallocatedblocks()
+    sys.setprofile(count)
+    try:
+        for _ in range(repeat):
+            function()
+    finally:
+        sys.setprofile(None)
+    return total / repeat
+
+
+def traced(function, repeat):
+    '''Position objects and memory blocks allocated per call, and the tracemalloc peak (bytes above the starting
+    level) over all calls'''
+    blocks = allocated_blocks(function, repeat)
+    created = [0]
+    position_init = hlt.entity.Position.__init__
+
+    def counting_init(self, x, y):
+        created[0] += 1
+        position_init(self, x, y)
+
+    hlt.entity.Position.__init__ = counting_init
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(repeat):
+            function()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+        hlt.entity.Position.__init__ = position_init
+    return created[0] / repeat, blocks, peak
+
+
+def allocation_report():
+    print("\n== allocations per call: Position objects, memory blocks, tracemalloc peak ==")
+    game_map = synthetic_map(*MAP_SIZES[0])
+    cases = [(ship, target) for ship, target in navigation_cases(game_map, 2000)
+             if game_map.obstacles_between(ship, target)][:10]
+    ship, target = cases[0]
+    planet = game_map.all_planets()[0]
+    # each workload with the number of calls it makes, so navigate is reported per ship
+    workloads = (
+        ("navigate (recursive, before)",
+         lambda: [legacy_navigate(s, t, game_map, 7) for s, t in cases], len(cases)),
+        ("navigate (iterative)",
+         lambda: [s.navigate(t, game_map, 7) for s, t in cases], len(cases)),
+        ("closest_point_to",
+         lambda: ship.closest_point_to(planet), 1),
+        ("closest_point_xy",
+         lambda: ship.closest_point_xy(planet), 1),
+        ("intersect_segment_circle (Position end)",
+         lambda: hlt.collision.intersect_segment_circle(ship, hlt.entity.Position(target.x, target.y), planet), 1),
+        ("intersect_segment_circle_xy",
+         lambda: hlt.collision.intersect_segment_circle_xy(ship.x, ship.y, target.x, target.y,
+                                                           planet.x, planet.y, planet.radius), 1),
+    )
+    print("{:42} {:>14} {:>12} {:>12}".format("workload", "Positions", "blocks", "peak KiB"))
+    for name, function, calls in workloads:
+        function()
+        positions, blocks, peak = traced(function, 2)
+        print("{:42} {:14.1f} {:12.1f} {:12.1f}".format(name, positions / calls, blocks / calls, peak / 1024))
+
+
+def distance_field_report():
+    print("\n== planet distance field ==")
+    print("{:9} {:>10} {:>10} {:>10} {:>13} {:>13} {:>9}"
+          .format("map", "cells", "KiB", "build ms", "sdf us/seg", "exact us/seg", "changed"))
+    for width, height in MAP_SIZES:
+        game_map = synthetic_map(width, height)
+        cases = navigation_cases(game_map, 300)
+        thrusts = [(ship, hlt.entity.Position(ship.x + 7 * math.cos(math.radians(angle)),
+                                              ship.y + 7 * math.sin(math.radians(angle))))
+                   for (ship, _), angle in zip(cases, range(0, 360 * 7, 7))]
+        before = [ship.navigate(target, game_map, 7, ignore_ships=True) for ship, target in cases]
+        start = time.perf_counter()
+        field = game_map.distance_field()
+        build = time.perf_counter() - start
+        after = [ship.navigate(target, game_map, 7, ignore_ships=True) for ship, target in cases]
+        entities, xs, ys, radii = game_map.obstacle_arrays(hlt.entity.Ship)
+        sdf = per_call(lambda: [field.segment_clear(s.x, s.y, t.x, t.y, 0.6) for s, t in thrusts], 20) / len(thrusts)
+        exact = per_call(lambda: [hlt.geometry.segment_circles(s.x, s.y, t.x, t.y, xs, ys, radii, 0.6)
+                                  for s, t in thrusts], 20) / len(thrusts)
+        print("{:9} {:10} {:10.1f} {:10.1f} {:13.2f} {:13.2f} {:9}"
+              .format("{}x{}".format(width, height), field.grid.size, field.nbytes / 1024, build * 1e3,
+                      sdf * 1e6, exact * 1e6, sum(1 for a, b in zip(before, after) if a != b)))
+
+
+def assignment_report():
+    print("\n== target assignment ==")
+    print("{:>6} {:>8} {:>12} {:>12} {:>12} {:>12}"
+          .format("ships", "targets", "exact ms", "exact cost", "greedy ms", "greedy cost"))
+    rng = random.Random(0)
+    for ships, targets in ((50, 40), (200, 120), (400, 300)):
+        costs = hlt.assignment.distance_costs([rng.uniform(0, 336) for _ in range(ships)],
+                                              [rng.uniform(0, 224) for _ in range(ships)],
+                                              [rng.uniform(0, 336) for _ in range(targets)],
+                                              [rng.uniform(0, 224) for _ in range(targets)], max_distance=150)
+        capacities = [rng.randint(1, 3) for _ in range(targets)]
+
+        def total(assigned):
+            return sum(costs[row, col] for row, col in enumerate(assigned.tolist()) if col >= 0)
+        exact = per_call(lambda: hlt.assignment.solve(costs, capacities), 3)
+        greedy = per_call(lambda: hlt.assignment.greedy(costs, capacities), 3)
+        print("{:6} {:8} {:12.1f} {:12.0f} {:12.1f} {:12.0f}"
+              .format(ships, targets, exact * 1e3, total(hlt.assignment.solve(costs, capacities).targets),
+                      greedy * 1e3, total(hlt.assignment.greedy(costs, capacities))))
+
+
+if __name__ == "__main__":
+    geometry_report()
+    allocation_report()
+    distance_field_report()
+    assignment_report()
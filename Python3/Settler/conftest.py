@@ -0,0 +1 @@
+# Lets the tests import hlt from this directory, however pytest is started
@@ -6,6 +6,8 @@ the start, then in a loop, call get_map() to get the current game state, then
 build up a list of commands and send them with send_command_queue().
 """
 
-from . import collision, constants, entity, game_map, networking
+from . import assignment, budget, clustering, collision, columns, combat, commands, constants, distance_field, \
+    dock_zones, entity, events, flow_field, forecast, game_map, geometry, heatmap, influence, networking, orders, \
+    paths, pipeline, prediction, raster, roles, scheduler, simulation, squads, voronoi
 
 from .networking import Game
@@ -0,0 +1,183 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+#: targets[i] is the target (column) row i was assigned to, or UNASSIGNED; method is what found it
+Solution = namedtuple('Solution', 'targets method')
+
+UNASSIGNED = -1
+
+#: Rough seconds scipy takes per ship per cell of the expanded cost matrix, its worst case order of growth
+SCIPY_SECONDS = 2e-10
+
+
+def distance_costs(xs, ys, target_xs, target_ys, target_radii=0, max_distance=math.inf):
+    """
+    :param xs: Ship x-coordinates
+    :param ys: Ship y-coordinates
+    :param target_xs: Target x-coordinates
+    :param target_ys: Target y-coordinates
+    :param target_radii: Target radii, or 0 to measure to target centers
+    :param float max_distance: Pairs this far apart or further cost inf
+    :return: (ships, targets) matrix of distances from each ship to each target's surface
+    :rtype: numpy.ndarray
+    """
+    costs = np.hypot(np.asarray(xs, dtype=np.float64)[:, None] - np.asarray(target_xs, dtype=np.float64),
+                     np.asarray(ys, dtype=np.float64)[:, None] - np.asarray(target_ys, dtype=np.float64)) \
+        - np.asarray(target_radii, dtype=np.float64)
+    costs[costs >= max_distance] = np.inf
+    return costs
+
+
+def greedy(costs, capacities, unassigned_cost=math.inf):
+    """
+    Global greedy assignment: repeatedly take the cheapest pair whose ship is free and whose target has capacity
+    left. Does not depend on the order ships are listed in, unlike each ship in turn taking its own best target.
+
+    :param numpy.ndarray costs: (ships, targets) cost matrix; inf for pairs that are not allowed
+    :param capacities: How many ships each target can take
+    :param float unassigned_cost: Pairs costing this much or more are left unassigned
+    :return: The target of each ship, or UNASSIGNED
+    :rtype: numpy.ndarray
+    """
+    rows, cols = costs.shape
+    targets = np.full(rows, UNASSIGNED, dtype=np.int64)
+    left = np.array(capacities, dtype=np.int64)
+    if rows == 0 or cols == 0:
+        return targets
+    flat = costs.ravel()
+    order = np.argsort(flat, kind='stable')
+    order = order[:np.searchsorted(flat[order], unassigned_cost)].tolist()
+    remaining = rows
+    for pair in order:
+        row, col = divmod(pair, cols)
+        if targets[row] == UNASSIGNED and left[col] > 0:
+            targets[row] = col
+            left[col] -= 1
+            remaining -= 1
+            if remaining == 0:
+                break
+    return targets
+
+
+def _slots(costs, capacities, unassigned_cost):
+    """
+    Expand targets into one column per unit of capacity, plus one shared "unassigned" column per ship, so that
+    the capacitated problem becomes a plain rectangular assignment.
+
+    :return: The expanded cost matrix, and the target of each column (UNASSIGNED for the extra ones)
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    rows, cols = costs.shape
+    capacities = np.minimum(np.asarray(capacities, dtype=np.int64), rows)
+    slot_targets = np.concatenate([np.repeat(np.arange(cols), np.maximum(capacities, 0)),
+                                   np.full(rows, UNASSIGNED, dtype=np.int64)])
+    expanded = np.empty((rows, len(slot_targets)))
+    real = len(slot_targets) - rows
+    expanded[:, :real] = np.minimum(costs[:, slot_targets[:real]], unassigned_cost + 1)
+    expanded[:, real:] = unassigned_cost
+    return expanded, slot_targets
+
+
+def hungarian(costs, budget=None):
+    """
+    The Hungarian method in its shortest augmenting path form: ships are added one at a time, each along the
+    cheapest chain of reassignments that frees a slot for it, with dual potentials keeping every step's search
+    to a few array operations over the slots.
+
+    :param numpy.ndarray costs: (ships, slots) finite cost matrix, with at least as many slots as ships
+    :param budget.Budget budget: Time allowed; None for no limit
+    :return: The slot of each ship, or None if the budget ran out first
+    :rtype: numpy.ndarray
+    """
+    ships, slots = costs.shape
+    # Index 0 of the slot arrays is a virtual slot that the ship being added starts from
+    ship_potential = np.zeros(ships + 1)
+    slot_potential = np.zeros(slots + 1)
+    slot_ship = np.zeros(slots + 1, dtype=np.int64)  # 1-based ship in each slot, 0 if free
+    previous = np.zeros(slots + 1, dtype=np.int64)
+    for ship in range(1, ships + 1):
+        if budget is not None and budget.exhausted():
+            return None
+        slot_ship[0] = ship
+        slot = 0
+        reduced = np.full(slots + 1, np.inf)
+        done = np.zeros(slots + 1, dtype=bool)
+        while True:
+            done[slot] = True
+            current_ship = slot_ship[slot]
+            candidates = costs[current_ship - 1] - ship_potential[current_ship] - slot_potential[1:]
+            better = ~done[1:] & (candidates < reduced[1:])
+            reduced[1:][better] = candidates[better]
+            previous[1:][better] = slot
+            open_reduced = np.where(done[1:], np.inf, reduced[1:])
+            next_slot = int(open_reduced.argmin()) + 1
+            delta = open_reduced[next_slot - 1]
+            ship_potential[slot_ship[done]] += delta
+            slot_potential[done] -= delta
+            reduced[1:][~done[1:]] -= delta
+            slot = next_slot
+            if slot_ship[slot] == 0:
+                break
+        while slot:
+            previous_slot = previous[slot]
+            slot_ship[slot] = slot_ship[previous_slot]
+            slot = previous_slot
+    assigned = np.empty(ships, dtype=np.int64)
+    filled = np.flatnonzero(slot_ship[1:])
+    assigned[slot_ship[1:][filled] - 1] = filled
+    return assigned
+
+
+def _scipy_fits(expanded, budget):
+    """
+    :return: True if linear_sum_assignment can be expected to finish on expanded within the budget
+    :rtype: bool
+    """
+    if budget is None:
+        return True
+    if budget.exhausted():
+        return False
+    remaining = budget.remaining_time()
+    return remaining is None or len(expanded) * expanded.size * SCIPY_SECONDS <= remaining
+
+
+def solve(costs, capacities, budget=None, unassigned_cost=1e6, method=None):
+    """
+    Capacitated min-cost assignment of ships to targets: each ship gets at most one target, each target at most
+    its capacity of ships, and the total cost is as low as possible. A ship is left unassigned rather than given a
+    target costing unassigned_cost or more. Uses scipy when it is installed and hungarian() otherwise; when the
+    budget runs out first, or scipy is not expected to finish within it, the greedy assignment is returned instead.
+
+    :param numpy.ndarray costs: (ships, targets) cost matrix; inf for pairs that are not allowed
+    :param capacities: How many ships each target can take
+    :param budget.Budget budget: Time allowed; None for no limit
+    :param float unassigned_cost: What leaving a ship unassigned costs
+    :param str method: 'scipy', 'hungarian' or 'greedy'; None for the best available
+    :return: The target of each ship (or UNASSIGNED), and the method that found it
+    :rtype: Solution
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    if method is None:
+        method = 'scipy' if linear_sum_assignment is not None else 'hungarian'
+    if costs.size == 0 or method == 'greedy':
+        return Solution(greedy(costs, capacities, unassigned_cost), 'greedy')
+
+    expanded, slot_targets = _slots(costs, capacities, unassigned_cost)
+    if method == 'scipy':
+        if not _scipy_fits(expanded, budget):
+            return Solution(greedy(costs, capacities, unassigned_cost), 'greedy')
+        slots = np.empty(len(costs), dtype=np.int64)
+        rows, cols = linear_sum_assignment(expanded)
+        slots[rows] = cols
+    else:
+        slots = hungarian(expanded, budget)
+        if slots is None:
+            return Solution(greedy(costs, capacities, unassigned_cost), 'greedy')
+    return Solution(slot_targets[slots], method)
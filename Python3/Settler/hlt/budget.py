@@ -0,0 +1,73 @@
+import time
+
+
+class Budget:
+    """
+    A limit on how much work a computation may do: a wall-clock deadline, a maximum number of work units
+    (e.g. obstacle tests), or both. A budget with neither never runs out.
+
+    :ivar deadline: time.perf_counter() value after which the budget is spent, or None
+    :ivar max_work: Maximum number of work units, or None
+    :ivar work: Work units spent so far
+    """
+
+    def __init__(self, seconds=None, max_work=None, deadline=None):
+        """
+        :param float seconds: Time allowed from now (ignored if deadline is given)
+        :param int max_work: Maximum number of work units
+        :param float deadline: Absolute time.perf_counter() deadline
+        """
+        if deadline is None and seconds is not None:
+            deadline = time.perf_counter() + seconds
+        self.deadline = deadline
+        self.max_work = max_work
+        self.work = 0
+
+    def remaining_time(self):
+        """
+        :return: Seconds left until the deadline (never negative), or None if there is no deadline
+        :rtype: float
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    def spend(self, work=1):
+        """
+        Record work done.
+
+        :param int work: Work units spent
+        :return: nothing
+        """
+        self.work += work
+
+    def can_afford(self, work=1):
+        """
+        :param int work: Work units about to be spent
+        :return: True if the work fits in what is left of the budget
+        :rtype: bool
+        """
+        if self.max_work is not None and self.work + work > self.max_work:
+            return False
+        return self.deadline is None or time.perf_counter() < self.deadline
+
+    def exhausted(self):
+        """
+        :return: True once the deadline has passed or all work units are spent
+        :rtype: bool
+        """
+        return not self.can_afford(0) or (self.max_work is not None and self.work >= self.max_work)
+
+    def share(self, parts, max_work=None):
+        """
+        A fair share of what is left of this budget's time.
+
+        :param int parts: How many ways the remaining time is to be split
+        :param int max_work: Work limit for the share
+        :return: A budget with 1/parts of the remaining time (unbounded in time if this one is)
+        :rtype: Budget
+        """
+        remaining = self.remaining_time()
+        if remaining is None:
+            return Budget(max_work=max_work)
+        return Budget(seconds=remaining / max(parts, 1), max_work=max_work)
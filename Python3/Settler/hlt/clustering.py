@@ -0,0 +1,145 @@
+import numpy as np
+
+# The cells after a cell, in row-major order, that touch it; with the cells before it, all 8 neighbours
+_FORWARD = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def components(i, j, count):
+    """
+    Connected components of a graph by label propagation with pointer jumping: every node and every component
+    root takes the lowest label across each edge, then labels follow their own labels until nothing changes.
+    Takes a few passes over the edges, about the logarithm of the longest chain.
+
+    :param numpy.ndarray i: First node of each edge
+    :param numpy.ndarray j: Second node of each edge
+    :param int count: Number of nodes
+    :return: The component of each node, numbered from 0 in order of each component's lowest node
+    :rtype: numpy.ndarray
+    """
+    labels = np.arange(count)
+    while len(i):
+        lowest = np.minimum(labels[i], labels[j])
+        hooked = labels.copy()
+        for nodes in (i, j, labels[i], labels[j]):
+            np.minimum.at(hooked, nodes, lowest)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            break
+        labels = hooked
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+
+class Clusters:
+    """
+    Groups of ships, as arrays with one entry per cluster.
+
+    :ivar label: The cluster of each input row, -1 for rows left out
+    :ivar owner: Owning player id of each cluster
+    :ivar x: Centroid x-coordinates
+    :ivar y: Centroid y-coordinates
+    :ivar radius: Distance from each centroid to its furthest member
+    :ivar size: Number of ships in each cluster
+    :ivar health: Total health of each cluster
+    """
+
+    def __init__(self, label, owners, xs, ys, health):
+        """
+        :param numpy.ndarray label: The cluster of each row, -1 for rows left out
+        :param numpy.ndarray owners: Owning player id of each row
+        :param numpy.ndarray xs: X-coordinate of each row
+        :param numpy.ndarray ys: Y-coordinate of each row
+        :param numpy.ndarray health: Health of each row
+        """
+        self.label = label
+        rows = np.flatnonzero(label >= 0)
+        label = label[rows]
+        count = int(label.max()) + 1 if len(label) else 0
+        self.size = np.bincount(label, minlength=count)
+        self.x = np.bincount(label, weights=xs[rows], minlength=count) / np.maximum(self.size, 1)
+        self.y = np.bincount(label, weights=ys[rows], minlength=count) / np.maximum(self.size, 1)
+        self.health = np.bincount(label, weights=health[rows], minlength=count)
+        self.owner = np.full(count, -1, dtype=np.int64)
+        self.owner[label] = owners[rows]
+        self.radius = np.zeros(count)
+        np.maximum.at(self.radius, label, np.hypot(xs[rows] - self.x[label], ys[rows] - self.y[label]))
+        # rows grouped by cluster, for members()
+        self._rows = rows[np.argsort(label, kind='stable')]
+        self._starts = np.concatenate([[0], np.cumsum(self.size)])
+
+    def __len__(self):
+        return len(self.size)
+
+    def members(self, cluster):
+        """
+        :param int cluster: The cluster
+        :return: The input rows of the cluster's ships
+        :rtype: numpy.ndarray
+        """
+        return self._rows[self._starts[cluster]:self._starts[cluster + 1]]
+
+    def of_owner(self, owner, mine=True):
+        """
+        :param int owner: A player id
+        :param bool mine: True for the clusters of the player, False for everyone else's
+        :return: The clusters of the player (or everyone else's)
+        :rtype: numpy.ndarray
+        """
+        return np.flatnonzero((self.owner == owner) == mine)
+
+
+def cluster(xs, ys, owners, radius, health=None, mask=None):
+    """
+    Cluster each player's ships into groups linked by nearness, in near-linear time. Ships are binned into cells
+    of the linking radius, and the occupied cells of a player that touch (including at corners) form one cluster:
+    ships within the radius of each other always end up together, and ships up to 2 * sqrt(2) * radius apart may
+    be joined too.
+
+    :param xs: Ship x-coordinates
+    :param ys: Ship y-coordinates
+    :param owners: Owning player ids
+    :param float radius: Linking radius
+    :param health: Ship health, for the clusters' totals; None to count each ship as 1
+    :param mask: Which ships to cluster; None for all
+    :return: The clusters
+    :rtype: Clusters
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    owners = np.asarray(owners, dtype=np.int64)
+    health = np.ones(len(xs)) if health is None else np.asarray(health, dtype=np.float64)
+    rows = np.arange(len(xs)) if mask is None else np.flatnonzero(mask)
+    label = np.full(len(xs), -1, dtype=np.int64)
+    if len(rows):
+        # one padding row and column keep neighbour keys from wrapping into another row, or another player
+        col = np.floor((xs[rows] - xs[rows].min()) / radius).astype(np.int64)
+        row = np.floor((ys[rows] - ys[rows].min()) / radius).astype(np.int64)
+        cols = int(col.max()) + 2
+        grid_rows = int(row.max()) + 2
+        owner = owners[rows] - owners[rows].min()
+        keys = (owner * grid_rows + row) * cols + col
+        cells, cell_of = np.unique(keys, return_inverse=True)
+        cell_of = cell_of.reshape(-1)
+        i_parts, j_parts = [], []
+        for d_row, d_col in _FORWARD:
+            neighbours = cells + d_row * cols + d_col
+            found = np.minimum(np.searchsorted(cells, neighbours), len(cells) - 1)
+            linked = np.flatnonzero(cells[found] == neighbours)
+            i_parts.append(linked)
+            j_parts.append(found[linked])
+        label[rows] = components(np.concatenate(i_parts), np.concatenate(j_parts), len(cells))[cell_of]
+    return Clusters(label, owners, xs, ys, health)
+
+
+def cluster_ships(columns, radius, mask=None):
+    """
+    :param columns.ShipColumns columns: The ships
+    :param float radius: Linking radius
+    :param mask: Which ships to cluster; None for all
+    :return: The clusters; label and members() refer to rows of the columns
+    :rtype: Clusters
+    """
+    return cluster(columns.x, columns.y, columns.owner, radius, columns.health, mask)
@@ -1,4 +1,6 @@
-from .entity import Position, Entity
+import numpy as np
+
+from . import constants, geometry
 
 
 def intersect_segment_circle(start, end, circle, *, fudge=0.5):
@@ -12,29 +14,190 @@ def intersect_segment_circle(start, end, circle, *, fudge=0.5):
     :return: True if intersects, False otherwise
     :rtype: bool
     """
-    # Derived with SymPy
-    # Parameterize the segment as start + t * (end - start),
-    # and substitute into the equation of a circle
-    # Solve for t
-    dx = end.x - start.x
-    dy = end.y - start.y
+    # Derived with SymPy; see geometry.segment_circle
+    return geometry.segment_circle(start.x, start.y, end.x, end.y, circle.x, circle.y, circle.radius, fudge)
+
+
+def intersect_segment_circle_xy(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, fudge=0.5):
+    """
+    intersect_segment_circle on plain coordinates, for callers that have no entities to hand.
+
+    :return: True if intersects, False otherwise
+    :rtype: bool
+    """
+    return geometry.segment_circle(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, fudge)
+
+
+def moving_contact_times(xa, ya, vxa, vya, xb, yb, vxb, vyb, contact_distance=2 * constants.SHIP_RADIUS):
+    """
+    Earliest time in [0, 1] (one turn) at which two moving circles come within contact_distance of each other,
+    for many pairs at once. Entities are assumed to move linearly from (x, y) to (x + vx, y + vy) during the turn.
+    All arguments broadcast against each other.
+
+    :param float contact_distance: Center distance at which the circles touch (sum of their radii)
+    :return: Contact times; 0 if already touching, inf if they do not touch this turn
+    :rtype: numpy.ndarray
+    """
+    px = np.asarray(xb, dtype=np.float64) - xa
+    py = np.asarray(yb, dtype=np.float64) - ya
+    vx = np.asarray(vxb, dtype=np.float64) - vxa
+    vy = np.asarray(vyb, dtype=np.float64) - vya
+
+    # |p + v t| = contact_distance  =>  a t^2 + b t + c = 0, and we want the first root
+    a = vx * vx + vy * vy
+    b = 2 * (px * vx + py * vy)
+    c = px * px + py * py - contact_distance * contact_distance
+    disc = b * b - 4 * a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (-b - np.sqrt(np.maximum(disc, 0))) / (2 * a)
+    hit = (a > 0) & (disc >= 0) & (t >= 0) & (t <= 1)
+    return np.where(c <= 0, 0.0, np.where(hit, t, np.inf))
+
+
+def _sorted_unique(values):
+    """
+    np.unique for a flat integer array, by sorting: cheaper than the hash table np.unique builds first.
+    """
+    values = np.sort(values)
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = values[1:] != values[:-1]
+    return values[first]
 
-    a = dx**2 + dy**2
-    b = -2 * (start.x**2 - start.x*end.x - start.x*circle.x + end.x*circle.x +
-              start.y**2 - start.y*end.y - start.y*circle.y + end.y*circle.y)
-    c = (start.x - circle.x)**2 + (start.y - circle.y)**2
 
-    if a == 0.0:
-        # Start and end are the same point
-        return start.calculate_distance_between(circle) <= circle.radius + fudge
+def broadphase_pairs(x, y, vx, vy, radius=constants.SHIP_RADIUS):
+    """
+    Candidate pairs for moving_contact_times: the pairs whose swept bounding boxes overlap this turn. Uses a uniform
+    grid sized so each box touches at most 2x2 cells, so the cost grows with the number of entities, not pairs.
+
+    :param numpy.ndarray x: Start x-coordinates
+    :param numpy.ndarray y: Start y-coordinates
+    :param numpy.ndarray vx: Planned x-displacements for the turn
+    :param numpy.ndarray vy: Planned y-displacements for the turn
+    :param float radius: Entity radius (scalar or per entity)
+    :return: Index arrays (i, j) with i < j
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    vx = np.asarray(vx, dtype=np.float64)
+    vy = np.asarray(vy, dtype=np.float64)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), x.shape)
+    lo_x = np.minimum(x, x + vx) - radius
+    hi_x = np.maximum(x, x + vx) + radius
+    lo_y = np.minimum(y, y + vy) - radius
+    hi_y = np.maximum(y, y + vy) + radius
+    if len(x) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    cell_size = max(float(np.max(hi_x - lo_x)), float(np.max(hi_y - lo_y)), 1.0)
+    entries = []
+    for cx, cy in ((lo_x, lo_y), (hi_x, lo_y), (lo_x, hi_y), (hi_x, hi_y)):
+        col = np.floor(cx / cell_size).astype(np.int64)
+        row = np.floor(cy / cell_size).astype(np.int64)
+        entries.append(((row << 32) + col, np.arange(len(x))))
+    keys = np.concatenate([key for key, _ in entries])
+    owners = np.concatenate([owner for _, owner in entries])
+
+    # one entry per (cell, entity), sorted so that entries of the same cell are adjacent
+    keys, owners = np.divmod(_sorted_unique(keys * len(x) + owners), len(x))
+
+    i_parts, j_parts = [], []
+    offset = 1
+    while offset < len(keys):
+        same = keys[offset:] == keys[:-offset]
+        if not same.any():
+            break
+        i_parts.append(owners[:-offset][same])
+        j_parts.append(owners[offset:][same])
+        offset += 1
+    if not i_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    i = np.concatenate(i_parts)
+    j = np.concatenate(j_parts)
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    pairs = _sorted_unique(i * len(x) + j)
+    i, j = np.divmod(pairs, len(x))
+    overlap = (lo_x[i] <= hi_x[j]) & (lo_x[j] <= hi_x[i]) & (lo_y[i] <= hi_y[j]) & (lo_y[j] <= hi_y[i])
+    return i[overlap], j[overlap]
+
+
+def first_contacts(x, y, vx, vy, radius=constants.SHIP_RADIUS):
+    """
+    Check all planned moves in one pass: broadphase, then the exact moving-circle test on the candidate pairs.
+
+    :param numpy.ndarray x: Start x-coordinates
+    :param numpy.ndarray y: Start y-coordinates
+    :param numpy.ndarray vx: Planned x-displacements for the turn
+    :param numpy.ndarray vy: Planned y-displacements for the turn
+    :param float radius: Entity radius (scalar or per entity)
+    :return: Index arrays (i, j) and contact times t of the pairs that touch during the turn, earliest first
+    :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    i, j = broadphase_pairs(x, y, vx, vy, radius)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), np.shape(x))
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    vx = np.asarray(vx, dtype=np.float64)
+    vy = np.asarray(vy, dtype=np.float64)
+    t = moving_contact_times(x[i], y[i], vx[i], vy[i], x[j], y[j], vx[j], vy[j], radius[i] + radius[j])
+    touching = np.isfinite(t)
+    order = np.argsort(t[touching], kind='stable')
+    return i[touching][order], j[touching][order], t[touching][order]
 
-    # Time along segment when closest to the circle (vertex of the quadratic)
-    t = min(-b / (2 * a), 1.0)
-    if t < 0:
-        return False
 
-    closest_x = start.x + dx * t
-    closest_y = start.y + dy * t
-    closest_distance = Position(closest_x, closest_y).calculate_distance_between(circle)
+def earliest_contacts(x, y, vx, vy, radius=constants.SHIP_RADIUS):
+    """
+    :return: For each entity, the earliest time during the turn it touches any other (inf if never)
+    :rtype: numpy.ndarray
+    """
+    i, j, t = first_contacts(x, y, vx, vy, radius)
+    earliest = np.full(np.shape(x), np.inf)
+    np.minimum.at(earliest, i, t)
+    np.minimum.at(earliest, j, t)
+    return earliest
 
-    return closest_distance <= circle.radius + fudge
+
+def slow_until_clear(x, y, speed, angle, radius=constants.SHIP_RADIUS):
+    """
+    Cut planned thrusts until no two entities come into contact during the turn. In each contact, the entities
+    heading towards the other are cut to the part of their thrust they cover before their earliest contact, and by
+    at least 1; the check repeats until no contact involves an entity that is still moving. Entities that already
+    touch only count as in contact while they close in. Thrust magnitudes are whole numbers, as in commands, and
+    each round cuts at least one of them, so this always ends.
+
+    :param numpy.ndarray x: Start x-coordinates
+    :param numpy.ndarray y: Start y-coordinates
+    :param numpy.ndarray speed: Planned thrust magnitudes, whole numbers
+    :param numpy.ndarray angle: Planned thrust angles, in radians
+    :param float radius: Entity radius (scalar or per entity)
+    :return: The thrust magnitudes, cut where needed (0 for the entities that have to hold)
+    :rtype: numpy.ndarray
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    speed = np.array(speed, dtype=np.int64)
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    while True:
+        vx = speed * cos
+        vy = speed * sin
+        i, j, t = first_contacts(x, y, vx, vy, radius)
+        # entities already touching are only in each other's way while they close in
+        dx = x[j] - x[i]
+        dy = y[j] - y[i]
+        closing = dx * (vx[j] - vx[i]) + dy * (vy[j] - vy[i]) < 0
+        i, j, t, dx, dy = (values[(t > 0) | closing] for values in (i, j, t, dx, dy))
+        # only the entities heading towards the other give way: one that is caught up with keeps going
+        earliest = np.full(len(speed), np.inf)
+        i_towards = vx[i] * dx + vy[i] * dy > 0
+        j_towards = vx[j] * dx + vy[j] * dy < 0
+        # unless neither is, e.g. one passing across the other's bow; then both do
+        either = ~(i_towards | j_towards)
+        np.minimum.at(earliest, i[i_towards | either], t[i_towards | either])
+        np.minimum.at(earliest, j[j_towards | either], t[j_towards | either])
+        cut = np.flatnonzero(np.isfinite(earliest) & (speed > 0))
+        if len(cut) == 0:
+            return speed
+        # strictly short of the contact
+        speed[cut] = np.minimum(np.ceil(speed[cut] * earliest[cut]) - 1, speed[cut] - 1).clip(0)
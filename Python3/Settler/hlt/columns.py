@@ -0,0 +1,84 @@
+import numpy as np
+
+from . import entity
+
+
+class ShipColumns:
+    """
+    Column-oriented (array) view of a set of ships, for vectorized computations. Row i of every column
+    describes ships[i].
+
+    :ivar ships: The ship objects, in row order.
+    :ivar id: Ship ids.
+    :ivar owner: Owning player ids (-1 if unowned).
+    :ivar x: Ship x-coordinates.
+    :ivar y: Ship y-coordinates.
+    :ivar vel_x: Ship x-velocities.
+    :ivar vel_y: Ship y-velocities.
+    :ivar health: Ship health.
+    :ivar docking_status: Docking status values (see entity.Ship.DockingStatus).
+    :ivar planet: Id of the planet the ship is docked to (-1 if not docked).
+    :ivar docking_progress: Turns of docking/undocking remaining.
+    :ivar weapon_cooldown: Turns until the weapon can fire again.
+    """
+
+    def __init__(self, ships):
+        """
+        :param list[entity.Ship] ships: The ships to describe
+        """
+        self.ships = tuple(ships)
+        n = len(self.ships)
+        self.id = np.fromiter((s.id for s in self.ships), dtype=np.int64, count=n)
+        self.owner = np.fromiter((_owner_id(s.owner) for s in self.ships), dtype=np.int64, count=n)
+        self.x = np.fromiter((s.x for s in self.ships), dtype=np.float64, count=n)
+        self.y = np.fromiter((s.y for s in self.ships), dtype=np.float64, count=n)
+        self.vel_x = np.fromiter((s.vel_x for s in self.ships), dtype=np.float64, count=n)
+        self.vel_y = np.fromiter((s.vel_y for s in self.ships), dtype=np.float64, count=n)
+        self.health = np.fromiter((s.health for s in self.ships), dtype=np.int64, count=n)
+        self.docking_status = np.fromiter((s.docking_status.value for s in self.ships), dtype=np.int8, count=n)
+        self.planet = np.fromiter((_planet_id(s.planet) for s in self.ships), dtype=np.int64, count=n)
+        self.docking_progress = np.fromiter((s._docking_progress for s in self.ships), dtype=np.int64, count=n)
+        self.weapon_cooldown = np.fromiter((s._weapon_cooldown for s in self.ships), dtype=np.int64, count=n)
+        self._rows = None
+
+    def __len__(self):
+        return len(self.ships)
+
+    def row_of(self, ship_id):
+        """
+        :param int ship_id: The id of the ship to look up
+        :return: The row of the ship with the given id, or None if it is not in this view
+        :rtype: int
+        """
+        if self._rows is None:
+            self._rows = {ship_id: row for row, ship_id in enumerate(self.id.tolist())}
+        return self._rows.get(ship_id)
+
+    def undocked(self):
+        """
+        :return: Boolean mask of the ships that are free to move
+        :rtype: numpy.ndarray
+        """
+        return self.docking_status == entity.Ship.DockingStatus.UNDOCKED.value
+
+
+def _owner_id(owner):
+    """
+    :param owner: A player object, a player id or None
+    :return: The player id, or -1 if there is no owner
+    :rtype: int
+    """
+    if owner is None:
+        return -1
+    return owner if isinstance(owner, int) else owner.id
+
+
+def _planet_id(planet):
+    """
+    :param planet: A planet object, a planet id or None
+    :return: The planet id, or -1 if there is no planet
+    :rtype: int
+    """
+    if planet is None:
+        return -1
+    return planet if isinstance(planet, int) else planet.id
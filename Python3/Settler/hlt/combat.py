@@ -0,0 +1,124 @@
+from collections import namedtuple
+
+import numpy as np
+
+from . import collision, constants
+
+#: Center distance at which two ships can shoot each other: weapon range, measured between hulls
+FIRING_RANGE = constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS
+
+#: The state of the ships after a fight: health (0 once destroyed) and the turns their weapons still need
+Outcome = namedtuple('Outcome', 'health cooldown')
+
+
+def damage(xs, ys, owners, can_fire):
+    """
+    Damage every ship takes in one exchange of fire. Each ship that can fire hits every enemy ship in range, its
+    WEAPON_DAMAGE split evenly between them, all at once. Every argument may carry leading batch dimensions, e.g.
+    (fights, ships), to resolve many independent fights in one go; ships only ever shoot within their own fight.
+
+    :param numpy.ndarray xs: Ship x-coordinates, (..., ships)
+    :param numpy.ndarray ys: Ship y-coordinates, (..., ships)
+    :param numpy.ndarray owners: Owning player ids, (..., ships); ships with a negative owner take no part
+    :param numpy.ndarray can_fire: Whether each ship fires this exchange, (..., ships)
+    :return: Damage taken by each ship, (..., ships)
+    :rtype: numpy.ndarray
+    """
+    distances = np.hypot(xs[..., :, None] - xs[..., None, :], ys[..., :, None] - ys[..., None, :])
+    present = owners >= 0
+    # hits[..., i, j]: ship i shoots ship j
+    hits = (distances <= FIRING_RANGE) & (owners[..., :, None] != owners[..., None, :]) \
+        & (can_fire & present)[..., :, None] & present[..., None, :]
+    share = shot_share(hits.sum(axis=-1))
+    return (hits * share[..., :, None]).sum(axis=-2)
+
+
+def shot_share(targets):
+    """
+    :param numpy.ndarray targets: Number of enemy ships each ship fires at
+    :return: Damage each of its shots does: its WEAPON_DAMAGE split evenly between its targets
+    :rtype: numpy.ndarray
+    """
+    return constants.WEAPON_DAMAGE / np.maximum(targets, 1)
+
+
+def sparse_damage(xs, ys, owners, can_fire):
+    """
+    damage() for the ships of one frame, looking only at the pairs in firing range (found by
+    collision.broadphase_pairs), so the cost follows the number of close pairs rather than all pairs. No batch
+    dimensions.
+
+    :param numpy.ndarray xs: Ship x-coordinates
+    :param numpy.ndarray ys: Ship y-coordinates
+    :param numpy.ndarray owners: Owning player ids; ships with a negative owner take no part
+    :param numpy.ndarray can_fire: Whether each ship fires this exchange
+    :return: Damage taken by each ship
+    :rtype: numpy.ndarray
+    """
+    rows = np.flatnonzero(owners >= 0)
+    i, j = collision.broadphase_pairs(xs[rows], ys[rows], 0, 0, FIRING_RANGE / 2)
+    i, j = rows[i], rows[j]
+    hit = (np.hypot(xs[i] - xs[j], ys[i] - ys[j]) <= FIRING_RANGE) & (owners[i] != owners[j])
+    # each pair may fire both ways
+    shooters = np.concatenate([i[hit], j[hit]])
+    targets = np.concatenate([j[hit], i[hit]])
+    firing = can_fire[shooters]
+    shooters, targets = shooters[firing], targets[firing]
+    share = shot_share(np.bincount(shooters, minlength=len(xs)))
+    return np.bincount(targets, weights=share[shooters], minlength=len(xs))
+
+
+def resolve(xs, ys, owners, health, cooldown, docked, vel_xs=0, vel_ys=0, turns=1):
+    """
+    Play a fight forward: each turn every ship moves by its velocity, then every undocked ship whose weapon is
+    ready fires (see damage()). Destroyed ships stop moving, shooting and being shot at. Arguments may carry
+    leading batch dimensions as for damage(); velocities may also be given per turn, (turns, ..., ships).
+
+    :param numpy.ndarray xs: Ship x-coordinates, (..., ships)
+    :param numpy.ndarray ys: Ship y-coordinates, (..., ships)
+    :param numpy.ndarray owners: Owning player ids, (..., ships); ships with a negative owner take no part
+    :param numpy.ndarray health: Ship health, (..., ships)
+    :param numpy.ndarray cooldown: Weapon cooldowns as the frame reports them, (..., ships)
+    :param numpy.ndarray docked: Whether each ship is docked (or docking, or undocking), and so can not fire
+    :param vel_xs: The x-distance each ship moves per turn
+    :param vel_ys: The y-distance each ship moves per turn
+    :param int turns: How many turns to play
+    :return: The ships' health and weapon cooldowns after the last turn
+    :rtype: Outcome
+    """
+    xs = np.array(xs, dtype=np.float64)
+    ys = np.array(ys, dtype=np.float64)
+    owners = np.array(owners, dtype=np.int64)
+    health = np.array(health, dtype=np.float64)
+    cooldown = np.array(cooldown, dtype=np.int64)
+    docked = np.asarray(docked, dtype=bool)
+    vel_xs = np.broadcast_to(vel_xs, (turns,) + xs.shape) if np.ndim(vel_xs) <= xs.ndim else vel_xs
+    vel_ys = np.broadcast_to(vel_ys, (turns,) + ys.shape) if np.ndim(vel_ys) <= ys.ndim else vel_ys
+    for turn in range(turns):
+        alive = (owners >= 0) & (health > 0)
+        xs += np.where(alive, vel_xs[turn], 0)
+        ys += np.where(alive, vel_ys[turn], 0)
+        # Cooldowns count down at the start of a turn, so a cooldown of WEAPON_COOLDOWN (1) still fires every turn
+        cooldown = np.maximum(cooldown - 1, 0)
+        can_fire = alive & ~docked & (cooldown == 0)
+        health -= damage(xs, ys, np.where(alive, owners, -1), can_fire)
+        np.maximum(health, 0, out=health)
+        cooldown = np.where(can_fire, constants.WEAPON_COOLDOWN, cooldown)
+    return Outcome(health, cooldown)
+
+
+def pack(groups, width):
+    """
+    Lay out fights of different sizes as one batch, padding with ships that take no part.
+
+    :param list[list[int]] groups: The row indices (e.g. into a columns.ShipColumns) of the ships in each fight
+    :param int width: Ships per fight in the batch; at least the size of the largest group
+    :return: (fights, width) row indices, and a mask of the real ones
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    rows = np.zeros((len(groups), width), dtype=np.int64)
+    real = np.zeros((len(groups), width), dtype=bool)
+    for fight, group in enumerate(groups):
+        rows[fight, :len(group)] = group
+        real[fight, :len(group)] = True
+    return rows, real
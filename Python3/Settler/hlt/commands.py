@@ -0,0 +1,77 @@
+class CommandTable:
+    """
+    The turn's commands, at most one per ship, filled in two passes: first a cheap baseline for every ship, so that
+    there is a complete set to send whenever time runs out, then refinements that replace baselines in place as
+    time allows.
+
+    :ivar refined: Number of ships whose command was set (or cleared) by a refinement this turn
+    """
+
+    def __init__(self):
+        self.refined = 0
+        self._commands = {}
+        self._refined = set()
+
+    def baseline(self, ship_id, command):
+        """
+        Set a ship's command unless it has already been refined.
+
+        :param int ship_id: The ship's id
+        :param str command: The baseline command, or None for none
+        :return: nothing
+        """
+        if ship_id in self._refined:
+            return
+        if command:
+            self._commands[ship_id] = command
+        else:
+            self._commands.pop(ship_id, None)
+
+    def refine(self, ship_id, command):
+        """
+        Replace a ship's command with a better one.
+
+        :param int ship_id: The ship's id
+        :param str command: The refined command, or None to have the ship send nothing
+        :return: nothing
+        """
+        if ship_id not in self._refined:
+            self._refined.add(ship_id)
+            self.refined += 1
+        if command:
+            self._commands[ship_id] = command
+        else:
+            self._commands.pop(ship_id, None)
+
+    def get(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: The ship's command so far, or None
+        :rtype: str
+        """
+        return self._commands.get(ship_id)
+
+    def is_refined(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: Whether the ship's command has been refined
+        :rtype: bool
+        """
+        return ship_id in self._refined
+
+    def baselines(self):
+        """
+        :return: The number of commands still at their baseline
+        :rtype: int
+        """
+        return sum(1 for ship_id in self._commands if ship_id not in self._refined)
+
+    def commands(self):
+        """
+        :return: The commands to send, in the order ships were first given one
+        :rtype: list[str]
+        """
+        return list(self._commands.values())
+
+    def __len__(self):
+        return len(self._commands)
@@ -22,3 +22,5 @@ DOCK_TURNS = 5
 BASE_PRODUCTIVITY = 8
 #: Distance from the planets edge at which new ships are created
 SPAWN_RADIUS = 2
+#: Production a planet needs to create a ship
+SHIP_COST = 72
@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+from . import raster
+
+
+class DistanceField:
+    """
+    Signed distance to the nearest planet surface, sampled at the cell centers of a fine grid: positive outside every
+    planet, negative inside one. Planets do not move, so the field is built once and read in O(1).
+
+    Values are exact at cell centers; anywhere else they are off by at most half a cell diagonal (distance changes
+    no faster than position does), which lower_bound accounts for.
+
+    :ivar grid: The raster.Grid the field is sampled on
+    :ivar planet_ids: Ids of the planets the field was built from
+    :ivar error: Largest difference between clearance() and the true distance
+    """
+
+    #: Steps segment_clear takes before it gives up on proving a path clear
+    MAX_STEPS = 16
+
+    def __init__(self, width, height, planets, cell_size=0.5):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param list[entity.Planet] planets: The planets to measure distance to
+        :param float cell_size: Length of a cell side, in map units
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.planet_ids = frozenset(planet.id for planet in planets)
+        # float32 rounding of map-sized distances is far below a thousandth of a unit
+        self.error = cell_size * math.sqrt(2) / 2 + 1e-3
+        self._values = self._build(planets)
+        self._flat = memoryview(self._values).cast('B').cast('f')
+
+    def _build(self, planets):
+        grid = self.grid
+        xs = ((np.arange(grid.cols, dtype=np.float32) + 0.5) * grid.cell_size)[None, :]
+        ys = ((np.arange(grid.rows, dtype=np.float32) + 0.5) * grid.cell_size)[:, None]
+        values = np.full(grid.shape, np.inf, dtype=np.float32)
+        for planet in planets:
+            np.minimum(values, np.hypot(xs - np.float32(planet.x), ys - np.float32(planet.y))
+                       - np.float32(planet.radius), out=values)
+        return values
+
+    def __deepcopy__(self, memo):
+        # Never changes once built, so copies of a map can share it
+        return self
+
+    @property
+    def nbytes(self):
+        """
+        :return: Memory taken by the field's samples
+        :rtype: int
+        """
+        return self._values.nbytes
+
+    def clearance(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: Approximate distance from the point to the nearest planet surface (negative inside a planet)
+        :rtype: float
+        """
+        return self._values.item(self.grid.cell_of(x, y))
+
+    def lower_bound(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: A distance the nearest planet surface is guaranteed to be no closer than (-inf off the map)
+        :rtype: float
+        """
+        if not (0 <= x <= self.grid.width and 0 <= y <= self.grid.height):
+            return -math.inf
+        return self._values.item(self.grid.cell_of(x, y)) - self.error
+
+    def segment_clear(self, start_x, start_y, end_x, end_y, radius):
+        """
+        Sphere trace the segment: at each point the field says how far the path can safely advance, so open space
+        is crossed in a few lookups no matter how many planets there are.
+
+        :param float start_x: Segment start x-coordinate
+        :param float start_y: Segment start y-coordinate
+        :param float end_x: Segment end x-coordinate
+        :param float end_y: Segment end y-coordinate
+        :param float radius: Clearance the whole segment must keep from every planet surface
+        :return: True if the segment is proven clear of every planet; False if it may not be (check exactly then)
+        :rtype: bool
+        """
+        dx = end_x - start_x
+        dy = end_y - start_y
+        length = math.sqrt(dx * dx + dy * dy)
+        if length == 0:
+            return self.lower_bound(start_x, start_y) > radius
+        dx /= length
+        dy /= length
+        # lower_bound, inlined: this loop is what the field is for
+        grid = self.grid
+        width, height, cols = grid.width, grid.height, grid.cols
+        scale = 1 / grid.cell_size
+        values = self._flat
+        margin = radius + self.error
+        travelled = 0.0
+        for _ in range(self.MAX_STEPS):
+            x = start_x + dx * travelled
+            y = start_y + dy * travelled
+            if not (0 <= x < width and 0 <= y < height):
+                return False
+            # No planet surface is within radius + step of this point, so the next step of the path is clear
+            step = values[int(y * scale) * cols + int(x * scale)] - margin
+            if step <= 0:
+                return False
+            travelled += step
+            if travelled >= length:
+                return True
+        return False
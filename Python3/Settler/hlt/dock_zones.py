@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+
+from . import constants, raster
+
+
+class DockZoneIndex:
+    """
+    Which planets a ship could dock to from each point of the map. Docking range is a ring of DOCK_RADIUS around
+    each planet, and planets do not move, so each cell of a raster records the planets whose docking range covers
+    all of it. Cells the edge of a docking range runs through are left to an exact distance check.
+
+    :ivar grid: The raster.Grid the index is laid over
+    :ivar planet_ids: Ids of the planets indexed
+    """
+
+    def __init__(self, width, height, planets, cell_size=1):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param list[entity.Planet] planets: The planets to index
+        :param float cell_size: Length of a cell side, in map units
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.planet_ids = frozenset(planet.id for planet in planets)
+        self._zones = [(planet.id, planet.x, planet.y, planet.radius + constants.DOCK_RADIUS) for planet in planets]
+        self._cells = self._build()
+
+    def _build(self):
+        grid = self.grid
+        half_diagonal = grid.cell_size * math.sqrt(2) / 2
+        touched = np.zeros(grid.shape, dtype=np.int64)
+        inside = np.zeros(grid.shape, dtype=np.int64)
+        covered_by = np.full(grid.shape, -1, dtype=np.int64)
+        for planet_id, x, y, radius in self._zones:
+            rows, cols, window = grid.circle_window(x, y, radius + half_diagonal)
+            touched[rows, cols] += window
+            rows, cols, window = grid.circle_window(x, y, radius - half_diagonal)
+            inside[rows, cols] += window
+            covered_by[rows, cols][window] = planet_id
+        # A cell in no zone, or wholly inside exactly one, has a certain answer; anything else is checked exactly
+        cells = [None] * grid.size
+        for cell in np.flatnonzero(touched == 0).tolist():
+            cells[cell] = ()
+        certain = np.flatnonzero((inside == 1) & (touched == 1))
+        for cell, planet_id in zip(certain.tolist(), covered_by.ravel()[certain].tolist()):
+            cells[cell] = (planet_id,)
+        return cells
+
+    def planets_at(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: Ids of the planets a ship at the point is in docking range of (usually none or one)
+        :rtype: tuple[int]
+        """
+        grid = self.grid
+        if 0 <= x < grid.width and 0 <= y < grid.height:
+            row, col = grid.cell_of(x, y)
+            planet_ids = self._cells[row * grid.cols + col]
+            if planet_ids is not None:
+                return planet_ids
+        return tuple(planet_id for planet_id, zone_x, zone_y, radius in self._zones
+                     if (zone_x - x) ** 2 + (zone_y - y) ** 2 <= radius * radius)
+
+    def dockable(self, ship, planets_by_id):
+        """
+        :param entity.Ship ship: The ship
+        :param dict[int, entity.Planet] planets_by_id: The planets the ship may dock to this turn, by id
+        :return: A planet the ship is in docking range of and may dock to, or None
+        :rtype: entity.Planet
+        """
+        for planet_id in self.planets_at(ship.x, ship.y):
+            planet = planets_by_id.get(planet_id)
+            if planet is not None:
+                return planet
+        return None
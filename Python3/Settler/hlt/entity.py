@@ -1,6 +1,8 @@
 import math
+from itertools import compress
 
-from . import constants
+from . import constants, geometry
+from .budget import Budget
 import abc
 from enum import Enum
 
@@ -36,7 +38,7 @@ class Entity:
         :return: distance
         :rtype: float
         """
-        return math.sqrt((target.x - self.x) ** 2 + (target.y - self.y) ** 2)
+        return geometry.distance(self.x, self.y, target.x, target.y)
 
     def calculate_angle_between(self, target):
         """
@@ -46,7 +48,7 @@ class Entity:
         :return: Angle between entities in degrees
         :rtype: float
         """
-        return math.degrees(math.atan2(target.y - self.y, target.x - self.x)) % 360
+        return geometry.angle(self.x, self.y, target.x, target.y)
 
     def closest_point_to(self, target, min_distance=3):
         """
@@ -58,13 +60,20 @@ class Entity:
         :return: The closest point's coordinates
         :rtype: Position
         """
-        angle = target.calculate_angle_between(self)
-        radius = target.radius + min_distance
-        x = target.x + radius * math.cos(math.radians(angle))
-        y = target.y + radius * math.sin(math.radians(angle))
-
+        x, y = self.closest_point_xy(target, min_distance)
         return Position(x, y)
 
+    def closest_point_xy(self, target, min_distance=3):
+        """
+        closest_point_to without creating a Position.
+
+        :param Entity target: The target to compare against
+        :param int min_distance: Minimum distance specified from the object's outer radius
+        :return: The closest point's coordinates
+        :rtype: (float, float)
+        """
+        return geometry.closest_point(self.x, self.y, target.x, target.y, target.radius, min_distance)
+
     @abc.abstractmethod
     def _link(self, players, planets):
         pass
@@ -212,6 +221,8 @@ class Ship(Entity):
     :ivar y: The ship y-coordinate.
     :ivar radius: The ship radius.
     :ivar health: The ship's remaining health.
+    :ivar vel_x: The ship's x-velocity, as reported by the engine.
+    :ivar vel_y: The ship's y-velocity, as reported by the engine.
     :ivar DockingStatus docking_status: The docking status (UNDOCKED, DOCKED, DOCKING, UNDOCKING)
     :ivar planet: The ID of the planet the ship is docked to, if applicable.
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
@@ -223,6 +234,12 @@ class Ship(Entity):
         DOCKED = 2
         UNDOCKING = 3
 
+    class NavigationQuality(Enum):
+        DIRECT = 0  # straight path to the target is clear
+        CORRECTED = 1  # found a clear path after some corrections
+        PARTIAL = 2  # budget ran out; best path so far, shortened to stop before its first obstacle
+        FAILED = 3  # no command
+
     def __init__(self, player_id, ship_id, x, y, hp, vel_x, vel_y,
                  docking_status, planet, progress, cooldown):
         self.id = ship_id
@@ -231,6 +248,8 @@ class Ship(Entity):
         self.owner = player_id
         self.radius = constants.SHIP_RADIUS
         self.health = hp
+        self.vel_x = vel_x
+        self.vel_y = vel_y
         self.docking_status = docking_status
         self.planet = planet if (docking_status is not Ship.DockingStatus.UNDOCKED) else None
         self._docking_progress = progress
@@ -288,21 +307,92 @@ class Ship(Entity):
         :rtype: str
         """
         # Assumes a position, not planet (as it would go to the center of the planet otherwise)
+        ignore = () if not (ignore_ships or ignore_planets) \
+            else Ship if (ignore_ships and not ignore_planets) \
+            else Planet if (ignore_planets and not ignore_ships) \
+            else Entity
+        # Corrections work on plain coordinates, so no Position is created per correction
+        target_x, target_y, skip = target.x, target.y, target
+        for _ in range(max_corrections):
+            distance = geometry.distance(self.x, self.y, target_x, target_y)
+            angle = geometry.angle(self.x, self.y, target_x, target_y)
+            if not (avoid_obstacles and game_map.path_blocked(self, target_x, target_y, ignore, skip)):
+                speed = speed if (distance >= speed) else distance
+                return self.thrust(speed, angle)
+            target_x = self.x + math.cos(math.radians(angle + angular_step)) * distance
+            target_y = self.y + math.sin(math.radians(angle + angular_step)) * distance
+            # Corrections have always been checked against every entity type
+            ignore, skip = (), None
+        return None
+
+    def navigate_within(self, target, game_map, speed, budget=None, avoid_obstacles=True, max_corrections=90,
+                        angular_step=1, ignore_ships=False, ignore_planets=False):
+        """
+        Anytime version of navigate: tries the same corrections in the same order, but stops when the budget runs
+        out and returns the best command found so far. Unlike navigate, the ignore flags also hold for corrections.
+        The direct path is tested whatever the budget. A test is charged one work unit per obstacle it checks, so one
+        that the planet distance field settles costs a single unit.
+
+        :param Entity target: The entity to which you will navigate
+        :param game_map.Map game_map: The map of the game, from which obstacles will be extracted
+        :param int speed: The (max) speed to navigate. If the obstacle is nearer, will adjust accordingly.
+        :param budget.Budget budget: Limits time and obstacle tests spent; None for no limit
+        :param bool avoid_obstacles: Whether to avoid the obstacles in the way (simple pathfinding).
+        :param int max_corrections: The maximum number of degrees to deviate per turn while trying to pathfind.
+        :param int angular_step: The degree difference to deviate if the original destination has obstacles
+        :param bool ignore_ships: Whether to ignore ships in calculations
+        :param bool ignore_planets: Whether to ignore planets in calculations
+        :return: The command (or None) and how good it is
+        :rtype: (str, Ship.NavigationQuality)
+        """
+        quality = Ship.NavigationQuality
         if max_corrections <= 0:
-            return None
+            return None, quality.FAILED
+        if budget is None:
+            budget = Budget()
         distance = self.calculate_distance_between(target)
         angle = self.calculate_angle_between(target)
+        speed = speed if (distance >= speed) else distance
+        if not avoid_obstacles:
+            return self.thrust(speed, angle), quality.DIRECT
+
         ignore = () if not (ignore_ships or ignore_planets) \
             else Ship if (ignore_ships and not ignore_planets) \
             else Planet if (ignore_planets and not ignore_ships) \
             else Entity
-        if avoid_obstacles and game_map.obstacles_between(self, target, ignore):
-            new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
-            new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
-            new_target = Position(self.x + new_target_dx, self.y + new_target_dy)
-            return self.navigate(new_target, game_map, speed, True, max_corrections - 1, angular_step)
-        speed = speed if (distance >= speed) else distance
-        return self.thrust(speed, angle)
+        obstacles, xs, ys, radii = game_map.obstacle_arrays(ignore)
+        indices = range(len(obstacles))
+        fudge = self.radius + 0.1
+        best_angle = None
+        best_clearance = 0
+        for correction in range(max_corrections):
+            # The direct path is always tested; a correction only if the budget could pay for checking everything
+            if correction and not budget.can_afford(len(obstacles)):
+                break
+            corrected = (angle + correction * angular_step) % 360
+            end_x = self.x + math.cos(math.radians(corrected)) * distance
+            end_y = self.y + math.sin(math.radians(corrected)) * distance
+            if game_map._planets_clear(self, end_x, end_y, ignore):
+                budget.spend(1)
+                return self.thrust(speed, corrected), (quality.DIRECT if correction == 0 else quality.CORRECTED)
+            budget.spend(len(obstacles))
+            clearance = distance
+            hits = geometry.segment_circles(self.x, self.y, end_x, end_y, xs, ys, radii, fudge)
+            for index in compress(indices, hits):
+                obstacle = obstacles[index]
+                if obstacle is not self:
+                    clearance = min(clearance, self.calculate_distance_between(obstacle) - obstacle.radius - fudge)
+            if clearance >= distance:
+                return self.thrust(speed, corrected), (quality.DIRECT if correction == 0 else quality.CORRECTED)
+            if clearance > best_clearance:
+                best_angle = corrected
+                best_clearance = clearance
+        else:
+            return None, quality.FAILED
+
+        if best_angle is None or int(min(speed, best_clearance)) < 1:
+            return None, quality.FAILED
+        return self.thrust(min(speed, best_clearance), best_angle), quality.PARTIAL
 
     def can_dock(self, planet):
         """
@@ -0,0 +1,122 @@
+from collections import Counter, namedtuple
+from enum import Enum
+
+from . import entity
+
+
+class EventKind(Enum):
+    SHIP_SPAWNED = 0  # a ship appeared (every ship does, on the first frame)
+    SHIP_DESTROYED = 1
+    SHIP_DAMAGED = 2  # value is the change in health (negative)
+    DOCKING_STARTED = 3  # planet_id is the planet being docked to
+    DOCKING_FINISHED = 4
+    UNDOCKING_STARTED = 5
+    UNDOCKING_FINISHED = 6
+    PLANET_CAPTURED = 7  # owner_id is the new owner, value the previous one (None if it was unowned)
+    PLANET_LOST = 8  # owner_id is the owner it was lost by; the planet is unowned now
+    PLANET_DESTROYED = 9
+    PLANET_DAMAGED = 10  # value is the change in health (negative)
+
+
+#: Something that changed between two frames. entity_id is a ship id for ship events, a planet id for planet events.
+#: owner_id is the owning player's id (None if unowned); planet_id and value are None unless the kind says otherwise.
+Event = namedtuple('Event', 'kind entity_id owner_id planet_id value')
+
+_UNDOCKED = entity.Ship.DockingStatus.UNDOCKED
+_DOCKING = entity.Ship.DockingStatus.DOCKING
+_DOCKED = entity.Ship.DockingStatus.DOCKED
+_UNDOCKING = entity.Ship.DockingStatus.UNDOCKING
+
+# (previous status, status) -> event, for the transitions the engine makes
+_DOCKING_EVENTS = {
+    (_UNDOCKED, _DOCKING): EventKind.DOCKING_STARTED,
+    (_DOCKING, _DOCKED): EventKind.DOCKING_FINISHED,
+    (_DOCKED, _UNDOCKING): EventKind.UNDOCKING_STARTED,
+    (_UNDOCKING, _UNDOCKED): EventKind.UNDOCKING_FINISHED,
+}
+
+
+def _id(owner):
+    return owner.id if owner is not None else None
+
+
+class EventTracker:
+    """
+    Turns consecutive frames into the events between them. Each update keeps a compact record of the frame keyed by
+    id and compares the next frame against it, so producing the events is linear in the number of entities.
+
+    :ivar events: The events between the last two frames, ship events first, in the order the engine lists entities
+    :ivar counts: Counter of events by kind, over all frames
+    """
+
+    def __init__(self):
+        self.events = []
+        self.counts = Counter()
+        self._ships = {}
+        self._planets = {}
+
+    def update(self, game_map):
+        """
+        Record a new frame.
+
+        :param game_map.Map game_map: The map, freshly parsed
+        :return: The events since the previous frame
+        :rtype: list[Event]
+        """
+        events = []
+        ships = {ship.id: (_id(ship.owner), ship.docking_status, _id(ship.planet), ship.health)
+                 for ship in game_map.ships()}
+        planets = {planet.id: (_id(planet.owner), planet.health) for planet in game_map.all_planets()}
+
+        previous_ships = self._ships
+        for ship_id, (owner_id, status, planet_id, health) in ships.items():
+            previous = previous_ships.get(ship_id)
+            if previous is None:
+                events.append(Event(EventKind.SHIP_SPAWNED, ship_id, owner_id, None, None))
+                continue
+            _, previous_status, previous_planet_id, previous_health = previous
+            if health != previous_health:
+                events.append(Event(EventKind.SHIP_DAMAGED, ship_id, owner_id, None, health - previous_health))
+            if status != previous_status:
+                kind = _DOCKING_EVENTS.get((previous_status, status))
+                if kind is not None:
+                    if planet_id is None:
+                        planet_id = previous_planet_id  # undocking finished
+                    events.append(Event(kind, ship_id, owner_id, planet_id, None))
+        for ship_id, (owner_id, _, planet_id, health) in previous_ships.items():
+            if ship_id in ships:
+                continue
+            events.append(Event(EventKind.SHIP_DESTROYED, ship_id, owner_id, planet_id, health))
+
+        previous_planets = self._planets
+        for planet_id, (owner_id, health) in planets.items():
+            previous = previous_planets.get(planet_id)
+            if previous is None:
+                continue
+            previous_owner_id, previous_health = previous
+            if health != previous_health:
+                events.append(Event(EventKind.PLANET_DAMAGED, planet_id, owner_id, None, health - previous_health))
+            if owner_id != previous_owner_id:
+                if owner_id is None:
+                    events.append(Event(EventKind.PLANET_LOST, planet_id, previous_owner_id, None, None))
+                else:
+                    events.append(Event(EventKind.PLANET_CAPTURED, planet_id, owner_id, None, previous_owner_id))
+        for planet_id, (owner_id, _) in previous_planets.items():
+            if planet_id not in planets:
+                events.append(Event(EventKind.PLANET_DESTROYED, planet_id, owner_id, None, None))
+
+        self._ships = ships
+        self._planets = planets
+        self.events = events
+        self.counts.update(event.kind for event in events)
+        return events
+
+
+def of_kind(events, *kinds):
+    """
+    :param list[Event] events: The events to filter
+    :param EventKind kinds: The kinds to keep
+    :return: The events of the given kinds, in order
+    :rtype: list[Event]
+    """
+    return [event for event in events if event.kind in kinds]
@@ -0,0 +1,226 @@
+import heapq
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from . import constants, raster
+
+_SQRT2 = math.sqrt(2)
+_NEIGHBOURS = ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+               (-1, -1, _SQRT2), (-1, 1, _SQRT2), (1, -1, _SQRT2), (1, 1, _SQRT2))
+
+
+class FlowField:
+    """
+    Shortest-path direction field over a coarse grid toward one destination circle. Built once with a Dijkstra
+    flood from the destination; afterwards any number of ships can read their heading in O(1).
+
+    :ivar grid: The raster.Grid the field is laid over
+    :ivar x: Destination x-coordinate
+    :ivar y: Destination y-coordinate
+    :ivar radius: Destination radius; every cell whose center lies inside counts as arrived
+    """
+
+    def __init__(self, grid, blocked, x, y, radius=0, lookahead=3):
+        """
+        :param raster.Grid grid: The grid to lay the field over
+        :param numpy.ndarray blocked: Boolean (rows, cols) mask of impassable cells
+        :param float x: Destination x-coordinate
+        :param float y: Destination y-coordinate
+        :param float radius: Destination radius
+        :param int lookahead: How many cells down the path a heading aims at (smooths the staircase of grid moves)
+        """
+        self.grid = grid
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self._distance, self._aim = self._build(blocked, lookahead)
+
+    def _build(self, blocked, lookahead):
+        grid = self.grid
+        rows, cols = grid.shape
+        goal = grid.circle_mask(self.x, self.y, self.radius)
+        goal[grid.cell_of(self.x, self.y)] = True
+        free = (~blocked | goal).ravel().tolist()
+
+        distance = [math.inf] * grid.size
+        downstream = [-1] * grid.size
+        heap = []
+        for cell in np.flatnonzero(goal).tolist():
+            distance[cell] = 0.0
+            downstream[cell] = cell
+            heap.append((0.0, cell))
+        heapq.heapify(heap)
+
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if d > distance[cell]:
+                continue
+            row, col = divmod(cell, cols)
+            for drow, dcol, step in _NEIGHBOURS:
+                nrow = row + drow
+                ncol = col + dcol
+                if nrow < 0 or nrow >= rows or ncol < 0 or ncol >= cols:
+                    continue
+                neighbour = nrow * cols + ncol
+                if not free[neighbour]:
+                    continue
+                if drow and dcol and not (free[nrow * cols + col] and free[row * cols + ncol]):
+                    continue  # no cutting corners around obstacles
+                nd = d + step
+                if nd < distance[neighbour]:
+                    distance[neighbour] = nd
+                    downstream[neighbour] = cell
+                    heapq.heappush(heap, (nd, neighbour))
+
+        aim = downstream
+        for _ in range(lookahead - 1):
+            aim = [downstream[cell] if cell >= 0 else -1 for cell in aim]
+        return distance, aim
+
+    def heading(self, x, y):
+        """
+        :param float x: Current x-coordinate
+        :param float y: Current y-coordinate
+        :return: The angle in degrees to thrust at, or None if the destination can not be reached from here
+        :rtype: int
+        """
+        row, col = self.grid.cell_of(x, y)
+        cell = row * self.grid.cols + col
+        aim = self._aim[cell]
+        if aim < 0:
+            return None
+        if self._distance[aim] == 0:
+            aim_x, aim_y = self.x, self.y
+        else:
+            # Keep our offset within the cell, so that straight grid paths give straight headings
+            center_x, center_y = self.grid.center_of(row, col)
+            aim_x, aim_y = self.grid.center_of(*divmod(aim, self.grid.cols))
+            aim_x += x - center_x
+            aim_y += y - center_y
+        return int(round(math.degrees(math.atan2(aim_y - y, aim_x - x)))) % 360
+
+    def route(self, x, y):
+        """
+        :param float x: Current x-coordinate
+        :param float y: Current y-coordinate
+        :return: The cell centers the field's headings lead through on the way to the destination (not including
+            the destination itself), or None if the destination can not be reached from here
+        :rtype: list[(float, float)]
+        """
+        grid = self.grid
+        row, col = grid.cell_of(x, y)
+        cell = row * grid.cols + col
+        if self._aim[cell] < 0:
+            return None
+        points = []
+        # Distances strictly decrease along aims, so this ends in the destination
+        while self._distance[cell] > 0:
+            cell = self._aim[cell]
+            if self._distance[cell] > 0:
+                points.append(grid.center_of(*divmod(cell, grid.cols)))
+        return points
+
+    def distance(self, x, y):
+        """
+        :param float x: Current x-coordinate
+        :param float y: Current y-coordinate
+        :return: Length of the grid path to the destination, in map units (inf if unreachable)
+        :rtype: float
+        """
+        row, col = self.grid.cell_of(x, y)
+        return self._distance[row * self.grid.cols + col] * self.grid.cell_size
+
+
+class FlowFieldCache:
+    """
+    LRU of flow fields keyed by destination, so that every ship bound for a popular target shares one field.
+    Static fields (planet destinations) live for the whole game; dynamic ones are rebuilt once per turn. All fields
+    are dropped when the set of planets changes.
+
+    :ivar grid: The raster.Grid fields are laid over
+    :ivar capacity: Maximum number of fields kept
+    :ivar hits: Number of heading requests answered from a cached field
+    :ivar misses: Number of heading requests that had to build a field
+    """
+
+    def __init__(self, width, height, cell_size=4, capacity=16):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param float cell_size: Length of a grid cell side, in map units
+        :param int capacity: Maximum number of fields kept
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._fields = OrderedDict()
+        self._blocked = np.zeros(self.grid.shape, dtype=bool)
+        self._planet_ids = None
+        self._turn = None
+
+    def begin_turn(self, game_map, turn):
+        """
+        Prepare the cache for a new turn: expire last turn's dynamic fields, and start over if a planet was destroyed.
+
+        :param game_map.Map game_map: The current map
+        :param int turn: The current turn number
+        :return: nothing
+        """
+        planets = game_map.all_planets()
+        planet_ids = frozenset(planet.id for planet in planets)
+        if planet_ids != self._planet_ids:
+            self._planet_ids = planet_ids
+            self._blocked = self._planet_mask(planets)
+            self._fields.clear()
+        self._turn = turn
+        for key in [key for key, (stamp, _) in self._fields.items() if stamp is not None and stamp != turn]:
+            del self._fields[key]
+
+    def _planet_mask(self, planets):
+        """
+        :param list[entity.Planet] planets: The planets to block
+        :return: Mask of the cells a ship passing through might collide with a planet in
+        :rtype: numpy.ndarray
+        """
+        blocked = np.zeros(self.grid.shape, dtype=bool)
+        margin = constants.SHIP_RADIUS + self.grid.cell_size * _SQRT2 / 2
+        for planet in planets:
+            rows, cols, window = self.grid.circle_window(planet.x, planet.y, planet.radius + margin)
+            blocked[rows, cols] |= window
+        return blocked
+
+    def field(self, key, x, y, radius=0, static=False):
+        """
+        :param key: Any hashable naming the destination, e.g. ('refill', planet.id)
+        :param float x: Destination x-coordinate
+        :param float y: Destination y-coordinate
+        :param float radius: Destination radius
+        :param bool static: Whether the destination stays put for the rest of the game
+        :return: The cached or freshly built field
+        :rtype: FlowField
+        """
+        entry = self._fields.get(key)
+        if entry is not None:
+            stamp, field = entry
+            if (stamp is None or stamp == self._turn) and (field.x, field.y, field.radius) == (x, y, radius):
+                self._fields.move_to_end(key)
+                self.hits += 1
+                return field
+        self.misses += 1
+        field = FlowField(self.grid, self._blocked, x, y, radius)
+        self._fields[key] = (None if static else self._turn, field)
+        self._fields.move_to_end(key)
+        while len(self._fields) > self.capacity:
+            self._fields.popitem(last=False)
+        return field
+
+    def heading(self, entity, key, x, y, radius=0, static=False):
+        """
+        :param entity.Entity entity: The entity asking for directions
+        :return: The angle in degrees for entity to thrust at toward the keyed destination, or None if unreachable
+        :rtype: int
+        """
+        return self.field(key, x, y, radius, static).heading(entity.x, entity.y)
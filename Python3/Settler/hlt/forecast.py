@@ -0,0 +1,206 @@
+import math
+
+import numpy as np
+
+from . import constants, entity
+from .events import EventKind
+
+_DOCKING = entity.Ship.DockingStatus.DOCKING
+_DOCKED = entity.Ship.DockingStatus.DOCKED
+
+
+class ProductionForecast:
+    """
+    What the planets will produce over the next turns, for all of them at once: when each spawns its next ship and
+    for whom, when its resources run out, and how big each player's fleet will be. The ships docked and docking to
+    each planet, the planets' owners and the players' fleets are kept up to date from the events between frames
+    (see events.EventTracker), so an update costs as much as what changed; the production counters, which change
+    every turn on every owned planet, are read from the frame.
+
+    The forecast assumes no ship docks, undocks or dies from now on, apart from the ships already docking, which
+    start producing once they finish.
+
+    :ivar planet_ids: Ids of the planets, in row order
+    :ivar owner: Owning player id of each planet, -1 if unowned
+    :ivar docked: Number of ships docked to each planet
+    :ivar production: Production each planet has towards its next ship
+    :ivar remaining: Resources each planet has left to produce from
+    :ivar fleet: Number of ships of each player, by player id
+    :ivar turn: The turn of the last update
+    """
+
+    def __init__(self):
+        self.planet_ids = np.empty(0, dtype=np.int64)
+        self.owner = np.empty(0, dtype=np.int64)
+        self.docked = np.empty(0, dtype=np.int64)
+        self.production = np.empty(0, dtype=np.int64)
+        self.remaining = np.empty(0, dtype=np.int64)
+        self.fleet = np.empty(0, dtype=np.int64)
+        self.turn = 0
+        self._rows = {}
+        self._docking = {}  # ship id -> (planet id, owner id, turn it finishes docking)
+        self._docked = {}  # ship id -> planet id
+
+    def _row(self, planet_id):
+        return self._rows.get(planet_id)
+
+    def _count_ship(self, owner_id, change):
+        if owner_id is None:
+            return
+        if owner_id >= len(self.fleet):
+            self.fleet = np.concatenate([self.fleet, np.zeros(owner_id + 1 - len(self.fleet), dtype=np.int64)])
+        self.fleet[owner_id] += change
+
+    def _rebuild(self, game_map):
+        """
+        Take everything from the frame, for the first update.
+        """
+        planets = game_map.all_planets()
+        self.planet_ids = np.array([planet.id for planet in planets], dtype=np.int64)
+        self._rows = {planet_id: row for row, planet_id in enumerate(self.planet_ids.tolist())}
+        self.owner = np.array([planet.owner.id if planet.owner is not None else -1 for planet in planets],
+                              dtype=np.int64)
+        self.docked = np.zeros(len(planets), dtype=np.int64)
+        self.fleet = np.zeros(0, dtype=np.int64)
+        self._docking = {}
+        self._docked = {}
+        for ship in game_map.ships():
+            self._count_ship(ship.owner.id, 1)
+            if ship.docking_status is _DOCKING:
+                self._docking[ship.id] = (ship.planet.id, ship.owner.id, self.turn + ship._docking_progress)
+            elif ship.docking_status is _DOCKED:
+                self._docked[ship.id] = ship.planet.id
+                self.docked[self._rows[ship.planet.id]] += 1
+
+    def _undock(self, ship_id):
+        """
+        Forget a ship that stopped producing (or will never start).
+        """
+        self._docking.pop(ship_id, None)
+        planet_id = self._docked.pop(ship_id, None)
+        row = self._row(planet_id)
+        if row is not None:
+            self.docked[row] -= 1
+
+    def update(self, game_map, events):
+        """
+        :param game_map.Map game_map: The map, freshly parsed
+        :param list[events.Event] events: What changed since the previous update
+        :return: nothing
+        """
+        self.turn += 1
+        if self.turn == 1:
+            self._rebuild(game_map)
+        else:
+            for event in events:
+                kind = event.kind
+                if kind is EventKind.SHIP_SPAWNED:
+                    self._count_ship(event.owner_id, 1)
+                elif kind is EventKind.SHIP_DESTROYED:
+                    self._count_ship(event.owner_id, -1)
+                    self._undock(event.entity_id)
+                elif kind is EventKind.DOCKING_STARTED:
+                    self._docking[event.entity_id] = (event.planet_id, event.owner_id,
+                                                      self.turn + constants.DOCK_TURNS)
+                elif kind is EventKind.DOCKING_FINISHED:
+                    self._docking.pop(event.entity_id, None)
+                    self._docked[event.entity_id] = event.planet_id
+                    self.docked[self._rows[event.planet_id]] += 1
+                elif kind is EventKind.UNDOCKING_STARTED:
+                    self._undock(event.entity_id)
+                elif kind is EventKind.PLANET_CAPTURED:
+                    self.owner[self._rows[event.entity_id]] = event.owner_id
+                elif kind is EventKind.PLANET_LOST:
+                    self.owner[self._rows[event.entity_id]] = -1
+                elif kind is EventKind.PLANET_DESTROYED:
+                    row = self._rows.pop(event.entity_id)
+                    self.owner[row] = -1
+                    self.docked[row] = 0
+        # Destroyed planets keep their row, with nothing to produce
+        production = np.zeros(len(self.planet_ids), dtype=np.int64)
+        remaining = np.zeros(len(self.planet_ids), dtype=np.int64)
+        for planet in game_map.all_planets():
+            row = self._rows[planet.id]
+            production[row] = planet.current_production
+            remaining[row] = planet.remaining_resources
+        self.production = production
+        self.remaining = remaining
+
+    def owners(self):
+        """
+        :return: The player each planet produces for: its owner, or the player of the ships docking to it
+        :rtype: numpy.ndarray
+        """
+        owners = self.owner.copy()
+        for planet_id, owner_id, _ in self._docking.values():
+            row = self._row(planet_id)
+            if row is not None and owners[row] < 0:
+                owners[row] = owner_id
+        return owners
+
+    def rates(self, turns):
+        """
+        :param int turns: How many turns ahead to look
+        :return: (turns, planets) production of each planet in each of the next turns, resources permitting
+        :rtype: numpy.ndarray
+        """
+        producing = np.tile(self.docked, (turns, 1))
+        for planet_id, _, finished in self._docking.values():
+            row = self._row(planet_id)
+            if row is not None:
+                producing[max(finished - self.turn, 0):, row] += 1
+        producing[:, self.owners() < 0] = 0
+        rates = producing * constants.BASE_PRODUCTIVITY
+        # production stops once the resources are spent
+        spent = np.minimum(np.cumsum(rates, axis=0), self.remaining)
+        return np.diff(spent, axis=0, prepend=0)
+
+    def spawns(self, turns):
+        """
+        :param int turns: How many turns ahead to look
+        :return: (turns, planets) number of ships each planet spawns in each of the next turns
+        :rtype: numpy.ndarray
+        """
+        produced = self.production + np.cumsum(self.rates(turns), axis=0)
+        ships = produced // constants.SHIP_COST
+        return np.diff(ships, axis=0, prepend=(self.production // constants.SHIP_COST)[None, :])
+
+    def next_spawn(self, turns):
+        """
+        :param int turns: How many turns ahead to look
+        :return: The turns until each planet spawns its next ship (inf if not within the given turns), and the
+                 player it spawns for (-1 if none)
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        spawns = self.spawns(turns) > 0
+        spawning = spawns.any(axis=0)
+        wait = np.where(spawning, spawns.argmax(axis=0) + 1, math.inf)
+        return wait, np.where(spawning, self.owners(), -1)
+
+    def exhaustion(self):
+        """
+        :return: The turns until each planet's resources run out at its current rate, inf if it is not producing
+        :rtype: numpy.ndarray
+        """
+        rates = self.docked * constants.BASE_PRODUCTIVITY * (self.owner >= 0)
+        with np.errstate(divide='ignore'):
+            return np.where(rates > 0, np.ceil(self.remaining / np.maximum(rates, 1)), math.inf)
+
+    def fleets(self, turns, players=None):
+        """
+        :param int turns: How many turns ahead to look
+        :param int players: Number of players; None for as many as have been seen
+        :return: (turns + 1, players) number of ships of each player now and after each of the next turns
+        :rtype: numpy.ndarray
+        """
+        players = max(players or 0, len(self.fleet))
+        fleet = np.zeros(players, dtype=np.int64)
+        fleet[:len(self.fleet)] = self.fleet
+        spawns = self.spawns(turns)
+        owners = self.owners()
+        owned = owners >= 0
+        players = max(players, int(owners.max(initial=-1)) + 1)
+        fleet = np.concatenate([fleet, np.zeros(players - len(fleet), dtype=np.int64)])
+        by_player = np.zeros((turns, players), dtype=np.int64)
+        np.add.at(by_player, (slice(None), owners[owned]), spawns[:, owned])
+        return np.vstack([fleet, fleet + np.cumsum(by_player, axis=0)])
@@ -1,4 +1,4 @@
-from . import collision, entity
+from . import clustering, columns, distance_field, dock_zones, entity, geometry
 
 
 class Map:
@@ -21,6 +21,12 @@ class Map:
         self.height = height
         self._players = {}
         self._planets = {}
+        self._ship_columns = None
+        self._ship_clusters = {}
+        self._obstacle_arrays = {}
+        self._distance_field = None
+        self._dock_zones = None
+        self._views = {}
 
     def get_me(self):
         """
@@ -39,10 +45,10 @@ class Map:
 
     def all_players(self):
         """
-        :return: List of all players
-        :rtype: list[Player]
+        :return: All players. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[Player]
         """
-        return list(self._players.values())
+        return self._view('players', self._players.values)
 
     def get_planet(self, planet_id):
         """
@@ -54,10 +60,158 @@ class Map:
 
     def all_planets(self):
         """
-        :return: List of all planets
-        :rtype: list[entity.Planet]
+        :return: All planets. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Planet]
         """
-        return list(self._planets.values())
+        return self._view('planets', self._planets.values)
+
+    def _view(self, key, build):
+        """
+        :param key: Names the view
+        :param build: Called (once per parse) to produce the view's entities
+        :return: The view, built on first use and reused until the next parse
+        :rtype: tuple
+        """
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = tuple(build())
+        return view
+
+    def ships(self):
+        """
+        :return: All ships of all players. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
+        """
+        return self._view('ships', lambda: (ship for player in self._players.values()
+                                            for ship in player._ships.values()))
+
+    def ships_of(self, player_id, docked=None):
+        """
+        :param int player_id: The id of the player whose ships are wanted
+        :param bool docked: True for ships not undocked (docking, docked or undocking), False for undocked ships,
+            None for both
+        :return: The player's ships. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
+        """
+        return self._view(('ships_of', player_id, docked), lambda: (
+            ship for ship in (self._players[player_id]._ships.values() if player_id in self._players else ())
+            if docked is None or (ship.docking_status != entity.Ship.DockingStatus.UNDOCKED) == docked))
+
+    def enemy_ships(self, docked=None):
+        """
+        :param bool docked: As for ships_of
+        :return: The ships of every player but the user. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
+        """
+        return self._view(('enemy_ships', docked), lambda: (
+            ship for player_id in self._players if player_id != self.my_id
+            for ship in self.ships_of(player_id, docked)))
+
+    def ships_by_status(self, docking_status):
+        """
+        :param entity.Ship.DockingStatus docking_status: The docking status wanted
+        :return: The ships of all players in that status. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
+        """
+        return self._view(('ships_by_status', docking_status), lambda: (
+            ship for ship in self.ships() if ship.docking_status == docking_status))
+
+    def planets_of(self, player_id):
+        """
+        :param int player_id: The id of the owner, or None for unowned planets
+        :return: The planets the player owns. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Planet]
+        """
+        return self._view(('planets_of', player_id), lambda: (
+            planet for planet in self._planets.values()
+            if (planet.owner.id if planet.owner is not None else None) == player_id))
+
+    def enemy_planets(self):
+        """
+        :return: The planets owned by a player other than the user. Read-only: the same tuple is returned until
+            the next parse.
+        :rtype: tuple[entity.Planet]
+        """
+        return self._view('enemy_planets', lambda: (
+            planet for planet in self._planets.values() if planet.owner is not None and planet.owner.id != self.my_id))
+
+    def planets_with_free_spots(self):
+        """
+        :return: The planets, owned or not, that are not full. Read-only: the same tuple is returned until the
+            next parse.
+        :rtype: tuple[entity.Planet]
+        """
+        return self._view('planets_with_free_spots', lambda: (
+            planet for planet in self._planets.values() if not planet.is_full()))
+
+    def docked_ships_of(self, planet_id):
+        """
+        :param int planet_id: The id of the planet
+        :return: The ships docked to the planet. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
+        """
+        return self._view(('docked_ships_of', planet_id), lambda: (
+            self._planets[planet_id]._docked_ships.values() if planet_id in self._planets else ()))
+
+    def ship_columns(self):
+        """
+        Column (array) view of all ships on the map. Built on first use and reused until the next parse.
+
+        :return: The ships of all players as arrays
+        :rtype: columns.ShipColumns
+        """
+        if self._ship_columns is None:
+            self._ship_columns = columns.ShipColumns(self._all_ships())
+        return self._ship_columns
+
+    def ship_clusters(self, radius):
+        """
+        Each player's ships grouped by nearness (see clustering.cluster). Built on first use and reused until the
+        next parse.
+
+        :param float radius: Linking radius
+        :return: The clusters; their rows are rows of ship_columns()
+        :rtype: clustering.Clusters
+        """
+        clusters = self._ship_clusters.get(radius)
+        if clusters is None:
+            clusters = self._ship_clusters[radius] = clustering.cluster_ships(self.ship_columns(), radius)
+        return clusters
+
+    def distance_field(self):
+        """
+        Signed distance field of the planets. Built on first use and kept across turns; rebuilt only once a planet
+        has been destroyed.
+
+        :return: The distance field of the planets still on the map
+        :rtype: distance_field.DistanceField
+        """
+        planet_ids = self._planets.keys()
+        if self._distance_field is None or self._distance_field.planet_ids != planet_ids:
+            self._distance_field = distance_field.DistanceField(self.width, self.height, self.all_planets())
+        return self._distance_field
+
+    def dock_zones(self):
+        """
+        Index of the planets' docking ranges. Built on first use and kept across turns; rebuilt only once a planet
+        has been destroyed.
+
+        :return: The docking ranges of the planets still on the map
+        :rtype: dock_zones.DockZoneIndex
+        """
+        planet_ids = self._planets.keys()
+        if self._dock_zones is None or self._dock_zones.planet_ids != planet_ids:
+            self._dock_zones = dock_zones.DockZoneIndex(self.width, self.height, self.all_planets())
+        return self._dock_zones
+
+    def clearance(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: Approximate distance from the point to the nearest planet surface (negative inside a planet)
+        :rtype: float
+        """
+        return self.distance_field().clearance(x, y)
 
     def nearby_entities_by_distance(self, entity):
         """
@@ -89,6 +243,10 @@ class Map:
         :return: nothing
         """
         tokens = map_string.split()
+        self._ship_columns = None
+        self._ship_clusters = {}
+        self._obstacle_arrays = {}
+        self._views = {}
 
         self._players, tokens = Player._parse(tokens)
         self._planets, tokens = entity.Planet._parse(tokens)
@@ -100,13 +258,10 @@ class Map:
         """
         Helper function to extract all ships from all players
 
-        :return: List of ships
-        :rtype: List[Ship]
+        :return: All ships. Read-only: the same tuple is returned until the next parse.
+        :rtype: tuple[entity.Ship]
         """
-        all_ships = []
-        for player in self.all_players():
-            all_ships.extend(player.all_ships())
-        return all_ships
+        return self.ships()
 
     def _intersects_entity(self, target):
         """
@@ -134,15 +289,73 @@ class Map:
         :return: The list of obstacles between the ship and target
         :rtype: list[entity.Entity]
         """
-        obstacles = []
-        entities = ([] if issubclass(entity.Planet, ignore) else self.all_planets()) \
-            + ([] if issubclass(entity.Ship, ignore) else self._all_ships())
-        for foreign_entity in entities:
-            if foreign_entity == ship or foreign_entity == target:
-                continue
-            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1):
-                obstacles.append(foreign_entity)
-        return obstacles
+        if self._planets_clear(ship, target.x, target.y, ignore):
+            return []
+        entities, xs, ys, radii = self.obstacle_arrays(ignore)
+        hits = geometry.segment_circles(ship.x, ship.y, target.x, target.y, xs, ys, radii, ship.radius + 0.1)
+        return [foreign_entity for foreign_entity, hit in zip(entities, hits)
+                if hit and foreign_entity != ship and foreign_entity != target]
+
+    def path_blocked(self, ship, x, y, ignore=(), skip=None):
+        """
+        Whether anything is in the way of a straight-line move to the point (x, y). Like obstacles_between, but
+        stops at the first obstacle and creates no list, not even of the intersection flags.
+
+        :param entity.Ship ship: Source entity
+        :param float x: Target x-coordinate
+        :param float y: Target y-coordinate
+        :param entity.Entity ignore: Which entity type to ignore
+        :param entity.Entity skip: An entity not to count as an obstacle (e.g. the target itself)
+        :return: True if there is an obstacle in the way
+        :rtype: bool
+        """
+        if self._planets_clear(ship, x, y, ignore):
+            return False
+        entities, xs, ys, radii = self.obstacle_arrays(ignore)
+        hit = geometry.first_segment_circle(ship.x, ship.y, x, y, xs, ys, radii, ship.radius + 0.1)
+        while hit >= 0 and (entities[hit] is ship or entities[hit] is skip):
+            hit = geometry.first_segment_circle(ship.x, ship.y, x, y, xs, ys, radii, ship.radius + 0.1, hit + 1)
+        return hit >= 0
+
+    def _planets_clear(self, ship, x, y, ignore):
+        """
+        Whether the distance field proves a ship's straight-line move clear, when planets are the only obstacles.
+        A field left over from before a planet was destroyed still only overestimates how close planets are, so it
+        is used as is. Nothing is built here: until distance_field() is first called every check is exact.
+
+        :param entity.Ship ship: Source entity
+        :param float x: Target x-coordinate
+        :param float y: Target y-coordinate
+        :param entity.Entity ignore: Which entity type to ignore
+        :return: True if the move is known to be clear; False if it has to be checked exactly
+        :rtype: bool
+        """
+        field = self._distance_field
+        if field is None or ignore is not entity.Ship:
+            return False
+        return field.segment_clear(ship.x, ship.y, x, y, ship.radius + 0.1)
+
+    def obstacle_arrays(self, ignore=()):
+        """
+        All entities not of the ignored type, with their coordinates prepared for the current geometry backend's
+        batch kernels. Built once per parse (and backend).
+
+        :param entity.Entity ignore: Which entity type to ignore
+        :return: The entities, their x-coordinates, y-coordinates and radii
+        :rtype: (tuple[entity.Entity], list[float], list[float], list[float])
+        """
+        key = (ignore, geometry.current.name)
+        cached = self._obstacle_arrays.get(key)
+        if cached is None:
+            entities = (() if issubclass(entity.Planet, ignore) else self.all_planets()) \
+                + (() if issubclass(entity.Ship, ignore) else self._all_ships())
+            prepare = geometry.current.prepare
+            cached = (entities,
+                      prepare([e.x for e in entities]),
+                      prepare([e.y for e in entities]),
+                      prepare([e.radius for e in entities]))
+            self._obstacle_arrays[key] = cached
+        return cached
 
 
 class Player:
@@ -0,0 +1,241 @@
+import math
+import os
+
+import numpy as np
+
+
+class Backend:
+    """
+    A named set of geometry kernels. Scalar kernels take plain coordinates; batch kernels take one source and
+    sequences (or arrays) of targets.
+
+    :ivar name: The name the backend is registered under
+    """
+
+    def __init__(self, name, distance, angle, closest_point, segment_circle, distances, segment_circles,
+                 first_segment_circle, prepare=list):
+        """
+        :param str name: Registry name
+        :param distance: (x1, y1, x2, y2) -> float
+        :param angle: (x1, y1, x2, y2) -> degrees in [0, 360)
+        :param closest_point: (x, y, target_x, target_y, target_radius, min_distance) -> (x, y)
+        :param segment_circle: (start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, fudge) -> bool
+        :param distances: (x, y, xs, ys) -> distances to every (xs[i], ys[i])
+        :param segment_circles: (start_x, start_y, end_x, end_y, xs, ys, radii, fudge) -> intersection flags
+        :param first_segment_circle: (start_x, start_y, end_x, end_y, xs, ys, radii, fudge, start) -> the index of
+            the first circle from start on that the segment intersects, or -1
+        :param prepare: Converts a sequence of floats into the form the batch kernels work on fastest
+        """
+        self.name = name
+        self.distance = distance
+        self.angle = angle
+        self.closest_point = closest_point
+        self.segment_circle = segment_circle
+        self.distances = distances
+        self.segment_circles = segment_circles
+        self.first_segment_circle = first_segment_circle
+        self.prepare = prepare
+
+
+def _distance(x1, y1, x2, y2):
+    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+
+def _angle(x1, y1, x2, y2):
+    return math.degrees(math.atan2(y2 - y1, x2 - x1)) % 360
+
+
+def _closest_point(x, y, target_x, target_y, target_radius, min_distance):
+    angle = math.degrees(math.atan2(y - target_y, x - target_x)) % 360
+    radius = target_radius + min_distance
+    return (target_x + radius * math.cos(math.radians(angle)),
+            target_y + radius * math.sin(math.radians(angle)))
+
+
+def _segment_circle(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, fudge):
+    # Parameterize the segment as start + t * (end - start), substitute into the equation of a circle, solve for t
+    dx = end_x - start_x
+    dy = end_y - start_y
+
+    a = dx**2 + dy**2
+    b = -2 * (start_x**2 - start_x*end_x - start_x*circle_x + end_x*circle_x +
+              start_y**2 - start_y*end_y - start_y*circle_y + end_y*circle_y)
+
+    if a == 0.0:
+        # Start and end are the same point
+        return math.sqrt((circle_x - start_x) ** 2 + (circle_y - start_y) ** 2) <= circle_radius + fudge
+
+    # Time along segment when closest to the circle (vertex of the quadratic)
+    t = min(-b / (2 * a), 1.0)
+    if t < 0:
+        return False
+
+    closest_x = start_x + dx * t
+    closest_y = start_y + dy * t
+    closest_distance = math.sqrt((circle_x - closest_x) ** 2 + (circle_y - closest_y) ** 2)
+
+    return closest_distance <= circle_radius + fudge
+
+
+def _distances(x, y, xs, ys):
+    return [_distance(x, y, x2, y2) for x2, y2 in zip(xs, ys)]
+
+
+def _segment_circles(start_x, start_y, end_x, end_y, xs, ys, radii, fudge):
+    return [_segment_circle(start_x, start_y, end_x, end_y, cx, cy, r, fudge) for cx, cy, r in zip(xs, ys, radii)]
+
+
+def _first_segment_circle(start_x, start_y, end_x, end_y, xs, ys, radii, fudge, start=0):
+    # A while loop rather than range(), so that the search allocates nothing at all
+    i = start
+    while i < len(xs):
+        if _segment_circle(start_x, start_y, end_x, end_y, xs[i], ys[i], radii[i], fudge):
+            return i
+        i += 1
+    return -1
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _numpy_distances(x, y, xs, ys):
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    return np.sqrt((xs - x) ** 2 + (ys - y) ** 2)
+
+
+def _numpy_segment_circles(start_x, start_y, end_x, end_y, xs, ys, radii, fudge):
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+    dx = end_x - start_x
+    dy = end_y - start_y
+
+    a = dx**2 + dy**2
+    if a == 0.0:
+        return np.sqrt((xs - start_x) ** 2 + (ys - start_y) ** 2) <= radii + fudge
+    b = -2 * (start_x**2 - start_x*end_x - start_x*xs + end_x*xs +
+              start_y**2 - start_y*end_y - start_y*ys + end_y*ys)
+
+    t = np.minimum(-b / (2 * a), 1.0)
+    closest_x = start_x + dx * t
+    closest_y = start_y + dy * t
+    closest_distance = np.sqrt((xs - closest_x) ** 2 + (ys - closest_y) ** 2)
+    return (t >= 0) & (closest_distance <= radii + fudge)
+
+
+def _numpy_first_segment_circle(start_x, start_y, end_x, end_y, xs, ys, radii, fudge, start=0):
+    hits = _numpy_segment_circles(start_x, start_y, end_x, end_y, xs[start:], ys[start:], radii[start:], fudge)
+    first = int(hits.argmax()) if len(hits) else 0
+    return start + first if len(hits) and hits[first] else -1
+
+
+_REFERENCE = Backend('python', _distance, _angle, _closest_point, _segment_circle, _distances, _segment_circles,
+                     _first_segment_circle)
+_backends = {}
+current = None
+
+
+def register(backend):
+    """
+    Make a backend available to use().
+
+    :param Backend backend: The backend to register
+    :return: nothing
+    """
+    _backends[backend.name] = backend
+
+
+def available():
+    """
+    :return: Names of the registered backends
+    :rtype: list[str]
+    """
+    return list(_backends)
+
+
+def get(name):
+    """
+    :param str name: Backend name
+    :return: The registered backend
+    :rtype: Backend
+    """
+    return _backends[name]
+
+
+def use(name):
+    """
+    Route every geometry call in hlt through the named backend. Unknown names (e.g. 'jit' when numba is not
+    installed) fall back to the reference 'python' backend.
+
+    :param str name: Backend name
+    :return: The backend now in use
+    :rtype: Backend
+    """
+    global current, distance, angle, closest_point, segment_circle, distances, segment_circles, first_segment_circle
+    current = _backends.get(name, _REFERENCE)
+    distance = current.distance
+    angle = current.angle
+    closest_point = current.closest_point
+    segment_circle = current.segment_circle
+    distances = current.distances
+    segment_circles = current.segment_circles
+    first_segment_circle = current.first_segment_circle
+    return current
+
+
+register(_REFERENCE)
+register(Backend('numpy', _distance, _angle, _closest_point, _segment_circle,
+                 _numpy_distances, _numpy_segment_circles, _numpy_first_segment_circle, _as_array))
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    _jit_distance = numba.njit(_distance)
+    _jit_angle = numba.njit(_angle)
+    _jit_closest_point = numba.njit(_closest_point)
+    _jit_segment_circle = numba.njit(_segment_circle)
+
+    @numba.njit
+    def _jit_distances_kernel(x, y, xs, ys):
+        result = np.empty(len(xs))
+        for i in range(len(xs)):
+            result[i] = _jit_distance(x, y, xs[i], ys[i])
+        return result
+
+    @numba.njit
+    def _jit_segment_circles_kernel(start_x, start_y, end_x, end_y, xs, ys, radii, fudge):
+        result = np.empty(len(xs), dtype=np.bool_)
+        for i in range(len(xs)):
+            result[i] = _jit_segment_circle(start_x, start_y, end_x, end_y, xs[i], ys[i], radii[i], fudge)
+        return result
+
+    @numba.njit
+    def _jit_first_segment_circle_kernel(start_x, start_y, end_x, end_y, xs, ys, radii, fudge, start):
+        for i in range(start, len(xs)):
+            if _jit_segment_circle(start_x, start_y, end_x, end_y, xs[i], ys[i], radii[i], fudge):
+                return i
+        return -1
+
+    def _jit_distances(x, y, xs, ys):
+        return _jit_distances_kernel(float(x), float(y),
+                                     np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64))
+
+    def _jit_segment_circles(start_x, start_y, end_x, end_y, xs, ys, radii, fudge):
+        return _jit_segment_circles_kernel(float(start_x), float(start_y), float(end_x), float(end_y),
+                                           np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64),
+                                           np.asarray(radii, dtype=np.float64), float(fudge))
+
+    def _jit_first_segment_circle(start_x, start_y, end_x, end_y, xs, ys, radii, fudge, start=0):
+        return _jit_first_segment_circle_kernel(float(start_x), float(start_y), float(end_x), float(end_y),
+                                                np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64),
+                                                np.asarray(radii, dtype=np.float64), float(fudge), int(start))
+
+    register(Backend('jit', _jit_distance, _jit_angle, _jit_closest_point, _jit_segment_circle,
+                     _jit_distances, _jit_segment_circles, _jit_first_segment_circle, _as_array))
+
+use(os.environ.get('HLT_GEOMETRY_BACKEND', 'python'))
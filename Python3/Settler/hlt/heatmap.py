@@ -0,0 +1,62 @@
+import numpy as np
+
+from . import raster
+
+
+class Heatmap:
+    """
+    Where ships have been, over the whole game so far: each turn the heat already on the map fades by the decay
+    factor and every ship adds one to its cell. All of it happens in place on one preallocated array, so a turn
+    costs the same at turn 300 as at turn 3, and no past frames are kept.
+
+    With a ship sitting in a cell for good, the cell's heat settles at 1 / (1 - decay); presence() scales heat back
+    by (1 - decay), so that it reads as a number of ships.
+
+    :ivar grid: The raster.Grid the heat is laid over
+    :ivar decay: The fraction of its heat a cell keeps from one turn to the next
+    :ivar values: (rows, cols) array of heat
+    :ivar turns: Number of updates so far
+    """
+
+    def __init__(self, width, height, cell_size=4, decay=0.9):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param float cell_size: Length of a cell side, in map units
+        :param float decay: The fraction of its heat a cell keeps from one turn to the next
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.decay = decay
+        self.values = np.zeros(self.grid.shape)
+        self.turns = 0
+
+    def update(self, xs, ys):
+        """
+        Fade the map by one turn and add this turn's ships.
+
+        :param xs: Ship x-coordinates
+        :param ys: Ship y-coordinates
+        :return: nothing
+        """
+        self.values *= self.decay
+        if len(xs):
+            np.add.at(self.values, self.grid.cells_of(xs, ys), 1.0)
+        self.turns += 1
+
+    def update_ships(self, ships):
+        """
+        :param list[entity.Ship] ships: This turn's ships
+        :return: nothing
+        """
+        self.update([ship.x for ship in ships], [ship.y for ship in ships])
+
+    def presence(self, x, y, radius):
+        """
+        :param float x: Circle center x-coordinate
+        :param float y: Circle center y-coordinate
+        :param float radius: Circle radius
+        :return: How many ships there have been in the cells centered within the circle, on decayed average
+        :rtype: float
+        """
+        rows, cols, window = self.grid.circle_window(x, y, radius)
+        return float(self.values[rows, cols][window].sum()) * (1 - self.decay)
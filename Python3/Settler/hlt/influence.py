@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+
+from . import constants, raster
+
+#: How far a ship can be from a point and still shoot at it next turn
+ATTACK_REACH = constants.MAX_SPEED + constants.WEAPON_RADIUS + constants.SHIP_RADIUS
+
+
+class InfluenceMap:
+    """
+    How many ships (or how much of their weight) can reach each cell of a coarse grid. A ship counts in every cell
+    that has some point within reach of it, so a zero proves that no ship is within reach anywhere in the cell,
+    while a non-zero means one may be. Rebuilt from scratch each turn into the same array, then read in O(1).
+
+    :ivar grid: The raster.Grid the map is laid over
+    :ivar reach: The reach the map was last built with
+    :ivar values: (rows, cols) array of the ships (or weight) that can reach each cell
+    """
+
+    def __init__(self, width, height, cell_size=2):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param float cell_size: Length of a cell side, in map units
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.reach = None
+        self.values = np.zeros(self.grid.shape)
+        self._kernels = {}
+
+    def _kernel(self, reach):
+        """
+        :return: Row and column offsets of the cells a ship reaches from anywhere in its own cell
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        kernel = self._kernels.get(reach)
+        if kernel is None:
+            cell_size = self.grid.cell_size
+            # A ship anywhere in its cell reaching a point anywhere in another: centers at most a diagonal further
+            radius = reach / cell_size + math.sqrt(2)
+            span = int(math.ceil(radius))
+            rows, cols = np.mgrid[-span:span + 1, -span:span + 1]
+            inside = rows ** 2 + cols ** 2 <= radius * radius
+            kernel = self._kernels[reach] = (rows[inside], cols[inside])
+        return kernel
+
+    def update(self, xs, ys, reach, weights=None):
+        """
+        Rebuild the map for a new set of ships.
+
+        :param xs: Ship x-coordinates
+        :param ys: Ship y-coordinates
+        :param float reach: How far from itself a ship counts
+        :param weights: How much each ship counts; None for one each
+        :return: nothing
+        """
+        self.reach = reach
+        values = self.values
+        values.fill(0)
+        if len(xs) == 0:
+            return
+        grid = self.grid
+        kernel_rows, kernel_cols = self._kernel(reach)
+        rows, cols = grid.cells_of(xs, ys)
+        rows = rows[:, None] + kernel_rows
+        cols = cols[:, None] + kernel_cols
+        inside = (rows >= 0) & (rows < grid.rows) & (cols >= 0) & (cols < grid.cols)
+        cells = (rows * grid.cols + cols)[inside]
+        if weights is not None:
+            weights = np.broadcast_to(np.asarray(weights, dtype=np.float64)[:, None], rows.shape)[inside]
+        values += np.bincount(cells, weights=weights, minlength=grid.size).reshape(grid.shape)
+
+    def update_ships(self, ships, reach, weights=None):
+        """
+        :param list[entity.Ship] ships: The ships to build the map from
+        :param float reach: How far from itself a ship counts
+        :param weights: How much each ship counts; None for one each
+        :return: nothing
+        """
+        self.update([ship.x for ship in ships], [ship.y for ship in ships], reach, weights)
+
+    def at(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: The ships (or weight) that may reach the point; 0 if none can
+        :rtype: float
+        """
+        return self.values.item(self.grid.cell_of(x, y))
+
+    def peak(self, x, y, radius):
+        """
+        :param float x: Circle center x-coordinate
+        :param float y: Circle center y-coordinate
+        :param float radius: Circle radius
+        :return: The most ships (or weight) that may reach any one cell centered within the circle
+        :rtype: float
+        """
+        rows, cols, window = self.grid.circle_window(x, y, radius)
+        cells = self.values[rows, cols][window]
+        return cells.max() if cells.size else self.at(x, y)
@@ -3,13 +3,14 @@ import logging
 import copy
 import time
 
-from . import game_map
+from . import events, game_map
 
 
 class Game:
     """
     :ivar map: Current map representation
     :ivar initial_map: The initial version of the map before game starts
+    :ivar events: What changed between the previous map and the current one (see events.EventKind)
     """
     @staticmethod
     def _send_string(s):
@@ -81,6 +82,7 @@ class Game:
         self._send_string(name)
         self._done_sending()
         self.map = game_map.Map(tag, width, height)
+        self._event_tracker = events.EventTracker()
         self.update_map()
         self.initial_map = copy.deepcopy(self.map)
 
@@ -95,5 +97,6 @@ class Game:
         logging.info("---NEW TURN---")
         start_parse = time.time()
         self.map._parse(self._get_string())
+        self.events = self._event_tracker.update(self.map)
         logging.info("---NEW TURN--- parse took {:.03f}".format(time.time() - start_parse))
         return self.map
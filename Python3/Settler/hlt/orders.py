@@ -0,0 +1,171 @@
+from collections import Counter
+
+import numpy as np
+
+from . import constants, entity
+
+
+class Order:
+    """
+    What a ship has been told to go after, and what the world looked like when it was told.
+
+    :ivar kind: What the order is for, e.g. 'claim' or 'attack'
+    :ivar target_id: Id of the planet or ship the order is after
+    :ivar target_is_planet: Whether target_id is a planet id (else a ship id)
+    :ivar x: Target x-coordinate when the order was issued
+    :ivar y: Target y-coordinate when the order was issued
+    :ivar owner_id: Id of the target planet's owner when the order was issued (None if unowned, or not a planet)
+    :ivar arrive_distance: Distance from the target's surface at which the order counts as done
+    :ivar turn: Turn the order was issued on
+    """
+
+    def __init__(self, kind, target, turn, arrive_distance):
+        self.kind = kind
+        self.target_id = target.id
+        self.target_is_planet = isinstance(target, entity.Planet)
+        self.x = target.x
+        self.y = target.y
+        self.owner_id = target.owner.id if self.target_is_planet and target.owner is not None else None
+        self.arrive_distance = arrive_distance
+        self.turn = turn
+
+    def __repr__(self):
+        return "Order({} {} {})".format(self.kind, 'planet' if self.target_is_planet else 'ship', self.target_id)
+
+
+class OrderBook:
+    """
+    Every ship's standing order, kept from turn to turn so that a ship only re-plans when something relevant has
+    changed. begin_turn() drops the orders that an event has invalidated:
+
+    - 'gone': the ship was destroyed or has docked
+    - 'target lost': the target planet or ship was destroyed
+    - 'target moved': the target is more than move_threshold from where it was when the order was issued
+    - 'owner changed': the target planet changed hands
+    - 'threat': an enemy ship other than the target came within threat range of the ship
+    - 'arrived': the ship is within the order's arrive_distance of its target
+
+    :ivar move_threshold: How far a target may move before orders after it are dropped
+    :ivar kept: Number of orders that survived a begin_turn(), over all turns
+    :ivar invalidated: Counter of dropped orders by reason, over all turns
+    """
+
+    def __init__(self, move_threshold=2 * constants.MAX_SPEED):
+        """
+        :param float move_threshold: How far a target may move before orders after it are dropped
+        """
+        self.move_threshold = move_threshold
+        self.kept = 0
+        self.invalidated = Counter()
+        self._orders = {}
+
+    def issue(self, ship, kind, target, turn, arrive_distance=constants.DOCK_RADIUS):
+        """
+        Give a ship a new order, replacing any it had.
+
+        :param entity.Ship ship: The ship
+        :param str kind: What the order is for
+        :param entity.Entity target: The planet or ship the order is after
+        :param int turn: The current turn
+        :param float arrive_distance: Distance from the target's surface at which the order counts as done
+        :return: The new order
+        :rtype: Order
+        """
+        order = self._orders[ship.id] = Order(kind, target, turn, arrive_distance)
+        return order
+
+    def share(self, ship, order):
+        """
+        Give a ship the same order as another, e.g. to the members of a squad.
+
+        :param entity.Ship ship: The ship
+        :param Order order: The order to share
+        :return: nothing
+        """
+        self._orders[ship.id] = order
+
+    def get(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: The ship's standing order, or None
+        :rtype: Order
+        """
+        return self._orders.get(ship_id)
+
+    def cancel(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: nothing
+        """
+        self._orders.pop(ship_id, None)
+
+    def clear(self):
+        """
+        Drop every order, e.g. when the strategy changes.
+
+        :return: nothing
+        """
+        self._orders.clear()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def begin_turn(self, game_map, threat_range=0):
+        """
+        Drop the orders this turn's map invalidates.
+
+        :param game_map.Map game_map: The current map
+        :param float threat_range: Distance within which an enemy ship is a threat (0 for no threat checks)
+        :return: The reason each dropped order was dropped, by ship id
+        :rtype: dict[int, str]
+        """
+        ships = {ship.id: ship for ship in game_map.ships()}
+        dropped = {}
+        for ship_id, order in self._orders.items():
+            reason = self._invalidated(game_map, ships, ships.get(ship_id), order)
+            if reason:
+                dropped[ship_id] = reason
+
+        if threat_range > 0:
+            dropped.update(self._threatened(game_map, ships, threat_range, dropped))
+
+        for ship_id, reason in dropped.items():
+            del self._orders[ship_id]
+            self.invalidated[reason] += 1
+        self.kept += len(self._orders)
+        return dropped
+
+    def _invalidated(self, game_map, ships, ship, order):
+        if ship is None or ship.docking_status != entity.Ship.DockingStatus.UNDOCKED:
+            return 'gone'
+        target = game_map.get_planet(order.target_id) if order.target_is_planet else ships.get(order.target_id)
+        if target is None:
+            return 'target lost'
+        if (target.x - order.x) ** 2 + (target.y - order.y) ** 2 > self.move_threshold ** 2:
+            return 'target moved'
+        if order.target_is_planet and (target.owner.id if target.owner is not None else None) != order.owner_id:
+            return 'owner changed'
+        if ship.calculate_distance_between(target) - target.radius <= order.arrive_distance:
+            return 'arrived'
+        return None
+
+    def _threatened(self, game_map, ships, threat_range, dropped):
+        """
+        :return: 'threat' for every remaining order whose ship has an enemy other than its target within range
+        :rtype: dict[int, str]
+        """
+        enemies = game_map.enemy_ships(docked=False)
+        ship_ids = [ship_id for ship_id in self._orders if ship_id not in dropped]
+        if not enemies or not ship_ids:
+            return {}
+        xs = np.array([ships[ship_id].x for ship_id in ship_ids])[:, None]
+        ys = np.array([ships[ship_id].y for ship_id in ship_ids])[:, None]
+        distances = np.hypot(xs - np.array([enemy.x for enemy in enemies]),
+                             ys - np.array([enemy.y for enemy in enemies]))
+        nearest = distances.argmin(axis=1)
+        threats = {}
+        for ship_id, index, distance in zip(ship_ids, nearest.tolist(), distances.min(axis=1).tolist()):
+            order = self._orders[ship_id]
+            if distance < threat_range and (order.target_is_planet or enemies[index].id != order.target_id):
+                threats[ship_id] = 'threat'
+        return threats
@@ -0,0 +1,203 @@
+from collections import Counter
+
+import numpy as np
+
+from . import constants, entity, geometry
+from .events import EventKind, of_kind
+
+
+class Path:
+    """
+    The waypoints a ship plans to fly through to reach a goal, over as many turns as that takes.
+
+    :ivar key: Names the goal the path was planned for, e.g. ('claim', planet.id)
+    :ivar waypoints: The (x, y) points still to pass through, the goal last
+    :ivar turn: Turn the path was last followed on
+    """
+
+    def __init__(self, key, waypoints, turn):
+        self.key = key
+        self.waypoints = waypoints
+        self.turn = turn
+
+    def __repr__(self):
+        return "Path({} {} waypoints)".format(self.key, len(self.waypoints))
+
+
+def _segments_hit(start_xs, start_ys, end_xs, end_ys, xs, ys, radii):
+    """
+    :return: Whether any segment passes within radii of any circle center
+    :rtype: bool
+    """
+    start_xs, start_ys = np.asarray(start_xs)[:, None], np.asarray(start_ys)[:, None]
+    dx = np.asarray(end_xs)[:, None] - start_xs
+    dy = np.asarray(end_ys)[:, None] - start_ys
+    length_2 = np.maximum(dx * dx + dy * dy, 1e-12)
+    t = np.clip(((xs - start_xs) * dx + (ys - start_ys) * dy) / length_2, 0.0, 1.0)
+    return bool(np.any(np.hypot(start_xs + t * dx - xs, start_ys + t * dy - ys) <= radii))
+
+
+class PathBook:
+    """
+    Every ship's planned multi-turn path. A path is planned once, by straightening the route a flow field would
+    take, and then followed turn after turn. begin_turn() checks the paths only against what the frame's events say
+    changed, so following a path costs O(1) per turn:
+
+    - 'gone': the ship was destroyed or has docked
+    - 'unused': the ship did not follow its path last turn
+    - 'blocked': a ship docked (a new stationary obstacle) in the way of the rest of the path
+    - 'strayed': the ship was pushed off its path, and a planet is now between it and its next waypoint
+
+    Moving ships are not planned around; navigation steers around them on the way to the next waypoint. Destroyed
+    planets only open up space, so they never invalidate a path.
+
+    :ivar clearance: How far from planets and docked ships the path's legs keep
+    :ivar planned: Number of paths planned, over all turns
+    :ivar kept: Number of paths that survived a begin_turn(), over all turns
+    :ivar invalidated: Counter of dropped paths by reason, over all turns
+    """
+
+    def __init__(self, clearance=constants.SHIP_RADIUS + 0.1):
+        """
+        :param float clearance: How far from planets and docked ships the path's legs keep
+        """
+        self.clearance = clearance
+        self.planned = 0
+        self.kept = 0
+        self.invalidated = Counter()
+        self._paths = {}
+        self._stationary_arrays = (np.empty(0), np.empty(0), np.empty(0))
+        self._turn = None
+
+    def __len__(self):
+        return len(self._paths)
+
+    def get(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: The ship's path, or None
+        :rtype: Path
+        """
+        return self._paths.get(ship_id)
+
+    def cancel(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: nothing
+        """
+        self._paths.pop(ship_id, None)
+
+    def clear(self):
+        """
+        :return: nothing
+        """
+        self._paths.clear()
+
+    def begin_turn(self, game_map, turn, events):
+        """
+        Drop the paths this turn's map invalidates.
+
+        :param game_map.Map game_map: The current map
+        :param int turn: The current turn
+        :param list[events.Event] events: What changed since the previous turn's map
+        :return: The reason each dropped path was dropped, by ship id
+        :rtype: dict[int, str]
+        """
+        previous_turn, self._turn = self._turn, turn
+        undocked = entity.Ship.DockingStatus.UNDOCKED
+        ships = {ship.id: ship for ship in game_map.ships()}
+        stationary = [ship for ship in ships.values() if ship.docking_status != undocked]
+        self._stationary_arrays = (np.array([ship.x for ship in stationary]),
+                                   np.array([ship.y for ship in stationary]),
+                                   np.array([ship.radius for ship in stationary]) + self.clearance)
+        added = [ships[event.entity_id] for event in of_kind(events, EventKind.DOCKING_STARTED)]
+        added_arrays = (np.array([ship.x for ship in added]), np.array([ship.y for ship in added]),
+                        np.array([ship.radius for ship in added]) + self.clearance)
+
+        dropped = {}
+        for ship_id, path in self._paths.items():
+            ship = ships.get(ship_id)
+            if ship is None or ship.docking_status != undocked:
+                dropped[ship_id] = 'gone'
+            elif path.turn != previous_turn:
+                dropped[ship_id] = 'unused'
+            elif added and self._legs_hit(ship.x, ship.y, path.waypoints, added_arrays):
+                dropped[ship_id] = 'blocked'
+            elif game_map.path_blocked(ship, *path.waypoints[0], ignore=entity.Ship):
+                dropped[ship_id] = 'strayed'
+
+        for ship_id, reason in dropped.items():
+            del self._paths[ship_id]
+            self.invalidated[reason] += 1
+        self.kept += len(self._paths)
+        return dropped
+
+    def _legs_hit(self, x, y, waypoints, arrays):
+        points = [(x, y)] + waypoints
+        starts = np.array(points[:-1])
+        ends = np.array(points[1:])
+        return _segments_hit(starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1], *arrays)
+
+    def _leg_clear(self, game_map, start_x, start_y, end_x, end_y):
+        if not game_map.distance_field().segment_clear(start_x, start_y, end_x, end_y, self.clearance):
+            _, xs, ys, radii = game_map.obstacle_arrays(entity.Ship)
+            if geometry.first_segment_circle(start_x, start_y, end_x, end_y, xs, ys, radii, self.clearance) >= 0:
+                return False
+        xs, ys, radii = self._stationary_arrays
+        return not (len(xs) and _segments_hit([start_x], [start_y], [end_x], [end_y], xs, ys, radii))
+
+    def waypoint(self, ship, key, goal):
+        """
+        The point the ship should head for next on its path to goal, skipping waypoints it has come within a
+        thrust of. The path's last leg is moved to end at goal, which may drift as the ship closes in.
+
+        :param entity.Ship ship: The ship
+        :param key: Names the goal, e.g. ('claim', planet.id)
+        :param entity.Entity goal: Where the path ends
+        :return: The next waypoint, or None if the ship has no valid path to this goal
+        :rtype: entity.Position
+        """
+        path = self._paths.get(ship.id)
+        if path is None or path.key != key:
+            return None
+        waypoints = path.waypoints
+        waypoints[-1] = (goal.x, goal.y)
+        while len(waypoints) > 1 and \
+                (waypoints[0][0] - ship.x) ** 2 + (waypoints[0][1] - ship.y) ** 2 <= constants.MAX_SPEED ** 2:
+            waypoints.pop(0)
+        path.turn = self._turn
+        return entity.Position(*waypoints[0])
+
+    def plan(self, ship, key, goal, field, game_map):
+        """
+        Plan (or re-plan) the ship's path to goal: take the cells the flow field leads through and keep only those
+        that a straight leg from the previous waypoint can not skip.
+
+        :param entity.Ship ship: The ship
+        :param key: Names the goal, e.g. ('claim', planet.id)
+        :param entity.Entity goal: Where the path ends
+        :param flow_field.FlowField field: A flow field toward the goal, or toward a circle around it
+        :param game_map.Map game_map: The current map
+        :return: The first waypoint, or None if the field can not reach the goal from the ship
+        :rtype: entity.Position
+        """
+        route = field.route(ship.x, ship.y)
+        if route is None:
+            self._paths.pop(ship.id, None)
+            return None
+        route.append((goal.x, goal.y))
+        waypoints = []
+        anchor_x, anchor_y = ship.x, ship.y
+        start = 0
+        while start < len(route):
+            end = len(route) - 1
+            if not self._leg_clear(game_map, anchor_x, anchor_y, *route[end]):
+                end = start
+                while end + 1 < len(route) and self._leg_clear(game_map, anchor_x, anchor_y, *route[end + 1]):
+                    end += 1
+            anchor_x, anchor_y = route[end]
+            waypoints.append(route[end])
+            start = end + 1
+        self.planned += 1
+        self._paths[ship.id] = Path(key, waypoints, self._turn)
+        return self.waypoint(ship, key, goal)
@@ -0,0 +1,80 @@
+import time
+from collections import namedtuple
+
+from .budget import Budget
+
+#: How one stage went in one turn: seconds allotted, seconds taken
+StageReport = namedtuple('StageReport', 'name allotted elapsed')
+
+
+class TurnPipeline:
+    """
+    A turn as a fixed sequence of stages (e.g. parse, index, assess, assign, navigate, emit), each with its own time
+    budget and timer. A stage's budget is what was registered for it, shrunk when earlier stages overran: whatever
+    is left of the turn is split between the remaining stages in proportion to what they registered. Stages that
+    finish early do not hand their slack on, so every stage keeps to what it registered.
+
+    :ivar turn_seconds: Time allowed for the whole turn
+    :ivar report: The StageReports of the last turn run, in stage order
+    :ivar overruns: Number of stages that took longer than they were allotted, over all turns
+    """
+
+    def __init__(self, turn_seconds):
+        """
+        :param float turn_seconds: Time allowed for the whole turn
+        """
+        self.turn_seconds = turn_seconds
+        self.report = []
+        self.overruns = 0
+        self._stages = []
+
+    def add_stage(self, name, function, seconds):
+        """
+        Register the next stage of the turn.
+
+        :param str name: Stage name, used in reports
+        :param function: Called as function(state, budget) with the state passed to run() and a budget.Budget
+        :param float seconds: Time the stage may take when every stage before it kept to its budget
+        :return: nothing
+        """
+        self._stages.append((name, function, seconds))
+
+    def run(self, state, start=None):
+        """
+        Run every stage once, in order.
+
+        :param state: Passed to every stage; stages hand their results on through it
+        :param float start: When the turn's clock started, on the time.perf_counter() clock, e.g. when its frame
+                            arrived; None for now
+        :return: The StageReports of this turn
+        :rtype: list[StageReport]
+        """
+        start = time.perf_counter() if start is None else start
+        self.report = []
+        for index, (name, function, seconds) in enumerate(self._stages):
+            stage_start = time.perf_counter()
+            registered = sum(stage[2] for stage in self._stages[index:])
+            left = max(self.turn_seconds - (stage_start - start), 0.0)
+            allotted = seconds * min(left / registered, 1.0) if registered > 0 else 0.0
+            function(state, Budget(deadline=stage_start + allotted))
+            elapsed = time.perf_counter() - stage_start
+            if elapsed > allotted:
+                self.overruns += 1
+            self.report.append(StageReport(name, allotted, elapsed))
+        return self.report
+
+    def elapsed(self):
+        """
+        :return: Seconds taken by the stages of the last turn run
+        :rtype: float
+        """
+        return sum(stage.elapsed for stage in self.report)
+
+    def format_report(self):
+        """
+        :return: The last turn's stages as "name elapsed/allotted ms" (with a '!' for overruns), for logging
+        :rtype: str
+        """
+        return " ".join("{} {:.1f}/{:.1f}{}".format(stage.name, stage.elapsed * 1e3, stage.allotted * 1e3,
+                                                    "!" if stage.elapsed > stage.allotted else "")
+                        for stage in self.report)
@@ -0,0 +1,138 @@
+import math
+
+import numpy as np
+
+from . import constants
+from .entity import Position
+
+
+def extrapolate(ship_columns, turns, width=None, height=None):
+    """
+    Extrapolate every ship along its current velocity for 1..turns turns.
+
+    :param columns.ShipColumns ship_columns: The ships to extrapolate
+    :param int turns: How many turns ahead to predict
+    :param float width: If given (with height), clip predictions to the map
+    :param float height: If given (with width), clip predictions to the map
+    :return: Predicted x and y coordinates, each of shape (ships, turns); column k is turn k + 1
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    steps = np.arange(1, turns + 1, dtype=np.float64)
+    xs = ship_columns.x[:, None] + ship_columns.vel_x[:, None] * steps
+    ys = ship_columns.y[:, None] + ship_columns.vel_y[:, None] * steps
+    if width is not None and height is not None:
+        np.clip(xs, 0, width, out=xs)
+        np.clip(ys, 0, height, out=ys)
+    return xs, ys
+
+
+def intercept_times(chaser_x, chaser_y, speed, target_x, target_y, target_vel_x, target_vel_y):
+    """
+    Earliest time (in turns) at which a chaser moving at the given speed can reach a target moving at constant
+    velocity. All arguments broadcast against each other.
+
+    :return: Intercept times; inf where the target can not be caught
+    :rtype: numpy.ndarray
+    """
+    dx = np.asarray(target_x, dtype=np.float64) - chaser_x
+    dy = np.asarray(target_y, dtype=np.float64) - chaser_y
+    vx = np.asarray(target_vel_x, dtype=np.float64)
+    vy = np.asarray(target_vel_y, dtype=np.float64)
+    dx, dy, vx, vy, speed = np.broadcast_arrays(dx, dy, vx, vy, np.asarray(speed, dtype=np.float64))
+
+    # |d + v t| = speed * t  =>  a t^2 + b t + c = 0
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy
+
+    times = np.full(a.shape, np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        linear = np.abs(a) < 1e-9
+        t_linear = np.where(b < 0, -c / b, np.inf)
+        times = np.where(linear, t_linear, times)
+
+        disc = b * b - 4 * a * c
+        root = np.sqrt(np.maximum(disc, 0))
+        t1 = (-b - root) / (2 * a)
+        t2 = (-b + root) / (2 * a)
+        t1 = np.where(t1 >= 0, t1, np.inf)
+        t2 = np.where(t2 >= 0, t2, np.inf)
+        t_quadratic = np.where(disc >= 0, np.minimum(t1, t2), np.inf)
+        times = np.where(linear, times, t_quadratic)
+
+    return np.where(c == 0, 0.0, times)
+
+
+def intercept_point(chaser, target, speed=constants.MAX_SPEED, max_turns=None):
+    """
+    Find where a chaser moving at the given speed can meet the target, assuming the target keeps its velocity.
+
+    :param entity.Entity chaser: The chasing entity
+    :param entity.Ship target: The target ship (needs vel_x, vel_y attributes)
+    :param float speed: The chaser's speed
+    :param float max_turns: If given, intercepts later than this are treated as unreachable
+    :return: The intercept position, or None if the target can not be caught
+    :rtype: entity.Position
+    """
+    t = float(intercept_times(chaser.x, chaser.y, speed,
+                              target.x, target.y, target.vel_x, target.vel_y))
+    if math.isinf(t) or (max_turns is not None and t > max_turns):
+        return None
+    return Position(target.x + target.vel_x * t, target.y + target.vel_y * t)
+
+
+def lead_target(ship, target, min_distance=3, speed=constants.MAX_SPEED, max_turns=1):
+    """
+    A lead-corrected closest_point_to: the point min_distance outside the target, measured from where the target
+    will be when this ship can reach it (but no more than max_turns ahead). Targets without velocity give exactly
+    ship.closest_point_to(target, min_distance).
+
+    :param entity.Ship ship: The chasing ship
+    :param entity.Entity target: The target; velocity is read from vel_x/vel_y if present
+    :param float min_distance: Minimum distance from the target's outer radius
+    :param float speed: The chasing ship's speed
+    :param float max_turns: The furthest ahead to lead the target, in turns
+    :return: The point to navigate to
+    :rtype: entity.Position
+    """
+    vel_x = getattr(target, 'vel_x', 0)
+    vel_y = getattr(target, 'vel_y', 0)
+    if not (vel_x or vel_y):
+        return ship.closest_point_to(target, min_distance)
+
+    t = float(intercept_times(ship.x, ship.y, speed, target.x, target.y, vel_x, vel_y))
+    t = min(t, max_turns)
+    future_x = target.x + vel_x * t
+    future_y = target.y + vel_y * t
+
+    angle = math.atan2(ship.y - future_y, ship.x - future_x)
+    radius = target.radius + min_distance
+    return Position(future_x + radius * math.cos(angle), future_y + radius * math.sin(angle))
+
+
+def lead_targets(ship_columns, chaser_rows, target_rows, min_distance=3, speed=constants.MAX_SPEED, max_turns=1):
+    """
+    Vectorized lead_target for many chaser/target pairs taken from the same column view.
+
+    :param columns.ShipColumns ship_columns: The ships
+    :param numpy.ndarray chaser_rows: Rows of the chasing ships
+    :param numpy.ndarray target_rows: Rows of the respective targets
+    :param float min_distance: Minimum distance from the target's outer radius
+    :param float speed: The chasing ships' speed
+    :param float max_turns: The furthest ahead to lead the targets, in turns
+    :return: x and y coordinates of the points to navigate to
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    cx = ship_columns.x[chaser_rows]
+    cy = ship_columns.y[chaser_rows]
+    tx = ship_columns.x[target_rows]
+    ty = ship_columns.y[target_rows]
+    tvx = ship_columns.vel_x[target_rows]
+    tvy = ship_columns.vel_y[target_rows]
+
+    t = np.minimum(intercept_times(cx, cy, speed, tx, ty, tvx, tvy), max_turns)
+    future_x = tx + tvx * t
+    future_y = ty + tvy * t
+    angle = np.arctan2(cy - future_y, cx - future_x)
+    radius = constants.SHIP_RADIUS + min_distance
+    return future_x + radius * np.cos(angle), future_y + radius * np.sin(angle)
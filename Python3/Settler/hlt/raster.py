@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+
+class Grid:
+    """
+    A uniform raster laid over the map. Cell (row, col) covers x in [col * cell_size, (col + 1) * cell_size) and
+    y in [row * cell_size, (row + 1) * cell_size).
+
+    :ivar width: Map width
+    :ivar height: Map height
+    :ivar cell_size: Length of a cell side, in map units
+    :ivar rows: Number of cell rows (along y)
+    :ivar cols: Number of cell columns (along x)
+    """
+
+    def __init__(self, width, height, cell_size):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param float cell_size: Length of a cell side, in map units
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.cols = max(1, int(math.ceil(width / cell_size)))
+        self.rows = max(1, int(math.ceil(height / cell_size)))
+
+    @property
+    def shape(self):
+        """
+        :return: The (rows, cols) shape of arrays over this grid
+        :rtype: (int, int)
+        """
+        return self.rows, self.cols
+
+    @property
+    def size(self):
+        """
+        :return: The number of cells
+        :rtype: int
+        """
+        return self.rows * self.cols
+
+    def cell_of(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: The (row, col) of the cell containing the point, clamped to the grid
+        :rtype: (int, int)
+        """
+        row = min(max(int(y / self.cell_size), 0), self.rows - 1)
+        col = min(max(int(x / self.cell_size), 0), self.cols - 1)
+        return row, col
+
+    def cells_of(self, xs, ys):
+        """
+        Vectorized cell_of.
+
+        :param numpy.ndarray xs: Map x-coordinates
+        :param numpy.ndarray ys: Map y-coordinates
+        :return: Row and column indices, clamped to the grid
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        rows = np.clip((np.asarray(ys) / self.cell_size).astype(np.int64), 0, self.rows - 1)
+        cols = np.clip((np.asarray(xs) / self.cell_size).astype(np.int64), 0, self.cols - 1)
+        return rows, cols
+
+    def center_of(self, row, col):
+        """
+        :param int row: Cell row
+        :param int col: Cell column
+        :return: The map coordinates of the cell center
+        :rtype: (float, float)
+        """
+        return (col + 0.5) * self.cell_size, (row + 0.5) * self.cell_size
+
+    def centers(self):
+        """
+        :return: x and y coordinates of every cell center, each of shape (rows, cols)
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        xs = (np.arange(self.cols, dtype=np.float64) + 0.5) * self.cell_size
+        ys = (np.arange(self.rows, dtype=np.float64) + 0.5) * self.cell_size
+        return np.meshgrid(xs, ys)
+
+    def circle_mask(self, x, y, radius):
+        """
+        :param float x: Circle center x-coordinate
+        :param float y: Circle center y-coordinate
+        :param float radius: Circle radius
+        :return: Boolean mask of the cells whose centers lie within the circle
+        :rtype: numpy.ndarray
+        """
+        mask = np.zeros(self.shape, dtype=bool)
+        rows, cols, window = self.circle_window(x, y, radius)
+        mask[rows, cols] = window
+        return mask
+
+    def circle_window(self, x, y, radius):
+        """
+        The bounding window of a circle and the cells in it whose centers lie within the circle. Cheaper than
+        circle_mask when only the covered cells are needed.
+
+        :param float x: Circle center x-coordinate
+        :param float y: Circle center y-coordinate
+        :param float radius: Circle radius
+        :return: Row slice, column slice and boolean mask over that window
+        :rtype: (slice, slice, numpy.ndarray)
+        """
+        row_lo = max(int((y - radius) / self.cell_size), 0)
+        row_hi = min(int((y + radius) / self.cell_size) + 1, self.rows)
+        col_lo = max(int((x - radius) / self.cell_size), 0)
+        col_hi = min(int((x + radius) / self.cell_size) + 1, self.cols)
+        xs = (np.arange(col_lo, col_hi, dtype=np.float64) + 0.5) * self.cell_size - x
+        ys = (np.arange(row_lo, row_hi, dtype=np.float64) + 0.5) * self.cell_size - y
+        window = (xs[None, :] ** 2 + ys[:, None] ** 2) <= radius * radius
+        return slice(row_lo, row_hi), slice(col_lo, col_hi), window
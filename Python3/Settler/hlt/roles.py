@@ -0,0 +1,139 @@
+import numpy as np
+
+from .events import EventKind
+
+
+class RoleTable:
+    """
+    A stable role bucket for each ship, from 0 to buckets - 1, given once, the first time the ship is looked up.
+    A role is a named percentage: a ship takes the role when its bucket is below it. Buckets are handed out so that
+    the ships between each two percentages match the share of buckets between them; when the percentages change,
+    rebalance moves as few ships as it takes to match the new shares, and every other ship keeps its bucket.
+
+    :ivar buckets: Number of buckets
+    :ivar percents: The percentage of each role, by name
+    :ivar histogram: Number of ships in each bucket
+    """
+
+    def __init__(self, buckets=100):
+        """
+        :param int buckets: Number of buckets
+        """
+        self.buckets = buckets
+        self.percents = {}
+        self.histogram = np.zeros(buckets, dtype=np.int64)
+        self._buckets = {}
+        self._edges = np.array([0, buckets])
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _bands(self):
+        """
+        :return: The ships in each band between two edges, and each band's share of the buckets
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        edges = self._edges
+        return np.add.reduceat(self.histogram, edges[:-1]), np.diff(edges) / self.buckets
+
+    def _place(self, ship_id, band):
+        """
+        Put a ship in the least used bucket of a band, so that a band split by later percentages splits evenly.
+        """
+        low, high = self._edges[band], self._edges[band + 1]
+        bucket = int(low + self.histogram[low:high].argmin())
+        self._buckets[ship_id] = bucket
+        self.histogram[bucket] += 1
+        return bucket
+
+    def bucket(self, ship_id):
+        """
+        :param int ship_id: The ship's id
+        :return: The ship's bucket; a ship seen for the first time goes to the band furthest below its share
+        :rtype: int
+        """
+        bucket = self._buckets.get(ship_id)
+        if bucket is None:
+            counts, shares = self._bands()
+            bucket = self._place(ship_id, int((shares * (counts.sum() + 1) - counts).argmax()))
+        return bucket
+
+    def allows(self, ship_id, role):
+        """
+        :param int ship_id: The ship's id
+        :param str role: The role's name
+        :return: Whether the ship takes the role
+        :rtype: bool
+        """
+        return self.bucket(ship_id) < self.percents[role]
+
+    def mask(self, ship_ids, role):
+        """
+        :param ship_ids: The ships' ids
+        :param str role: The role's name
+        :return: Boolean mask of the ships that take the role
+        :rtype: numpy.ndarray
+        """
+        return np.array([self.bucket(ship_id) for ship_id in ship_ids], dtype=np.int64) < self.percents[role]
+
+    def counts(self):
+        """
+        :return: Number of ships that take each role, by name
+        :rtype: dict[str, int]
+        """
+        below = np.concatenate([[0], np.cumsum(self.histogram)])
+        return {role: int(below[min(max(percent, 0), self.buckets)]) for role, percent in self.percents.items()}
+
+    def forget(self, ship_id):
+        """
+        :param int ship_id: The id of a ship that is gone
+        :return: nothing
+        """
+        bucket = self._buckets.pop(ship_id, None)
+        if bucket is not None:
+            self.histogram[bucket] -= 1
+
+    def begin_turn(self, events):
+        """
+        Forget the ships destroyed, or docked, since the last turn: the buckets are shared out among the ships that
+        can still act. A ship that undocks later is given a new bucket.
+
+        :param list[events.Event] events: What changed since the last turn
+        :return: nothing
+        """
+        for event in events:
+            if event.kind in (EventKind.SHIP_DESTROYED, EventKind.DOCKING_STARTED):
+                self.forget(event.entity_id)
+
+    def rebalance(self, percents):
+        """
+        Take on new role percentages, and move ships from the bands now over their share to the bands under it.
+
+        :param dict[str, int] percents: The percentage of each role, by name
+        :return: The ids of the ships given a new bucket
+        :rtype: list[int]
+        """
+        self.percents = dict(percents)
+        self._edges = np.unique(np.clip(list(percents.values()) + [0, self.buckets], 0, self.buckets))
+        counts, shares = self._bands()
+        # the share of each band, rounded by largest remainder so that the targets add up to the ships there are
+        exact = shares * counts.sum()
+        targets = np.floor(exact).astype(np.int64)
+        targets[np.argsort(targets - exact, kind='stable')[:counts.sum() - targets.sum()]] += 1
+        surplus = counts - targets
+        if not surplus.any():
+            return []
+
+        bands = np.searchsorted(self._edges, np.arange(self.buckets), side='right') - 1
+        leaving = []
+        for ship_id in sorted(self._buckets, reverse=True):
+            band = bands[self._buckets[ship_id]]
+            if surplus[band] > 0:
+                surplus[band] -= 1
+                leaving.append(ship_id)
+        for ship_id in leaving:
+            self.forget(ship_id)
+        short = np.repeat(np.arange(len(targets)), np.maximum(-surplus, 0))
+        for ship_id, band in zip(leaving, short.tolist()):
+            self._place(ship_id, band)
+        return leaving
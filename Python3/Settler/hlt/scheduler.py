@@ -0,0 +1,75 @@
+import heapq
+import time
+from collections import namedtuple
+
+#: One unit of schedulable work: run(budget) does it properly, fallback() cheaply (either may return None)
+Task = namedtuple('Task', 'key priority cost run fallback')
+
+
+class DeadlineScheduler:
+    """
+    Runs tasks most urgent first within a time budget. Every task carries a cost estimate in work units (e.g.
+    obstacle tests); the scheduler learns how many seconds a unit takes as tasks run, and only starts a task that
+    the time left is expected to cover. Every task it does not get to, or can not afford, gets its fallback instead,
+    so fallbacks must be cheap.
+
+    :ivar seconds_per_unit: Current estimate of the time one unit of cost takes
+    :ivar ran: Number of tasks run in full, over all calls to run()
+    :ivar fell_back: Number of tasks that got their fallback, over all calls to run()
+    """
+
+    def __init__(self, seconds_per_unit=1e-5, smoothing=0.2):
+        """
+        :param float seconds_per_unit: Initial estimate of the time one unit of cost takes
+        :param float smoothing: Weight of the latest measurement in the running estimate
+        """
+        self.seconds_per_unit = seconds_per_unit
+        self.smoothing = smoothing
+        self.ran = 0
+        self.fell_back = 0
+        self._tasks = []
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add(self, key, priority, cost, run, fallback=None):
+        """
+        Queue a task for the next run().
+
+        :param key: Identifies the task in the results, e.g. a ship id
+        :param float priority: Higher runs first
+        :param float cost: Estimated work units; among equal priorities cheaper tasks run first
+        :param run: Called as run(budget) with a budget.Budget share of the time left
+        :param fallback: Called with no arguments when run is not; None for no fallback
+        :return: nothing
+        """
+        heapq.heappush(self._tasks, (-priority, cost, len(self._tasks), Task(key, priority, cost, run, fallback)))
+
+    def run(self, budget):
+        """
+        Run or fall back on every queued task, and empty the queue.
+
+        :param budget.Budget budget: The time all tasks together may take
+        :return: (key, result, ran) for every task, in the order they were dealt with
+        :rtype: list[(object, object, bool)]
+        """
+        results = []
+        tasks = self._tasks
+        self._tasks = []
+        while tasks:
+            task = heapq.heappop(tasks)[3]
+            remaining = budget.remaining_time()
+            if remaining is None or (remaining > 0 and task.cost * self.seconds_per_unit <= remaining):
+                start = time.perf_counter()
+                result = task.run(budget.share(len(tasks) + 1))
+                self._learn(time.perf_counter() - start, task.cost)
+                self.ran += 1
+                results.append((task.key, result, True))
+            else:
+                self.fell_back += 1
+                results.append((task.key, task.fallback() if task.fallback else None, False))
+        return results
+
+    def _learn(self, seconds, cost):
+        if cost > 0:
+            self.seconds_per_unit += self.smoothing * (seconds / cost - self.seconds_per_unit)
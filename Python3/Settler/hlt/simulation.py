@@ -0,0 +1,413 @@
+import copy
+from collections import namedtuple
+
+import numpy as np
+
+from . import combat, constants, entity
+
+UNDOCKED = entity.Ship.DockingStatus.UNDOCKED.value
+DOCKING = entity.Ship.DockingStatus.DOCKING.value
+DOCKED = entity.Ship.DockingStatus.DOCKED.value
+
+#: One turn of commands for every ship of a frame: thrust, and whether to dock to the planet in range
+Commands = namedtuple('Commands', 'thrust_x thrust_y dock')
+
+#: scores[i] is what evaluating candidate i gave (None if the budget ran out before it was played), best its index
+Rollout = namedtuple('Rollout', 'best scores')
+
+#: How far nearest_enemies looks around each ship before comparing it with every enemy
+NEAR_ENEMY = combat.FIRING_RANGE + 2 * constants.MAX_SPEED
+
+_SHIP_COLUMNS = ('id', 'owner', 'x', 'y', 'health', 'status', 'planet', 'progress', 'cooldown')
+
+
+class Frame:
+    """
+    The game state as arrays, for playing turns forward. Frames are never modified: step() returns a new frame
+    that shares every array it did not change with the old one, so any number of rollouts can start from the same
+    frame without copying it. Destroyed ships keep their row (with health 0), and spawned ships are appended, so
+    the row of a ship stays the same from one frame to the next.
+
+    :ivar turn: Turns played since the frame was taken from the map
+    :ivar width: Map width
+    :ivar height: Map height
+    :ivar id: Ship ids (-1 for ships spawned in the simulation)
+    :ivar owner: Owning player ids
+    :ivar x: Ship x-coordinates
+    :ivar y: Ship y-coordinates
+    :ivar health: Ship health; 0 once destroyed
+    :ivar status: Docking status values (see entity.Ship.DockingStatus)
+    :ivar planet: Row (in the planet columns) of the planet the ship is docked to, -1 if none
+    :ivar progress: Turns of docking left
+    :ivar cooldown: Turns until the weapon can fire again
+    :ivar planet_id: Planet ids
+    :ivar planet_x: Planet x-coordinates
+    :ivar planet_y: Planet y-coordinates
+    :ivar planet_radius: Planet radii
+    :ivar planet_owner: Owning player ids, -1 if unowned
+    :ivar planet_health: Planet health; 0 once destroyed
+    :ivar planet_spots: Number of docking spots
+    :ivar planet_production: Production towards the next ship
+    :ivar planet_remaining: Resources left to produce from
+    """
+
+    def __init__(self, width, height, ships, planets, turn=0):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param dict ships: The ship columns, by name
+        :param dict planets: The planet columns, by name (without the planet_ prefix)
+        :param int turn: Turns played so far
+        """
+        self.turn = turn
+        self.width = width
+        self.height = height
+        for name in _SHIP_COLUMNS:
+            setattr(self, name, ships[name])
+        for name, values in planets.items():
+            setattr(self, 'planet_' + name, values)
+
+    @classmethod
+    def from_map(cls, game_map, rows=None):
+        """
+        :param game_map.Map game_map: The map
+        :param rows: Rows of game_map.ship_columns() to take; None for all ships
+        :return: A frame of the map's ships (or some of them) and all its planets
+        :rtype: Frame
+        """
+        columns = game_map.ship_columns()
+        if rows is None:
+            rows = slice(None)
+        planets = game_map.all_planets()
+        planet_ids = np.fromiter((p.id for p in planets), dtype=np.int64, count=len(planets))
+        planet_rows = np.full(max(planet_ids.max() + 2, 1) if len(planets) else 1, -1, dtype=np.int64)
+        planet_rows[planet_ids] = np.arange(len(planets))
+        ships = dict(id=columns.id[rows], owner=columns.owner[rows], x=columns.x[rows], y=columns.y[rows],
+                     health=columns.health[rows].astype(np.float64), status=columns.docking_status[rows],
+                     planet=planet_rows[columns.planet[rows]], progress=columns.docking_progress[rows],
+                     cooldown=columns.weapon_cooldown[rows])
+
+        def planet_column(read, dtype):
+            return np.fromiter((read(p) for p in planets), dtype=dtype, count=len(planets))
+
+        planets = dict(id=planet_ids,
+                       x=planet_column(lambda p: p.x, np.float64),
+                       y=planet_column(lambda p: p.y, np.float64),
+                       radius=planet_column(lambda p: p.radius, np.float64),
+                       owner=planet_column(lambda p: p.owner.id if p.owner is not None else -1, np.int64),
+                       health=planet_column(lambda p: p.health, np.float64),
+                       spots=planet_column(lambda p: p.num_docking_spots, np.int64),
+                       production=planet_column(lambda p: p.current_production, np.int64),
+                       remaining=planet_column(lambda p: p.remaining_resources, np.int64))
+        return cls(game_map.width, game_map.height, ships, planets)
+
+    def __len__(self):
+        return len(self.x)
+
+    def replace(self, **columns):
+        """
+        :return: A new frame with the given columns replaced and every other column shared with this one
+        :rtype: Frame
+        """
+        frame = copy.copy(self)
+        frame.__dict__.update(columns)
+        return frame
+
+    def alive(self):
+        """
+        :return: Boolean mask of the ships still in the game
+        :rtype: numpy.ndarray
+        """
+        return self.health > 0
+
+
+def hold(frame):
+    """
+    :return: Commands for every ship to stay where it is
+    :rtype: Commands
+    """
+    return Commands(np.zeros(len(frame)), np.zeros(len(frame)), np.zeros(len(frame), dtype=bool))
+
+
+def toward(frame, xs, ys, stop=0.0):
+    """
+    :param Frame frame: The frame
+    :param xs: The x-coordinate each ship heads for
+    :param ys: The y-coordinate each ship heads for
+    :param float stop: How far short of the point each ship stops
+    :return: The thrust of each ship, capped at MAX_SPEED
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    dx = xs - frame.x
+    dy = ys - frame.y
+    distance = np.maximum(np.hypot(dx, dy), 1e-9)
+    speed = np.clip(distance - stop, 0, constants.MAX_SPEED)
+    return dx / distance * speed, dy / distance * speed
+
+
+def nearest_enemies(frame):
+    """
+    Buckets the live ships into a grid of cells NEAR_ENEMY wide and looks for each ship's nearest enemy in its own
+    and the 8 surrounding cells, which is exact for any enemy up to NEAR_ENEMY away. Only the ships with no enemy that
+    close are compared with every enemy, so the cost follows the number of ships rather than all pairs.
+
+    :return: The row of the nearest live enemy of each live ship, -1 if it has none or is destroyed
+    :rtype: numpy.ndarray
+    """
+    nearest = np.full(len(frame), -1, dtype=np.int64)
+    rows = np.flatnonzero(frame.alive())
+    owner = frame.owner[rows]
+    if not len(rows) or owner.min() == owner.max():
+        return nearest
+    x = frame.x[rows]
+    y = frame.y[rows]
+
+    # cells are numbered row by row with a border of empty cells, so the 3x3 cells around a ship never wrap
+    col = (x // NEAR_ENEMY).astype(np.int64) + 1
+    cells = int(col.max()) + 2
+    cell = ((y // NEAR_ENEMY).astype(np.int64) + 1) * cells + col
+    order = np.argsort(cell, kind='stable')
+    in_cell = np.bincount(cell, minlength=int(cell.max()) + cells + 2)
+    cell_start = np.cumsum(in_cell) - in_cell
+
+    # the rows in the 3x3 cells around each ship, ship by ship
+    around = (cell[:, None] + (np.arange(-1, 2)[:, None] * cells + np.arange(-1, 2)).ravel()).ravel()
+    counts = in_cell[around]
+    ends = np.cumsum(counts)
+    j = order[np.repeat(cell_start[around] - ends + counts, counts) + np.arange(ends[-1])]
+    i = np.repeat(np.arange(len(rows)), counts.reshape(-1, 9).sum(axis=1))
+
+    distance = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2
+    distance[owner[i] == owner[j]] = np.inf
+    best = np.minimum.reduceat(distance, ends[8::9] - counts.reshape(-1, 9).sum(axis=1))
+    found = best <= NEAR_ENEMY ** 2
+    closest = np.flatnonzero(found[i] & (distance == best[i]))
+    closest = closest[np.flatnonzero(np.diff(i[closest], prepend=-1))]
+    nearest[rows[i[closest]]] = rows[j[closest]]
+
+    pending = np.flatnonzero(~found)
+    if len(pending):
+        distances = (x[pending, None] - x) ** 2 + (y[pending, None] - y) ** 2
+        distances[owner[pending, None] == owner] = np.inf
+        nearest[rows[pending]] = rows[distances.argmin(axis=1)]
+    return nearest
+
+
+def charge(frame):
+    """
+    :return: Commands for every ship to close in on its nearest enemy, stopping just inside firing range
+    :rtype: Commands
+    """
+    nearest = nearest_enemies(frame)
+    thrust_x, thrust_y = toward(frame, frame.x[nearest], frame.y[nearest], combat.FIRING_RANGE - 1)
+    found = nearest >= 0
+    return Commands(np.where(found, thrust_x, 0), np.where(found, thrust_y, 0), np.zeros(len(frame), dtype=bool))
+
+
+def joint(policies, default=hold):
+    """
+    :param dict policies: A policy (frame -> Commands) for each player that does not follow the default
+    :param default: The policy of every other player
+    :return: The policy that gives each player's ships the commands of that player's policy
+    :rtype: function
+    """
+    def policy(frame):
+        commands = default(frame)
+        thrust_x, thrust_y, dock = commands
+        for player, own in policies.items():
+            mine = frame.owner == player
+            commands = own(frame)
+            thrust_x = np.where(mine, commands.thrust_x, thrust_x)
+            thrust_y = np.where(mine, commands.thrust_y, thrust_y)
+            dock = np.where(mine, commands.dock, dock)
+        return Commands(thrust_x, thrust_y, dock)
+    return policy
+
+
+def _dock(frame, commands, alive):
+    """
+    Start docking the ships told to that are in range of a planet they may dock to, as far as the free spots go.
+    Ships of different players docking to the same unowned planet in the same turn all fail, as in the game.
+
+    :return: The new status, planet and progress columns
+    :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    status, planet, progress = frame.status, frame.planet, frame.progress
+    asking = np.flatnonzero(commands.dock & alive & (status == UNDOCKED))
+    planets = len(frame.planet_x)
+    if len(asking) == 0 or planets == 0:
+        return status, planet, progress
+    surface = np.hypot(frame.x[asking, None] - frame.planet_x, frame.y[asking, None] - frame.planet_y) \
+        - frame.planet_radius
+    target = surface.argmin(axis=1)
+    owner = frame.owner[asking]
+    planet_owner = frame.planet_owner[target]
+    allowed = (surface[np.arange(len(asking)), target] <= constants.DOCK_RADIUS + constants.SHIP_RADIUS) \
+        & (frame.planet_health[target] > 0) & ((planet_owner == -1) | (planet_owner == owner))
+    asking, target, owner = asking[allowed], target[allowed], owner[allowed]
+
+    lowest = np.full(planets, np.iinfo(np.int64).max)
+    highest = np.full(planets, -1)
+    np.minimum.at(lowest, target, owner)
+    np.maximum.at(highest, target, owner)
+    occupied = np.bincount(planet[alive & (status != UNDOCKED) & (planet >= 0)], minlength=planets)
+    order = np.argsort(target, kind='stable')
+    asking, target = asking[order], target[order]
+    rank = np.arange(len(target)) - np.searchsorted(target, target)
+    granted = (rank < frame.planet_spots[target] - occupied[target]) & (lowest[target] == highest[target])
+    asking, target = asking[granted], target[granted]
+
+    status, planet, progress = status.copy(), planet.copy(), progress.copy()
+    status[asking] = DOCKING
+    planet[asking] = target
+    progress[asking] = constants.DOCK_TURNS
+    return status, planet, progress
+
+
+def step(frame, commands):
+    """
+    Play one turn: docking orders, then movement, then combat, then docking progress and production.
+
+    Simplified from the game where a rollout can afford it: ships are kept on the map rather than destroyed at
+    its edge, only their end positions are checked against planets, ships do not collide with each other, planets
+    explode without harming what is around them, and ships never undock.
+
+    :param Frame frame: The frame to play from; it is not modified
+    :param Commands commands: What each ship does this turn
+    :return: The frame after the turn
+    :rtype: Frame
+    """
+    alive = frame.alive()
+    status, planet, progress = _dock(frame, commands, alive)
+
+    # movement: only ships that were free before this turn's docking orders
+    moving = alive & (frame.status == UNDOCKED) & (status == UNDOCKED)
+    thrust_x = np.where(moving, commands.thrust_x, 0)
+    thrust_y = np.where(moving, commands.thrust_y, 0)
+    speed = np.hypot(thrust_x, thrust_y)
+    scale = np.where(speed > constants.MAX_SPEED, constants.MAX_SPEED / np.maximum(speed, 1e-9), 1)
+    x = np.clip(frame.x + thrust_x * scale, 0, frame.width)
+    y = np.clip(frame.y + thrust_y * scale, 0, frame.height)
+    health = frame.health
+    planet_health = frame.planet_health
+    if len(frame.planet_x):
+        inside = np.hypot(x[:, None] - frame.planet_x, y[:, None] - frame.planet_y) \
+            < frame.planet_radius + constants.SHIP_RADIUS
+        inside &= moving[:, None] & (frame.planet_health > 0)
+        crashed = inside.any(axis=1)
+        if crashed.any():
+            planet_health = np.maximum(planet_health - (inside * health[:, None]).sum(axis=0), 0)
+            health = np.where(crashed, 0, health)
+            alive = alive & ~crashed
+
+    # combat
+    cooldown = np.maximum(frame.cooldown - 1, 0)
+    can_fire = alive & (status == UNDOCKED) & (cooldown == 0)
+    health = np.maximum(health - combat.sparse_damage(x, y, np.where(alive, frame.owner, -1), can_fire), 0)
+    cooldown = np.where(can_fire, constants.WEAPON_COOLDOWN, cooldown)
+
+    # docking progress, and what a destroyed planet takes with it
+    docking = (health > 0) & (status == DOCKING)
+    progress = np.where(docking, np.maximum(progress - 1, 0), progress)
+    status = np.where(docking & (progress == 0), DOCKED, status).astype(frame.status.dtype)
+    on_planet = (status != UNDOCKED) & (planet >= 0)
+    health = np.where(on_planet & (planet_health[planet] <= 0), 0, health)
+    alive = health > 0
+
+    # planet ownership: claimed by the first ship to start docking, lost with the last ship on it
+    planets = len(frame.planet_x)
+    holding = alive & on_planet
+    docked = np.bincount(planet[holding & (status == DOCKED)], minlength=planets)
+    planet_owner = frame.planet_owner.copy()
+    planet_owner[planet[holding]] = frame.owner[holding]
+    planet_owner[(np.bincount(planet[holding], minlength=planets) == 0) | (planet_health <= 0)] = -1
+
+    # production, and the ships it pays for
+    produced = np.minimum(docked * constants.BASE_PRODUCTIVITY, frame.planet_remaining)
+    produced[planet_owner < 0] = 0
+    planet_production = frame.planet_production + produced
+    planet_remaining = frame.planet_remaining - produced
+    spawning = np.flatnonzero(planet_production >= constants.SHIP_COST)
+    planet_production = np.where(planet_production >= constants.SHIP_COST,
+                                 planet_production - constants.SHIP_COST, planet_production)
+
+    columns = dict(x=x, y=y, health=health, status=status, planet=planet, progress=progress, cooldown=cooldown)
+    if len(spawning):
+        # new ships appear next to their planet, on the side facing the center of the map
+        dx = frame.width / 2 - frame.planet_x[spawning]
+        dy = frame.height / 2 - frame.planet_y[spawning]
+        distance = np.maximum(np.hypot(dx, dy), 1e-9)
+        reach = frame.planet_radius[spawning] + constants.SPAWN_RADIUS
+        spawned = dict(id=np.full(len(spawning), -1), owner=planet_owner[spawning],
+                       x=frame.planet_x[spawning] + dx / distance * reach,
+                       y=frame.planet_y[spawning] + dy / distance * reach,
+                       health=np.full(len(spawning), float(constants.BASE_SHIP_HEALTH)),
+                       status=np.full(len(spawning), UNDOCKED), planet=np.full(len(spawning), -1),
+                       progress=np.zeros(len(spawning), dtype=np.int64),
+                       cooldown=np.zeros(len(spawning), dtype=np.int64))
+        columns['id'] = frame.id
+        columns['owner'] = frame.owner
+        for name in _SHIP_COLUMNS:
+            columns[name] = np.concatenate([columns[name], spawned[name].astype(columns[name].dtype)])
+    return frame.replace(turn=frame.turn + 1, planet_owner=planet_owner, planet_health=planet_health,
+                         planet_production=planet_production, planet_remaining=planet_remaining, **columns)
+
+
+def fleet_health(frame, players):
+    """
+    :param Frame frame: The frame
+    :param int players: Number of players
+    :return: The total health of each player's ships
+    :rtype: numpy.ndarray
+    """
+    owned = frame.owner >= 0
+    return np.bincount(frame.owner[owned], weights=frame.health[owned], minlength=players)
+
+
+def health_margin(frame, player):
+    """
+    :param Frame frame: The frame
+    :param int player: The player to score for
+    :return: The health of the player's ships less that of everyone else's
+    :rtype: float
+    """
+    health = fleet_health(frame, max(player + 1, int(frame.owner.max(initial=-1)) + 1))
+    return float(2 * health[player] - health.sum())
+
+
+def play(frame, policy, turns):
+    """
+    :param Frame frame: The frame to start from
+    :param policy: Joint policy, frame -> Commands
+    :param int turns: Turns to play
+    :return: The frame after the last turn
+    :rtype: Frame
+    """
+    for _ in range(turns):
+        frame = step(frame, policy(frame))
+    return frame
+
+
+def rollout(frame, candidates, player, budget=None, turns=3, evaluate=health_margin):
+    """
+    Play each candidate joint policy forward from the same frame and score where it leads, for as many
+    candidates as the budget allows, in the order given: put the likeliest first.
+
+    :param Frame frame: The frame to start from
+    :param list candidates: Joint policies, frame -> Commands
+    :param int player: The player to score for
+    :param budget.Budget budget: Time allowed; None for no limit
+    :param int turns: Turns to play each candidate
+    :param evaluate: Scoring function (frame, player) -> float; higher is better
+    :return: The best candidate played (None if there was no time for any) and every candidate's score
+    :rtype: Rollout
+    """
+    scores = [None] * len(candidates)
+    best = None
+    for index, policy in enumerate(candidates):
+        if budget is not None and budget.exhausted():
+            break
+        scores[index] = evaluate(play(frame, policy, turns), player)
+        if best is None or scores[index] > scores[best]:
+            best = index
+    return Rollout(best, scores)
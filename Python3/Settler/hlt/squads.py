@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+
+from . import clustering, collision, constants
+
+
+class Squad:
+    """
+    Ships that move as one: the leader plans its move like any ship, and the members copy it, each keeping its
+    own slot around the leader (see follow). Planning a fleet then costs one navigation per squad rather than one
+    per ship.
+
+    :ivar key: What the squad's ships share, e.g. the target of their standing orders (None for nothing)
+    :ivar leader: The ship that plans the squad's move
+    :ivar members: The other ships
+    """
+
+    def __init__(self, key, leader, members):
+        """
+        :param key: What the squad's ships share
+        :param entity.Ship leader: The ship that plans the squad's move
+        :param list[entity.Ship] members: The other ships
+        """
+        self.key = key
+        self.leader = leader
+        self.members = members
+
+    def __len__(self):
+        return 1 + len(self.members)
+
+    def __repr__(self):
+        return "Squad({} leader {} members {})".format(self.key, self.leader.id, [ship.id for ship in self.members])
+
+
+def form(ships, keys, radius, max_size=None):
+    """
+    Group the ships that share a key and are near each other (see clustering.cluster) into squads, led by the
+    ship closest to the middle of the group. Ships whose key is unique end up on their own.
+
+    :param list[entity.Ship] ships: The ships
+    :param list keys: What each ship shares with the others of its squad; None is a key like any other
+    :param float radius: Linking radius
+    :param int max_size: Most ships in a squad; larger groups are split, in order along x. None for no limit.
+    :return: The squads, in the order of their first ship in ships
+    :rtype: list[Squad]
+    """
+    if not ships:
+        return []
+    key_index = {}
+    groups = [key_index.setdefault(key, len(key_index)) for key in keys]
+    xs = np.array([ship.x for ship in ships])
+    ys = np.array([ship.y for ship in ships])
+    clusters = clustering.cluster(xs, ys, groups, radius)
+    squads = []
+    _, first_rows = np.unique(clusters.label, return_index=True)
+    for cluster in np.argsort(first_rows).tolist():
+        rows = clusters.members(cluster)
+        rows = rows[np.argsort(xs[rows], kind='stable')]
+        parts = [rows] if max_size is None else [rows[i:i + max_size] for i in range(0, len(rows), max_size)]
+        for part in parts:
+            center = np.hypot(xs[part] - xs[part].mean(), ys[part] - ys[part].mean()).argmin()
+            leader = part[center]
+            squads.append(Squad(keys[leader], ships[leader], [ships[row] for row in part.tolist() if row != leader]))
+    return squads
+
+
+def thrust_of(command):
+    """
+    :param str command: A command string, or None
+    :return: The thrust a thrust command gives, as (dx, dy); None for any other command
+    :rtype: (float, float)
+    """
+    if not command or not command.startswith('t '):
+        return None
+    _, _, magnitude, angle = command.split()
+    return int(magnitude) * math.cos(math.radians(int(angle))), int(magnitude) * math.sin(math.radians(int(angle)))
+
+
+def slots(count, spacing):
+    """
+    Formation slots around a leader: the points of a hexagonal lattice nearest the leader, leaving out its own.
+
+    :param int count: Number of slots
+    :param float spacing: Distance between neighbouring slots
+    :return: (count, 2) offsets from the leader, nearest first
+    :rtype: numpy.ndarray
+    """
+    rings = 0
+    while 3 * rings * (rings + 1) < count:
+        rings += 1
+    a, b = np.meshgrid(np.arange(-rings, rings + 1), np.arange(-rings, rings + 1))
+    a, b = a.ravel(), b.ravel()
+    keep = (np.abs(a + b) <= rings) & ((a != 0) | (b != 0))
+    xs = (a[keep] + b[keep] / 2) * spacing
+    ys = b[keep] * math.sqrt(3) / 2 * spacing
+    order = np.lexsort((np.arctan2(ys, xs), np.hypot(xs, ys)))[:count]
+    return np.stack([xs[order], ys[order]], axis=1)
+
+
+def _assign(offsets, targets):
+    """
+    Match each offset to its own target, the closest pairs first.
+
+    :return: The target of each offset
+    :rtype: numpy.ndarray
+    """
+    distances = np.hypot(offsets[:, None, 0] - targets[None, :, 0], offsets[:, None, 1] - targets[None, :, 1])
+    chosen = np.full(len(offsets), -1, dtype=np.int64)
+    taken = np.zeros(len(targets), dtype=bool)
+    for row, column in zip(*np.unravel_index(np.argsort(distances, axis=None), distances.shape)):
+        if chosen[row] < 0 and not taken[column]:
+            chosen[row] = column
+            taken[column] = True
+    return chosen
+
+
+def follow(squad, command, game_map, spacing):
+    """
+    The members' commands for the leader's: each member takes the free formation slot (see slots) nearest to
+    where it is now, relative to the leader, and heads for that slot around the leader's destination. A formation
+    already in place keeps its slots and moves as one. A member's thrust is capped at MAX_SPEED and cut short
+    where the distance field can not prove the way clear of planets, or where it would touch another member or
+    the leader during the turn (see collision.slow_until_clear); the leader's thrust is cut too where it would run
+    into a member.
+
+    :param Squad squad: The squad
+    :param str command: The leader's command
+    :param game_map.Map game_map: The map
+    :param float spacing: Distance between neighbouring slots; more than 2 * SHIP_RADIUS
+    :return: Each member's command (None to stay put), and the leader's if it was cut, by ship id; empty if the
+             leader is not thrusting
+    :rtype: dict[int, str]
+    """
+    thrust = thrust_of(command)
+    if thrust is None or not squad.members:
+        return {}
+    leader = squad.leader
+    xs = np.array([ship.x for ship in squad.members])
+    ys = np.array([ship.y for ship in squad.members])
+    offsets = np.stack([xs - leader.x, ys - leader.y], axis=1)
+    formation = slots(len(squad.members), spacing)
+    formation = formation[_assign(offsets, formation)]
+    dx = leader.x + thrust[0] + formation[:, 0] - xs
+    dy = leader.y + thrust[1] + formation[:, 1] - ys
+    speeds = np.minimum(np.hypot(dx, dy), constants.MAX_SPEED)
+    angles = np.round(np.degrees(np.arctan2(dy, dx))) % 360
+
+    field = game_map.distance_field()
+    for k, ship in enumerate(squad.members):
+        end_x = ship.x + speeds[k] * math.cos(math.radians(angles[k]))
+        end_y = ship.y + speeds[k] * math.sin(math.radians(angles[k]))
+        if not field.segment_clear(ship.x, ship.y, end_x, end_y, ship.radius):
+            speeds[k] = max(min(speeds[k], field.lower_bound(ship.x, ship.y) - ship.radius - 0.1), 0)
+
+    # the leader gives way too, to members that can not get out of its path in time
+    _, _, magnitude, angle = command.split()
+    ships = [leader] + squad.members
+    speeds = collision.slow_until_clear(np.concatenate([[leader.x], xs]), np.concatenate([[leader.y], ys]),
+                                        np.concatenate([[int(magnitude)], np.floor(speeds)]),
+                                        np.radians(np.concatenate([[int(angle)], angles])))
+    angles = [int(angle)] + angles.tolist()
+    commands = {ship.id: ship.thrust(speed, angle) if speed >= 1 else None
+                for ship, speed, angle in zip(ships, speeds.tolist(), angles)}
+    if speeds[0] == int(magnitude):
+        del commands[leader.id]
+    return commands
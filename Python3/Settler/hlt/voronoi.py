@@ -0,0 +1,155 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from . import raster
+
+
+class PlanetLabels:
+    """
+    Nearest-planet (Voronoi) label raster for one set of planets. Each cell holds the id of the planet nearest to
+    every point in it, or nothing where the cell straddles a boundary between two planets' regions; lookups there,
+    and off the map, are answered by comparing distances to every planet. Only ids and positions are kept, so the
+    labels stay valid from one turn's planet objects to the next.
+
+    :ivar grid: The raster.Grid the labels are laid over
+    :ivar planet_ids: Ids of the planets labelled, in the order they were given
+    :ivar surface: Whether distance is measured to planet surfaces rather than centers
+    """
+
+    def __init__(self, grid, planets, surface=False):
+        """
+        :param raster.Grid grid: The grid to lay the labels over
+        :param list[entity.Planet] planets: The planets to label cells with
+        :param bool surface: Measure distance to planet surfaces (as docking range does) instead of centers
+        """
+        self.grid = grid
+        self.planet_ids = [planet.id for planet in planets]
+        self.surface = surface
+        self._circles = [(planet.x, planet.y, planet.radius if surface else 0) for planet in planets]
+        self._labels = self._build()
+
+    def _build(self):
+        grid = self.grid
+        if len(self._circles) < 2:
+            return (self.planet_ids or [None]) * grid.size
+        xs, ys = grid.centers()
+        distances = np.stack([np.hypot(xs - x, ys - y) - radius for x, y, radius in self._circles])
+        order = np.argpartition(distances, 1, axis=0)
+        first, second = np.take_along_axis(distances, order[:2], axis=0)
+        # Moving within a cell changes every distance by at most half the cell diagonal, so the nearest planet at the
+        # cell center stays nearest throughout the cell unless the runner-up is within a full diagonal of it
+        certain = second - first > grid.cell_size * math.sqrt(2) + 1e-9
+        ids = self.planet_ids
+        return [ids[label] if label >= 0 else None for label in np.where(certain, order[0], -1).ravel().tolist()]
+
+    def distance(self, planet, x, y):
+        """
+        :param entity.Planet planet: A planet
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: Distance from the point to the planet's center, or its surface for surface labels
+        :rtype: float
+        """
+        distance = math.sqrt((planet.x - x) ** 2 + (planet.y - y) ** 2)
+        return distance - planet.radius if self.surface else distance
+
+    def nearest(self, x, y):
+        """
+        :param float x: Map x-coordinate
+        :param float y: Map y-coordinate
+        :return: The id of the planet nearest to the point, or None if there are no planets
+        :rtype: int
+        """
+        grid = self.grid
+        if 0 <= x < grid.width and 0 <= y < grid.height:
+            row, col = grid.cell_of(x, y)
+            planet_id = self._labels[row * grid.cols + col]
+            if planet_id is not None:
+                return planet_id
+        best_id = None
+        best_distance = math.inf
+        for planet_id, (planet_x, planet_y, radius) in zip(self.planet_ids, self._circles):
+            distance = math.sqrt((planet_x - x) ** 2 + (planet_y - y) ** 2) - radius
+            if distance < best_distance:
+                best_id = planet_id
+                best_distance = distance
+        return best_id
+
+
+class NearestPlanetIndex:
+    """
+    Nearest-planet lookups for filtered sets of planets (e.g. "unowned", "mine with free docking spots"). Planets do
+    not move, so a set's label raster depends only on which planets are in it: it is built the first time the set
+    is asked for and reused until the set changes, i.e. until ownership or docking capacity moves a planet in or out.
+
+    :ivar grid: The raster.Grid labels are laid over
+    :ivar capacity: Maximum number of label rasters kept
+    :ivar hits: Number of lookups answered from a cached raster
+    :ivar misses: Number of lookups that had to build a raster
+    """
+
+    def __init__(self, width, height, cell_size=2, capacity=16):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param float cell_size: Length of a grid cell side, in map units
+        :param int capacity: Maximum number of label rasters kept
+        """
+        self.grid = raster.Grid(width, height, cell_size)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._labels = OrderedDict()
+
+    def labels(self, planets, surface=False):
+        """
+        :param list[entity.Planet] planets: The planets to choose from
+        :param bool surface: Measure distance to planet surfaces instead of centers
+        :return: The cached or freshly built label raster for exactly these planets
+        :rtype: PlanetLabels
+        """
+        return self._labels_for(frozenset(planet.id for planet in planets), planets, surface)
+
+    def _labels_for(self, planet_ids, planets, surface):
+        key = (planet_ids, surface)
+        labels = self._labels.get(key)
+        if labels is None:
+            self.misses += 1
+            labels = PlanetLabels(self.grid, planets, surface)
+            self._labels[key] = labels
+            while len(self._labels) > self.capacity:
+                self._labels.popitem(last=False)
+        else:
+            self.hits += 1
+        self._labels.move_to_end(key)
+        return labels
+
+    def closest(self, entity, planets, max_distance=math.inf, accept=None, surface=False):
+        """
+        The planet nearest to an entity, as a scan of the list would find it.
+
+        :param entity.Entity entity: The entity looking for a planet
+        :param list[entity.Planet] planets: The planets to choose from
+        :param float max_distance: Planets this far away or further do not count
+        :param accept: Optional test a planet must also pass; when the nearest planet fails it the list is scanned
+        :param bool surface: Measure distance to planet surfaces instead of centers
+        :return: The nearest accepted planet (one of planets), or None
+        :rtype: entity.Planet
+        """
+        by_id = {planet.id: planet for planet in planets}
+        labels = self._labels_for(frozenset(by_id), planets, surface)
+        planet = by_id.get(labels.nearest(entity.x, entity.y))
+        if planet is not None and accept is not None and not accept(planet):
+            best_distance = max_distance
+            planet = None
+            for candidate in planets:
+                distance = labels.distance(candidate, entity.x, entity.y)
+                if distance < best_distance and accept(candidate):
+                    planet = candidate
+                    best_distance = distance
+            return planet
+        if planet is None or labels.distance(planet, entity.x, entity.y) >= max_distance:
+            return None
+        return planet
@@ -0,0 +1,40 @@
+"""
+Builds maps for the tests from a few ships and planets, by way of the same frame string the engine sends.
+"""
+import hlt
+
+UNDOCKED, DOCKING, DOCKED, UNDOCKING = (status.value for status in hlt.entity.Ship.DockingStatus)
+
+
+def ship(owner, ship_id, x, y, health=255, status=UNDOCKED, planet=0, progress=0):
+    return dict(owner=owner, id=ship_id, x=x, y=y, health=health, status=status, planet=planet, progress=progress)
+
+
+def planet(planet_id, x, y, radius=5, owner=None, health=1000, spots=3, production=0, remaining=1000):
+    return dict(id=planet_id, x=x, y=y, radius=radius, owner=owner, health=health, spots=spots,
+                production=production, remaining=remaining)
+
+
+def parse(ships, planets=(), width=240, height=160, my_id=0):
+    """
+    :param ships: ship() of every ship; a ship not undocked is docked to its planet
+    :param planets: planet() of every planet
+    :return: The map, parsed from the frame these describe
+    :rtype: hlt.game_map.Map
+    """
+    players = sorted({s['owner'] for s in ships} | {0, 1})
+    tokens = [len(players)]
+    for player in players:
+        own = sorted((s for s in ships if s['owner'] == player), key=lambda s: s['id'])
+        tokens += [player, len(own)]
+        for s in own:
+            tokens += [s['id'], s['x'], s['y'], s['health'], 0, 0, s['status'], s['planet'], s['progress'], 0]
+    tokens.append(len(planets))
+    for p in sorted(planets, key=lambda p: p['id']):
+        docked = sorted(s['id'] for s in ships if s['status'] != UNDOCKED and s['planet'] == p['id'])
+        owner = p['owner']
+        tokens += [p['id'], p['x'], p['y'], p['health'], p['radius'], p['spots'], p['production'], p['remaining'],
+                   int(owner is not None), owner if owner is not None else 0, len(docked)] + docked
+    game_map = hlt.game_map.Map(my_id, width, height)
+    game_map._parse(" ".join(str(token) for token in tokens))
+    return game_map
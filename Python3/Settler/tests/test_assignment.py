@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import hlt
+from hlt.assignment import UNASSIGNED
+
+UNASSIGNED_COST = 100.0
+
+
+def problem(rng, ships, targets):
+    costs = rng.uniform(0, 150, (ships, targets))
+    costs[rng.random((ships, targets)) < 0.2] = np.inf
+    capacities = rng.integers(0, 3, targets)
+    return costs, capacities
+
+
+def total(costs, targets):
+    return sum(costs[ship, target] if target != UNASSIGNED else UNASSIGNED_COST
+               for ship, target in enumerate(targets))
+
+
+def feasible(costs, capacities, targets):
+    assigned = targets[targets != UNASSIGNED]
+    return (np.all(np.bincount(assigned, minlength=len(capacities)) <= capacities)
+            and np.all(costs[targets != UNASSIGNED, assigned] < UNASSIGNED_COST))
+
+
+def brute_force(costs, capacities):
+    """
+    :return: The lowest total cost over every assignment that respects the capacities
+    """
+    ships, targets = costs.shape
+    best = np.inf
+    for choice in itertools.product(range(UNASSIGNED, targets), repeat=ships):
+        choice = np.array(choice, dtype=np.int64)
+        if feasible(costs, capacities, choice):
+            best = min(best, total(costs, choice))
+    return best
+
+
+@pytest.mark.parametrize('shape', ((1, 1), (3, 2), (4, 3), (5, 2), (2, 5)))
+def test_hungarian_is_optimal(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(10):
+        costs, capacities = problem(rng, *shape)
+        solution = hlt.assignment.solve(costs, capacities, unassigned_cost=UNASSIGNED_COST, method='hungarian')
+        assert solution.method == 'hungarian'
+        assert feasible(costs, capacities, solution.targets)
+        assert total(costs, solution.targets) == pytest.approx(brute_force(costs, capacities))
+
+
+def test_scipy_agrees_with_hungarian():
+    pytest.importorskip('scipy')
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        costs, capacities = problem(rng, 30, 12)
+        scipy = hlt.assignment.solve(costs, capacities, unassigned_cost=UNASSIGNED_COST, method='scipy')
+        hungarian = hlt.assignment.solve(costs, capacities, unassigned_cost=UNASSIGNED_COST, method='hungarian')
+        assert scipy.method == 'scipy'
+        assert total(costs, scipy.targets) == pytest.approx(total(costs, hungarian.targets))
+
+
+def test_greedy_respects_capacities():
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        costs, capacities = problem(rng, 30, 12)
+        solution = hlt.assignment.solve(costs, capacities, unassigned_cost=UNASSIGNED_COST, method='greedy')
+        assert solution.method == 'greedy'
+        assert feasible(costs, capacities, solution.targets)
+
+
+@pytest.mark.parametrize('method', ('scipy', 'hungarian'))
+def test_spent_budget_falls_back_to_greedy(method):
+    costs, capacities = problem(np.random.default_rng(2), 30, 12)
+    budget = hlt.budget.Budget(seconds=0)
+    solution = hlt.assignment.solve(costs, capacities, budget, unassigned_cost=UNASSIGNED_COST, method=method)
+    assert solution.method == 'greedy'
+    greedy = hlt.assignment.greedy(costs, capacities, UNASSIGNED_COST)
+    assert np.array_equal(solution.targets, greedy)
+
+
+def test_scipy_is_skipped_when_it_would_not_fit(monkeypatch):
+    """
+    The estimate is checked before scipy starts, since its solve cannot be interrupted.
+    """
+    monkeypatch.setattr(hlt.assignment, 'SCIPY_SECONDS', 1.0)
+    costs, capacities = problem(np.random.default_rng(3), 30, 12)
+    budget = hlt.budget.Budget(seconds=60)
+    solution = hlt.assignment.solve(costs, capacities, budget, unassigned_cost=UNASSIGNED_COST, method='scipy')
+    assert solution.method == 'greedy'
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from hlt import clustering
+
+
+def union_find(i, j, count):
+    parent = list(range(count))
+
+    def root(node):
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        parent[root(a)] = root(b)
+    roots = [root(node) for node in range(count)]
+    # numbered in order of each component's lowest node, as components() numbers them
+    numbers = {}
+    return np.array([numbers.setdefault(r, len(numbers)) for r in roots])
+
+
+@pytest.mark.parametrize('count', (1, 10, 300))
+@pytest.mark.parametrize('edges', (0, 5, 400))
+def test_components_match_union_find(count, edges):
+    rng = np.random.default_rng(count + edges)
+    i = rng.integers(0, count, edges)
+    j = rng.integers(0, count, edges)
+    assert clustering.components(i, j, count).tolist() == union_find(i, j, count).tolist()
+
+
+def test_components_of_a_long_chain():
+    count = 1000
+    order = np.random.default_rng(0).permutation(count)
+    labels = clustering.components(order[:-1], order[1:], count)
+    assert np.all(labels == 0)
+
+
+@pytest.mark.parametrize('radius', (5, 20))
+def test_cluster_links_near_ships_of_one_owner(radius):
+    rng = np.random.default_rng(radius)
+    xs = rng.uniform(0, 240, 300)
+    ys = rng.uniform(0, 160, 300)
+    owners = rng.integers(0, 3, 300)
+    health = rng.uniform(1, 255, 300)
+    mask = rng.random(300) < 0.9
+    clusters = clustering.cluster(xs, ys, owners, radius, health, mask)
+
+    assert np.all((clusters.label >= 0) == mask)
+    rows = np.flatnonzero(mask)
+    label = clusters.label[rows]
+    distances = np.hypot(xs[rows, None] - xs[rows], ys[rows, None] - ys[rows])
+    same_owner = owners[rows, None] == owners[rows]
+    together = label[:, None] == label
+    assert np.all(together[same_owner & (distances <= radius)])
+    assert not np.any(together & ~same_owner)
+
+    for c in range(len(clusters)):
+        members = clusters.members(c)
+        assert np.all(clusters.label[members] == c)
+        assert clusters.size[c] == len(members)
+        assert clusters.owner[c] == owners[members[0]]
+        assert clusters.x[c] == pytest.approx(xs[members].mean())
+        assert clusters.y[c] == pytest.approx(ys[members].mean())
+        assert clusters.health[c] == pytest.approx(health[members].sum())
+        assert clusters.radius[c] == pytest.approx(np.hypot(xs[members] - clusters.x[c],
+                                                            ys[members] - clusters.y[c]).max())
+    assert sorted(np.concatenate([clusters.of_owner(1), clusters.of_owner(1, mine=False)]).tolist()) == \
+        list(range(len(clusters)))
+
+
+def test_cluster_of_nothing():
+    clusters = clustering.cluster([1.0, 2.0], [1.0, 2.0], [0, 1], 5, mask=[False, False])
+    assert len(clusters) == 0
+    assert clusters.label.tolist() == [-1, -1]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from hlt import collision, constants
+
+
+def moves(rng, count, spread):
+    x = rng.uniform(0, spread, count)
+    y = rng.uniform(0, spread, count)
+    vx = rng.uniform(-constants.MAX_SPEED, constants.MAX_SPEED, count)
+    vy = rng.uniform(-constants.MAX_SPEED, constants.MAX_SPEED, count)
+    return x, y, vx, vy
+
+
+def brute_force_boxes(x, y, vx, vy, radius):
+    lo_x, hi_x = np.minimum(x, x + vx) - radius, np.maximum(x, x + vx) + radius
+    lo_y, hi_y = np.minimum(y, y + vy) - radius, np.maximum(y, y + vy) + radius
+    return {(i, j) for i in range(len(x)) for j in range(i + 1, len(x))
+            if lo_x[i] <= hi_x[j] and lo_x[j] <= hi_x[i] and lo_y[i] <= hi_y[j] and lo_y[j] <= hi_y[i]}
+
+
+@pytest.mark.parametrize('count', (0, 1, 2, 30, 200))
+@pytest.mark.parametrize('spread', (20, 150))
+def test_broadphase_finds_every_overlapping_box(count, spread):
+    rng = np.random.default_rng(count + spread)
+    for per_entity in (False, True):
+        x, y, vx, vy = moves(rng, count, spread)
+        radius = rng.uniform(0.5, 4, count) if per_entity else constants.SHIP_RADIUS
+        i, j = collision.broadphase_pairs(x, y, vx, vy, radius)
+        assert np.all(i < j)
+        assert len(set(zip(i.tolist(), j.tolist()))) == len(i)
+        assert set(zip(i.tolist(), j.tolist())) == brute_force_boxes(x, y, vx, vy, radius)
+
+
+@pytest.mark.parametrize('count', (2, 30, 200))
+def test_first_contacts_match_brute_force(count):
+    rng = np.random.default_rng(count)
+    x, y, vx, vy = moves(rng, count, 100)
+    i, j, t = collision.first_contacts(x, y, vx, vy)
+    assert np.all(np.diff(t) >= 0)
+    a, b = np.triu_indices(count, 1)
+    times = collision.moving_contact_times(x[a], y[a], vx[a], vy[a], x[b], y[b], vx[b], vy[b])
+    touching = np.isfinite(times)
+    assert dict(zip(zip(i.tolist(), j.tolist()), t.tolist())) == \
+        dict(zip(zip(a[touching].tolist(), b[touching].tolist()), times[touching].tolist()))
+
+
+def test_moving_contact_times():
+    contact = 2 * constants.SHIP_RADIUS
+    # head on, closing 10 apart at a combined 10 per turn: touch once 10 - contact has been covered
+    t = collision.moving_contact_times(0, 0, 5, 0, 10, 0, -5, 0)
+    assert t == pytest.approx((10 - contact) / 10)
+    assert collision.moving_contact_times(0, 0, 0, 0, contact / 2, 0, 0, 0) == 0
+    assert collision.moving_contact_times(0, 0, 7, 0, 0, 20, 7, 0) == np.inf
+    assert collision.moving_contact_times(0, 0, -1, 0, 20, 0, 1, 0) == np.inf
+
+
+def test_earliest_contacts():
+    x = np.array([0.0, 10, 50])
+    earliest = collision.earliest_contacts(x, np.zeros(3), np.array([5.0, -5, 0]), np.zeros(3))
+    assert earliest[0] == earliest[1] == pytest.approx((10 - 2 * constants.SHIP_RADIUS) / 10)
+    assert earliest[2] == np.inf
+
+
+@pytest.mark.parametrize('spread', (15, 40, 100))
+def test_slow_until_clear_leaves_no_contacts(spread):
+    rng = np.random.default_rng(spread)
+    for _ in range(10):
+        x, y, _, _ = moves(rng, 60, spread)
+        speed = rng.integers(0, constants.MAX_SPEED + 1, 60)
+        angle = rng.uniform(0, 2 * np.pi, 60)
+        cut = collision.slow_until_clear(x, y, speed, angle)
+        assert np.all((0 <= cut) & (cut <= speed))
+        vx, vy = cut * np.cos(angle), cut * np.sin(angle)
+        i, j, t = collision.first_contacts(x, y, vx, vy)
+        # what is left are ships that already touched and do not close in
+        closing = (x[j] - x[i]) * (vx[j] - vx[i]) + (y[j] - y[i]) * (vy[j] - vy[i]) < 0
+        assert np.all((t == 0) & ~closing)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from hlt import combat, constants
+
+
+def fight(rng, ships, players, spread):
+    xs = rng.uniform(0, spread, ships)
+    ys = rng.uniform(0, spread, ships)
+    owners = rng.integers(-1, players, ships)
+    can_fire = rng.random(ships) < 0.8
+    return xs, ys, owners, can_fire
+
+
+@pytest.mark.parametrize('ships', (0, 1, 2, 10, 80))
+@pytest.mark.parametrize('spread', (10, 60))
+def test_sparse_damage_matches_damage(ships, spread):
+    rng = np.random.default_rng(ships + spread)
+    for _ in range(20):
+        xs, ys, owners, can_fire = fight(rng, ships, 3, spread)
+        assert np.allclose(combat.sparse_damage(xs, ys, owners, can_fire), combat.damage(xs, ys, owners, can_fire))
+
+
+def test_damage_is_split_between_targets():
+    xs = np.array([0.0, combat.FIRING_RANGE, -combat.FIRING_RANGE, 0, 100])
+    ys = np.zeros(5)
+    owners = np.array([0, 1, 1, 0, 1])
+    can_fire = np.array([True, True, True, False, True])
+    taken = combat.damage(xs, ys, owners, can_fire)
+    # ship 0 splits its shot between ships 1 and 2; ships 1 and 2 each split theirs between ships 0 and 3
+    # (ship 3 sits within range of both), which can not fire back; ship 4 is out of range of everyone
+    half = constants.WEAPON_DAMAGE / 2
+    assert np.allclose(taken, [2 * half, half, half, 2 * half, 0])
+
+
+def test_batched_damage_is_per_fight():
+    rng = np.random.default_rng(0)
+    fights = [fight(rng, 12, 2, 20) for _ in range(5)]
+    batched = combat.damage(*(np.stack(column) for column in zip(*fights)))
+    for one, expected in zip(fights, batched):
+        assert np.allclose(combat.damage(*one), expected)
+
+
+def test_resolve_plays_turns_until_ships_are_destroyed():
+    outcome = combat.resolve(xs=[0, 5, 5], ys=[0, 0, 3], owners=[0, 1, 1], health=[255, 255, 255],
+                             cooldown=[0, 0, 0], docked=[False, False, True], turns=10)
+    # ship 0 splits its fire between both enemies, and only ship 1 fires back, so ship 0 lasts 6 exchanges
+    lasts = int(np.ceil(255 / constants.WEAPON_DAMAGE))
+    assert outcome.health[0] == 0
+    assert outcome.health[1] == outcome.health[2] == 255 - lasts * constants.WEAPON_DAMAGE / 2
+    # a destroyed ship's weapon cools down, and a docked one never fires
+    assert outcome.cooldown.tolist() == [0, constants.WEAPON_COOLDOWN, 0]
+
+
+def test_pack_pads_fights():
+    rows, real = combat.pack([[3, 4], [7], [1, 2, 5]], 3)
+    assert rows.tolist() == [[3, 4, 0], [7, 0, 0], [1, 2, 5]]
+    assert real.tolist() == [[True, True, False], [True, False, False], [True, True, True]]
@@ -0,0 +1,64 @@
+import math
+import random
+
+import pytest
+
+import hlt
+from maps import parse, planet, ship
+
+WIDTH = 240
+HEIGHT = 160
+
+
+@pytest.fixture(scope='module')
+def planets():
+    rng = random.Random(0)
+    placed = []
+    while len(placed) < 12:
+        radius = rng.uniform(3, 15)
+        x, y = rng.uniform(radius, WIDTH - radius), rng.uniform(radius, HEIGHT - radius)
+        if all(math.hypot(x - p['x'], y - p['y']) > radius + p['radius'] + 2 for p in placed):
+            placed.append(planet(len(placed), x, y, radius))
+    return parse([ship(0, 0, 1, 1)], placed).all_planets()
+
+
+def exact(planets, x, y):
+    return min(math.hypot(p.x - x, p.y - y) - p.radius for p in planets)
+
+
+def segment_distance(planet, start_x, start_y, end_x, end_y):
+    dx, dy = end_x - start_x, end_y - start_y
+    t = min(max(((planet.x - start_x) * dx + (planet.y - start_y) * dy) / max(dx * dx + dy * dy, 1e-12), 0), 1)
+    return math.hypot(start_x + t * dx - planet.x, start_y + t * dy - planet.y) - planet.radius
+
+
+@pytest.mark.parametrize('cell_size', (0.5, 2))
+def test_clearance_is_within_error(planets, cell_size):
+    field = hlt.distance_field.DistanceField(WIDTH, HEIGHT, planets, cell_size)
+    rng = random.Random(1)
+    for _ in range(5000):
+        x, y = rng.uniform(0, WIDTH - 1e-9), rng.uniform(0, HEIGHT - 1e-9)
+        distance = exact(planets, x, y)
+        assert abs(field.clearance(x, y) - distance) <= field.error
+        assert field.lower_bound(x, y) <= distance
+    assert field.lower_bound(-1, 10) == -math.inf
+
+
+@pytest.mark.parametrize('cell_size', (0.5, 2))
+def test_segment_clear_is_never_wrong(planets, cell_size):
+    field = hlt.distance_field.DistanceField(WIDTH, HEIGHT, planets, cell_size)
+    rng = random.Random(2)
+    proven = truly_clear = 0
+    for _ in range(5000):
+        start_x, start_y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+        angle = rng.uniform(0, 2 * math.pi)
+        length = rng.uniform(0, 20)
+        end_x, end_y = start_x + length * math.cos(angle), start_y + length * math.sin(angle)
+        radius = rng.choice((0, 0.6, 2))
+        clear = min(segment_distance(p, start_x, start_y, end_x, end_y) for p in planets) > radius
+        if field.segment_clear(start_x, start_y, end_x, end_y, radius):
+            assert clear
+            proven += 1
+        truly_clear += clear
+    # it may give up near planets, but most of the open space is proven in a few steps
+    assert proven >= 0.8 * truly_clear
@@ -0,0 +1,55 @@
+import math
+import random
+
+import pytest
+
+import hlt
+from maps import parse, planet, ship
+
+WIDTH = 240
+HEIGHT = 160
+
+
+def planets(rng, count=15):
+    """
+    Planets far enough apart not to overlap, but close enough that some docking ranges do
+    """
+    placed = []
+    while len(placed) < count:
+        radius = rng.uniform(3, 12)
+        x, y = rng.uniform(radius, WIDTH - radius), rng.uniform(radius, HEIGHT - radius)
+        if all(math.hypot(x - p['x'], y - p['y']) > radius + p['radius'] + 1 for p in placed):
+            placed.append(planet(len(placed), x, y, radius))
+    return placed
+
+
+def in_range(planets, x, y):
+    return sorted(p.id for p in planets if math.hypot(p.x - x, p.y - y) <= p.radius + hlt.constants.DOCK_RADIUS)
+
+
+@pytest.mark.parametrize('cell_size', (1, 2.5))
+def test_planets_at_matches_brute_force(cell_size):
+    rng = random.Random(cell_size)
+    game_map = parse([ship(0, 0, 1, 1)], planets(rng))
+    index = hlt.dock_zones.DockZoneIndex(WIDTH, HEIGHT, game_map.all_planets(), cell_size)
+    points = [(rng.uniform(-5, WIDTH + 5), rng.uniform(-5, HEIGHT + 5)) for _ in range(20000)]
+    # and points just inside and just outside the edges of the docking ranges (right on them, rounding decides)
+    for p in game_map.all_planets():
+        for _ in range(50):
+            angle = rng.uniform(0, 2 * math.pi)
+            for offset in (-1e-6, 1e-6, 0.3):
+                distance = p.radius + hlt.constants.DOCK_RADIUS + offset
+                points.append((p.x + distance * math.cos(angle), p.y + distance * math.sin(angle)))
+    mismatches = [(x, y) for x, y in points
+                  if sorted(index.planets_at(x, y)) != in_range(game_map.all_planets(), x, y)]
+    assert mismatches == []
+
+
+def test_dockable_only_offers_allowed_planets():
+    game_map = parse([ship(0, 0, 50 + 5 + 2, 50)], [planet(0, 50, 50, 5), planet(1, 150, 50, 5)])
+    me = game_map.get_me().get_ship(0)
+    index = game_map.dock_zones()
+    assert index.dockable(me, {0: game_map.get_planet(0)}) is game_map.get_planet(0)
+    assert index.dockable(me, {1: game_map.get_planet(1)}) is None
+    assert index.dockable(me, {}) is None
+    assert game_map.dock_zones() is index
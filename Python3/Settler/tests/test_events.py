@@ -0,0 +1,79 @@
+from hlt.events import Event, EventKind, EventTracker, of_kind
+from maps import DOCKED, DOCKING, UNDOCKED, UNDOCKING, parse, planet, ship
+
+
+def frame(ships, planets):
+    """
+    :param dict ships: (x, health, status, planet) of each ship, by (player, ship id)
+    :param dict planets: (health, owner) of each planet, by id
+    """
+    return parse([ship(owner, ship_id, x, 10, health, status, planet_id)
+                  for (owner, ship_id), (x, health, status, planet_id) in ships.items()],
+                 [planet(planet_id, 50 + 30 * planet_id, 50, owner=owner, health=health)
+                  for planet_id, (health, owner) in planets.items()])
+
+
+FIRST = frame({(0, 0): (10, 255, UNDOCKED, 0), (0, 1): (20, 255, UNDOCKED, 0), (1, 2): (30, 255, DOCKED, 1),
+               (1, 3): (40, 255, DOCKING, 1)},
+              {0: (1000, None), 1: (1000, 1), 2: (1000, 1)})
+
+
+def test_first_frame_spawns_every_ship():
+    tracker = EventTracker()
+    events = tracker.update(FIRST)
+    assert events == [Event(EventKind.SHIP_SPAWNED, ship_id, owner, None, None)
+                      for owner, ship_id in ((0, 0), (0, 1), (1, 2), (1, 3))]
+
+
+def test_changes_between_frames():
+    tracker = EventTracker()
+    tracker.update(FIRST)
+    second = frame({(0, 0): (12, 200, UNDOCKED, 0), (0, 4): (15, 255, UNDOCKED, 0), (1, 2): (30, 255, UNDOCKING, 1),
+                    (1, 3): (40, 255, DOCKED, 1)},
+                   {0: (1000, None), 1: (900, 1)})
+    events = tracker.update(second)
+    assert set(events) == {
+        Event(EventKind.SHIP_DAMAGED, 0, 0, None, -55),
+        Event(EventKind.SHIP_SPAWNED, 4, 0, None, None),
+        Event(EventKind.UNDOCKING_STARTED, 2, 1, 1, None),
+        Event(EventKind.DOCKING_FINISHED, 3, 1, 1, None),
+        Event(EventKind.SHIP_DESTROYED, 1, 0, None, 255),
+        Event(EventKind.PLANET_DAMAGED, 1, 1, None, -100),
+        Event(EventKind.PLANET_DESTROYED, 2, 1, None, None),
+    }
+    # ship events come first
+    kinds = [event.kind for event in events]
+    assert kinds.index(EventKind.PLANET_DAMAGED) > kinds.index(EventKind.SHIP_DESTROYED)
+
+    third = frame({(0, 0): (12, 200, DOCKING, 0), (0, 4): (15, 255, UNDOCKED, 0), (1, 2): (30, 255, UNDOCKED, 0),
+                   (1, 3): (40, 255, DOCKED, 1)},
+                  {0: (1000, 0), 1: (900, 1)})
+    events = tracker.update(third)
+    assert set(events) == {
+        Event(EventKind.DOCKING_STARTED, 0, 0, 0, None),
+        Event(EventKind.UNDOCKING_FINISHED, 2, 1, 1, None),
+        Event(EventKind.PLANET_CAPTURED, 0, 0, None, None),
+    }
+
+    fourth = frame({(0, 4): (15, 255, UNDOCKED, 0), (1, 2): (30, 255, UNDOCKED, 0), (1, 3): (40, 255, DOCKED, 1)},
+                   {0: (1000, None), 1: (900, 1)})
+    events = tracker.update(fourth)
+    assert set(events) == {
+        Event(EventKind.SHIP_DESTROYED, 0, 0, 0, 200),
+        Event(EventKind.PLANET_LOST, 0, 0, None, None),
+    }
+    assert tracker.events == events
+    assert tracker.counts[EventKind.SHIP_SPAWNED] == 5
+    assert tracker.counts[EventKind.SHIP_DESTROYED] == 2
+
+
+def test_unchanged_frame_has_no_events():
+    tracker = EventTracker()
+    tracker.update(FIRST)
+    assert tracker.update(FIRST) == []
+
+
+def test_of_kind_keeps_order():
+    events = EventTracker().update(FIRST)
+    assert of_kind(events, EventKind.SHIP_SPAWNED) == events
+    assert of_kind(events, EventKind.SHIP_DESTROYED, EventKind.PLANET_LOST) == []
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+from hlt import constants
+from hlt.events import EventTracker
+from hlt.forecast import ProductionForecast
+from maps import DOCKED, DOCKING, UNDOCKING, parse, planet, ship
+
+TURNS = 40
+
+SHIPS = [ship(0, 0, 60, 50, status=DOCKED, planet=0), ship(0, 1, 60, 56, status=DOCKED, planet=0),
+         ship(0, 2, 100, 50, status=DOCKING, planet=2, progress=3), ship(0, 3, 20, 20),
+         ship(1, 4, 80, 50, status=DOCKED, planet=1), ship(1, 5, 20, 140),
+         ship(1, 6, 100, 56, status=DOCKED, planet=4)]
+PLANETS = [planet(0, 50, 50, owner=0, production=60), planet(1, 70, 50, owner=1, remaining=20),
+           planet(2, 110, 50), planet(3, 150, 50), planet(4, 110, 80, owner=1, remaining=0)]
+
+
+def simulate(ships, planets, turns):
+    """
+    Play the production rules one turn at a time.
+
+    :return: (turns, planets) ships spawned, and the player each planet spawns for
+    """
+    spawns = np.zeros((turns, len(planets)), dtype=np.int64)
+    owners = []
+    for column, p in enumerate(planets):
+        docked = [s for s in ships if s['status'] != 0 and s['planet'] == p['id']]
+        owner = p['owner'] if p['owner'] is not None else (docked[0]['owner'] if docked else -1)
+        owners.append(owner)
+        production, remaining = p['production'], p['remaining']
+        for turn in range(turns):
+            producing = sum(s['status'] == DOCKED or (s['status'] == DOCKING and s['progress'] <= turn)
+                            for s in docked)
+            rate = min(producing * constants.BASE_PRODUCTIVITY, remaining) if owner >= 0 else 0
+            remaining -= rate
+            production += rate
+            spawns[turn, column] = production // constants.SHIP_COST
+            production %= constants.SHIP_COST
+    return spawns, np.array(owners)
+
+
+@pytest.fixture
+def forecast():
+    forecast = ProductionForecast()
+    game_map = parse(SHIPS, PLANETS)
+    forecast.update(game_map, EventTracker().update(game_map))
+    return forecast
+
+
+def test_spawns_match_turn_by_turn_production(forecast):
+    spawns, owners = simulate(SHIPS, PLANETS, TURNS)
+    assert forecast.owners().tolist() == owners.tolist()
+    assert forecast.spawns(TURNS).tolist() == spawns.tolist()
+    wait, spawner = forecast.next_spawn(TURNS)
+    assert wait.tolist() == [1, math.inf, 3 + 9, math.inf, math.inf]
+    assert spawner.tolist() == [0, -1, 0, -1, -1]
+
+
+def test_fleets_add_up_the_spawns(forecast):
+    spawns, owners = simulate(SHIPS, PLANETS, TURNS)
+    fleets = forecast.fleets(TURNS)
+    assert fleets[0].tolist() == [4, 3]
+    for player in (0, 1):
+        expected = fleets[0, player] + np.cumsum(spawns[:, owners == player].sum(axis=1))
+        assert fleets[1:, player].tolist() == expected.tolist()
+    assert forecast.fleets(TURNS, players=3).shape == (TURNS + 1, 3)
+
+
+def test_exhaustion(forecast):
+    assert forecast.exhaustion().tolist() == [math.ceil(1000 / 16), 3, math.inf, math.inf, 0]
+
+
+def test_events_keep_the_forecast_in_step_with_the_frame():
+    tracker = EventTracker()
+    incremental = ProductionForecast()
+    first = parse(SHIPS, PLANETS)
+    incremental.update(first, tracker.update(first))
+    # Ship 0 dies, ship 2 finishes docking and takes planet 2, ship 4 undocks, ship 7 spawns
+    ships = [ship(0, 1, 60, 56, status=DOCKED, planet=0), ship(0, 2, 100, 50, status=DOCKED, planet=2),
+             ship(0, 3, 22, 20), ship(0, 7, 56, 60), ship(1, 4, 80, 50, status=UNDOCKING, planet=1),
+             ship(1, 5, 20, 138), ship(1, 6, 100, 56, status=DOCKED, planet=4)]
+    planets = [dict(p, owner=0) if p['id'] == 2 else p for p in PLANETS]
+    second = parse(ships, planets)
+    incremental.update(second, tracker.update(second))
+    rebuilt = ProductionForecast()
+    rebuilt.update(second, EventTracker().update(second))
+    assert incremental.owner.tolist() == rebuilt.owner.tolist() == [0, 1, 0, -1, 1]
+    assert incremental.docked.tolist() == [1, 0, 1, 0, 1]
+    assert incremental.fleet.tolist() == rebuilt.fleet.tolist() == [4, 3]
+    assert incremental.spawns(TURNS).tolist() == rebuilt.spawns(TURNS).tolist()
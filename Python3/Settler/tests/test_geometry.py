@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+import hlt
+
+WIDTH = 384
+HEIGHT = 256
+SAMPLES = 10000
+
+
+def near(a, b):
+    return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+
+
+def point(rng):
+    return rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+
+
+@pytest.fixture
+def reference():
+    return hlt.geometry.get('python')
+
+
+@pytest.mark.parametrize('name', hlt.geometry.available())
+def test_scalar_kernels_match_reference(name, reference):
+    """
+    Floats agree to within 1e-9, and everything that ends up in a command (int() of distances and angles,
+    segment tests) agrees exactly.
+    """
+    backend = hlt.geometry.get(name)
+    rng = random.Random(0)
+    mismatches = []
+    for _ in range(SAMPLES):
+        (x1, y1), (x2, y2) = point(rng), point(rng)
+        radius = rng.uniform(0, 16)
+        fudge = rng.choice((0.5, 0.6))
+        min_distance = rng.choice((-1, 0, 2, 3))
+        got, want = backend.distance(x1, y1, x2, y2), reference.distance(x1, y1, x2, y2)
+        if not near(got, want) or int(got) != int(want):
+            mismatches.append("distance{} {} != {}".format((x1, y1, x2, y2), got, want))
+        got, want = backend.angle(x1, y1, x2, y2), reference.angle(x1, y1, x2, y2)
+        if not near(got, want) or int(got) != int(want):
+            mismatches.append("angle{} {} != {}".format((x1, y1, x2, y2), got, want))
+        got = backend.closest_point(x1, y1, x2, y2, radius, min_distance)
+        want = reference.closest_point(x1, y1, x2, y2, radius, min_distance)
+        if not (near(got[0], want[0]) and near(got[1], want[1])):
+            mismatches.append("closest_point{} {} != {}".format((x1, y1, x2, y2, radius), got, want))
+        cx, cy = point(rng)
+        got = backend.segment_circle(x1, y1, x2, y2, cx, cy, radius, fudge)
+        want = reference.segment_circle(x1, y1, x2, y2, cx, cy, radius, fudge)
+        if bool(got) != bool(want):
+            mismatches.append("segment_circle{} {} != {}".format((x1, y1, x2, y2, cx, cy, radius), got, want))
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('name', hlt.geometry.available())
+def test_batch_kernels_match_reference(name, reference):
+    backend = hlt.geometry.get(name)
+    rng = random.Random(1)
+    mismatches = []
+    for _ in range(SAMPLES // 100):
+        (x1, y1), (x2, y2) = point(rng), point(rng)
+        if rng.random() < 0.1:
+            x2, y2 = x1, y1
+        xs = [rng.uniform(0, WIDTH) for _ in range(100)]
+        ys = [rng.uniform(0, HEIGHT) for _ in range(100)]
+        radii = [rng.uniform(0.5, 16) for _ in range(100)]
+        got, want = backend.distances(x1, y1, xs, ys), reference.distances(x1, y1, xs, ys)
+        if any(not near(g, w) for g, w in zip(got, want)):
+            mismatches.append("distances from {} differ".format((x1, y1)))
+        got = backend.segment_circles(x1, y1, x2, y2, xs, ys, radii, 0.6)
+        want = reference.segment_circles(x1, y1, x2, y2, xs, ys, radii, 0.6)
+        if [bool(g) for g in got] != [bool(w) for w in want]:
+            mismatches.append("segment_circles {} differ".format((x1, y1, x2, y2)))
+        start = rng.randrange(len(xs) + 1)
+        got = backend.first_segment_circle(x1, y1, x2, y2, backend.prepare(xs), backend.prepare(ys),
+                                           backend.prepare(radii), 0.6, start)
+        want = next((i for i in range(start, len(xs)) if want[i]), -1)
+        if got != want:
+            mismatches.append("first_segment_circle {} from {}: {} != {}".format((x1, y1, x2, y2), start, got, want))
+    assert mismatches == []
@@ -0,0 +1,44 @@
+import pytest
+
+import bench
+import hlt
+from hlt.budget import Budget
+
+Quality = hlt.entity.Ship.NavigationQuality
+
+
+@pytest.fixture(scope='module')
+def game_map():
+    return bench.synthetic_map(240, 160)
+
+
+@pytest.fixture(scope='module')
+def cases(game_map):
+    return bench.navigation_cases(game_map, 300)
+
+
+def test_direct_path_is_tested_whatever_the_budget(game_map, cases):
+    clear = [(ship, target) for ship, target in cases if not game_map.path_blocked(ship, target.x, target.y)]
+    assert clear
+    for ship, target in clear:
+        command, quality = ship.navigate_within(target, game_map, 7, Budget(max_work=1))
+        assert quality == Quality.DIRECT
+        assert command == ship.navigate(target, game_map, 7)
+
+
+def test_work_is_charged_per_obstacle_checked(game_map, cases):
+    obstacles = len(game_map.obstacle_arrays()[0])
+    for ship, target in cases:
+        budget = Budget()
+        _, quality = ship.navigate_within(target, game_map, 7, budget, max_corrections=10)
+        assert 0 < budget.work <= 10 * obstacles
+        if quality == Quality.DIRECT:
+            assert budget.work <= obstacles
+
+
+def test_corrections_stop_when_the_budget_runs_out(game_map, cases):
+    obstacles = len(game_map.obstacle_arrays()[0])
+    for ship, target in cases:
+        budget = Budget(max_work=3 * obstacles)
+        ship.navigate_within(target, game_map, 7, budget)
+        assert budget.work <= 3 * obstacles
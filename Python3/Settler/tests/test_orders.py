@@ -0,0 +1,75 @@
+import pytest
+
+from hlt.orders import OrderBook
+from maps import DOCKED, DOCKING, parse, planet, ship
+
+PLANETS = [planet(0, 100, 100), planet(1, 40, 40, owner=1), planet(2, 200, 100)]
+
+
+@pytest.fixture
+def before():
+    return parse([ship(0, 0, 10, 150), ship(0, 1, 95, 100, status=DOCKING, planet=0), ship(0, 2, 20, 20),
+                  ship(0, 3, 150, 20), ship(0, 4, 60, 140), ship(0, 5, 180, 100), ship(0, 6, 120, 150),
+                  ship(0, 7, 128, 145), ship(1, 10, 160, 20), ship(1, 11, 125, 150)],
+                 PLANETS)
+
+
+@pytest.fixture
+def after():
+    """
+    Ship 0 destroyed, ship 1 docked (so planet 0 is now player 0's), planet 1 destroyed, enemy ship 10 moved away,
+    ship 5 next to planet 2.
+    """
+    return parse([ship(0, 1, 95, 100, status=DOCKED, planet=0), ship(0, 2, 20, 20), ship(0, 3, 150, 20),
+                  ship(0, 4, 60, 140), ship(0, 5, 192, 100), ship(0, 6, 120, 150), ship(0, 7, 128, 145),
+                  ship(1, 10, 180, 20), ship(1, 11, 125, 150)],
+                 [planet(0, 100, 100, owner=0), PLANETS[2]])
+
+
+def issue_all(book, game_map):
+    ships = {s.id: s for s in game_map.ships()}
+    for ship_id, kind, target in ((0, 'claim', game_map.get_planet(0)), (1, 'claim', game_map.get_planet(0)),
+                                  (2, 'attack', game_map.get_planet(1)), (3, 'attack', ships[10]),
+                                  (4, 'claim', game_map.get_planet(0)), (5, 'claim', game_map.get_planet(2)),
+                                  (6, 'attack', ships[11]), (7, 'claim', game_map.get_planet(2))):
+        book.issue(ships[ship_id], kind, target, turn=1)
+
+
+def test_begin_turn_drops_invalidated_orders(before, after):
+    book = OrderBook()
+    issue_all(book, before)
+    dropped = book.begin_turn(after, threat_range=10)
+    assert dropped == {0: 'gone', 1: 'gone', 2: 'target lost', 3: 'target moved', 4: 'owner changed',
+                       5: 'arrived', 7: 'threat'}
+    assert len(book) == 1 and book.get(6).target_id == 11
+    assert book.kept == 1
+    assert book.invalidated['gone'] == 2 and sum(book.invalidated.values()) == 7
+
+
+def test_threats_are_only_checked_when_asked(before, after):
+    book = OrderBook()
+    issue_all(book, before)
+    dropped = book.begin_turn(after)
+    assert 7 not in dropped and book.get(7) is not None
+
+
+def test_nothing_changed_keeps_every_order(before):
+    book = OrderBook()
+    issue_all(book, before)
+    ships = {s.id: s for s in before.ships()}
+    dropped = book.begin_turn(before)
+    # ship 1 is docking already, and ship 5 is not at planet 2 yet
+    assert dropped == {1: 'gone'}
+    assert len(book) == 7
+    book.share(ships[1], book.get(0))
+    assert book.get(1) is book.get(0)
+
+
+def test_cancel_and_clear(before):
+    book = OrderBook()
+    issue_all(book, before)
+    book.cancel(3)
+    book.cancel(42)
+    assert book.get(3) is None and len(book) == 7
+    book.clear()
+    assert len(book) == 0
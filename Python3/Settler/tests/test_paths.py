@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+import pytest
+
+from hlt.events import EventTracker
+from hlt.flow_field import FlowFieldCache
+from hlt.paths import PathBook
+from maps import DOCKING, parse, planet, ship
+
+PLANET = planet(0, 120, 80, radius=10)
+GOAL = planet(1, 215, 80, radius=3)
+KEY = ('claim', GOAL['id'])
+
+
+def frame(*ships):
+    return parse([ship(0, 0, 40, 80)] + list(ships), [PLANET, GOAL])
+
+
+def leg_distance(start, end, x, y):
+    """
+    :return: How close the segment from start to end passes to (x, y)
+    """
+    (x1, y1), (x2, y2) = start, end
+    dx, dy = x2 - x1, y2 - y1
+    t = min(max(((x - x1) * dx + (y - y1) * dy) / max(dx * dx + dy * dy, 1e-12), 0), 1)
+    return math.hypot(x1 + t * dx - x, y1 + t * dy - y)
+
+
+class Game:
+    """
+    A PathBook followed through a sequence of frames, with the events between them.
+    """
+
+    def __init__(self):
+        self.book = PathBook()
+        self.fields = FlowFieldCache(240, 160)
+        self.tracker = EventTracker()
+        self.turn = 0
+
+    def next(self, game_map):
+        self.turn += 1
+        self.fields.begin_turn(game_map, self.turn)
+        return self.book.begin_turn(game_map, self.turn, self.tracker.update(game_map))
+
+    def plan(self, game_map):
+        me = game_map.get_me().get_ship(0)
+        goal = game_map.get_planet(GOAL['id'])
+        field = self.fields.field(KEY, goal.x, goal.y, goal.radius + 6, static=True)
+        return self.book.plan(me, KEY, goal, field, game_map)
+
+    def follow(self, game_map):
+        return self.book.waypoint(game_map.get_me().get_ship(0), KEY, game_map.get_planet(GOAL['id']))
+
+
+@pytest.fixture
+def game():
+    game = Game()
+    game.next(frame())
+    assert game.plan(frame()) is not None
+    return game
+
+
+def test_plan_keeps_its_legs_clear_of_planets(game):
+    path = game.book.get(0)
+    assert path.waypoints[-1] == (GOAL['x'], GOAL['y'])
+    assert len(path.waypoints) > 1
+    points = [(40, 80)] + path.waypoints
+    clearance = PLANET['radius'] + game.book.clearance
+    assert all(leg_distance(start, end, PLANET['x'], PLANET['y']) >= clearance - 1e-9
+               for start, end in zip(points, points[1:]))
+    assert game.book.planned == 1
+
+
+def test_followed_path_is_kept(game):
+    game.follow(frame())
+    assert game.next(frame()) == {}
+    assert len(game.book) == 1 and game.book.kept == 1
+
+
+def test_unfollowed_path_is_dropped(game):
+    game.next(frame())
+    assert game.next(frame()) == {0: 'unused'}
+
+
+def test_path_of_a_lost_ship_is_dropped(game):
+    game.follow(frame())
+    assert game.next(parse([ship(0, 1, 40, 20)], [PLANET, GOAL])) == {0: 'gone'}
+
+
+def test_ship_docking_in_the_way_blocks_the_path(game):
+    first_leg = np.array([(40, 80), game.book.get(0).waypoints[0]])
+    x, y = first_leg.mean(axis=0)
+    game.next(frame(ship(1, 5, x, y + 30)))
+    game.follow(frame(ship(1, 5, x, y + 30)))
+    assert game.next(frame(ship(1, 5, x, y, status=DOCKING, planet=0))) == {0: 'blocked'}
+    assert game.book.invalidated['blocked'] == 1
+
+
+def test_ship_pushed_behind_a_planet_has_strayed(game):
+    game.follow(frame())
+    wx, wy = game.book.get(0).waypoints[0]
+    away = math.atan2(PLANET['y'] - wy, PLANET['x'] - wx)
+    distance = PLANET['radius'] + 3
+    pushed = parse([ship(0, 0, PLANET['x'] + distance * math.cos(away), PLANET['y'] + distance * math.sin(away))],
+                   [PLANET, GOAL])
+    assert game.next(pushed) == {0: 'strayed'}
+
+
+def test_waypoint_is_only_for_the_planned_goal(game):
+    me = frame().get_me().get_ship(0)
+    assert game.book.waypoint(me, ('claim', 42), frame().get_planet(GOAL['id'])) is None
+    assert game.follow(frame()) is not None
@@ -0,0 +1,63 @@
+import pytest
+
+from hlt.events import Event, EventKind
+from hlt.roles import RoleTable
+
+
+def table(percents, ships):
+    roles = RoleTable()
+    roles.rebalance(percents)
+    for ship_id in range(ships):
+        roles.bucket(ship_id)
+    return roles
+
+
+@pytest.mark.parametrize('ships', (1, 7, 50, 333))
+def test_new_ships_follow_the_shares(ships):
+    roles = table({'raid': 30, 'claim': 70}, ships)
+    counts = roles.counts()
+    assert abs(counts['raid'] - 0.3 * ships) <= 1
+    assert abs(counts['claim'] - 0.7 * ships) <= 1
+    assert counts['raid'] == sum(roles.allows(ship_id, 'raid') for ship_id in range(ships))
+    assert roles.mask(range(ships), 'claim').sum() == counts['claim']
+
+
+def test_buckets_are_stable():
+    roles = table({'raid': 30}, 100)
+    before = [roles.bucket(ship_id) for ship_id in range(100)]
+    assert [roles.bucket(ship_id) for ship_id in range(100)] == before
+    assert len(roles) == 100
+
+
+@pytest.mark.parametrize('percent', (0, 10, 30, 55, 100))
+def test_rebalance_moves_as_few_ships_as_it_takes(percent):
+    roles = table({'raid': 30}, 200)
+    before = {ship_id: roles.bucket(ship_id) for ship_id in range(200)}
+    moved = roles.rebalance({'raid': percent})
+    assert abs(roles.counts()['raid'] - percent / 100 * 200) <= 1
+    # ships are spread evenly over the buckets of a band, so moving an edge only changes which side they are on
+    assert len(moved) <= 1
+    assert all(roles.bucket(ship_id) == bucket for ship_id, bucket in before.items() if ship_id not in moved)
+    assert roles.rebalance({'raid': percent}) == []
+
+
+def test_rebalance_refills_a_role_whose_ships_are_gone():
+    roles = table({'raid': 30}, 200)
+    raiders = [ship_id for ship_id in range(200) if roles.allows(ship_id, 'raid')]
+    for ship_id in raiders:
+        roles.forget(ship_id)
+    assert roles.counts()['raid'] == 0
+    moved = roles.rebalance({'raid': 30})
+    assert len(moved) == round(0.3 * (200 - len(raiders)))
+    assert all(roles.allows(ship_id, 'raid') for ship_id in moved)
+
+
+def test_destroyed_and_docked_ships_are_forgotten():
+    roles = table({'raid': 50}, 10)
+    roles.begin_turn([Event(EventKind.SHIP_DESTROYED, 3, 0, None, 255),
+                      Event(EventKind.DOCKING_STARTED, 4, 0, 1, None),
+                      Event(EventKind.SHIP_DAMAGED, 5, 0, None, -48)])
+    assert len(roles) == 8
+    assert roles.histogram.sum() == 8
+    roles.forget(42)
+    assert len(roles) == 8
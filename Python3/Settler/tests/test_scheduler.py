@@ -0,0 +1,48 @@
+import time
+
+from hlt.budget import Budget
+from hlt.scheduler import DeadlineScheduler
+
+
+def test_tasks_run_most_urgent_first_then_cheapest():
+    scheduler = DeadlineScheduler()
+    for key, priority, cost in (('a', 1, 5), ('b', 3, 5), ('c', 3, 1), ('d', 2, 1)):
+        scheduler.add(key, priority, cost, lambda budget, key=key: key.upper())
+    assert len(scheduler) == 4
+    results = scheduler.run(Budget())
+    assert results == [('c', 'C', True), ('b', 'B', True), ('d', 'D', True), ('a', 'A', True)]
+    assert len(scheduler) == 0 and scheduler.ran == 4
+
+
+def test_tasks_the_time_left_can_not_cover_fall_back():
+    scheduler = DeadlineScheduler(seconds_per_unit=0.01)
+    scheduler.add('cheap', 2, 1, lambda budget: 'ran', lambda: 'fell back')
+    scheduler.add('dear', 1, 1000, lambda budget: 'ran', lambda: 'fell back')
+    scheduler.add('bare', 0, 1000, lambda budget: 'ran')
+    results = scheduler.run(Budget(seconds=1))
+    assert results == [('cheap', 'ran', True), ('dear', 'fell back', False), ('bare', None, False)]
+    assert scheduler.fell_back == 2
+
+
+def test_spent_budget_falls_back_on_everything():
+    scheduler = DeadlineScheduler()
+    scheduler.add('a', 1, 0, lambda budget: 'ran', lambda: 'fell back')
+    assert scheduler.run(Budget(seconds=0)) == [('a', 'fell back', False)]
+
+
+def test_each_task_gets_a_share_of_the_time_left():
+    scheduler = DeadlineScheduler(seconds_per_unit=0)
+    shares = []
+    for key in range(4):
+        scheduler.add(key, 0, 1, lambda budget: shares.append(budget.remaining_time()))
+    scheduler.run(Budget(seconds=10))
+    assert all(share <= 10 / (4 - n) + 1e-3 for n, share in enumerate(shares))
+    assert shares[0] < shares[-1]
+
+
+def test_cost_estimate_follows_measured_time():
+    scheduler = DeadlineScheduler(seconds_per_unit=1.0, smoothing=0.5)
+    scheduler.add('a', 0, 10, lambda budget: time.sleep(0.01))
+    scheduler.run(Budget())
+    # half way from 1 toward about 0.001 seconds per unit
+    assert 0.5 < scheduler.seconds_per_unit < 0.51
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import hlt
+
+WIDTH = 384
+HEIGHT = 256
+
+
+def frame(rng, ships, players):
+    columns = dict(id=np.arange(ships), owner=rng.integers(0, players, ships),
+                   x=rng.uniform(0, WIDTH, ships), y=rng.uniform(0, HEIGHT, ships),
+                   health=np.where(rng.random(ships) < 0.1, 0.0, 255.0), status=np.zeros(ships, dtype=np.int64),
+                   planet=np.full(ships, -1), progress=np.zeros(ships, dtype=np.int64),
+                   cooldown=np.zeros(ships, dtype=np.int64))
+    return hlt.simulation.Frame(WIDTH, HEIGHT, columns, {})
+
+
+def brute_force_distances(frame):
+    """
+    :return: The distance from each live ship to its nearest live enemy, inf if it has none or is destroyed
+    """
+    alive = frame.alive()
+    distances = np.hypot(frame.x[:, None] - frame.x, frame.y[:, None] - frame.y)
+    distances[(frame.owner[:, None] == frame.owner) | ~alive | ~alive[:, None]] = np.inf
+    return distances.min(axis=1, initial=np.inf)
+
+
+@pytest.mark.parametrize('ships', (0, 1, 2, 7, 60, 400))
+@pytest.mark.parametrize('players', (1, 2, 4))
+def test_nearest_enemies_match_brute_force(ships, players):
+    """
+    Ties may pick either enemy, so the distances are compared rather than the rows.
+    """
+    rng = np.random.default_rng(ships * 10 + players)
+    for _ in range(20):
+        f = frame(rng, ships, players)
+        nearest = hlt.simulation.nearest_enemies(f)
+        want = brute_force_distances(f)
+        found = nearest >= 0
+        assert np.array_equal(found, np.isfinite(want))
+        assert np.all(f.alive()[nearest[found]])
+        assert np.all(f.owner[nearest[found]] != f.owner[found])
+        got = np.hypot(f.x[found] - f.x[nearest[found]], f.y[found] - f.y[nearest[found]])
+        assert np.allclose(got, want[found])
@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pytest
+
+from hlt import collision, constants, squads
+from maps import parse, ship
+
+
+def test_form_groups_near_ships_that_share_a_key():
+    game_map = parse([ship(0, 0, 50, 50), ship(0, 1, 52, 50), ship(0, 2, 54, 50), ship(0, 3, 52, 52),
+                      ship(0, 4, 150, 50), ship(0, 5, 52, 48)])
+    ships = list(game_map.get_me().all_ships())
+    formed = squads.form(ships, ['a', 'a', 'a', 'a', 'a', 'b'], radius=5)
+    assert [(s.key, s.leader.id, sorted(m.id for m in s.members)) for s in formed] == \
+        [('a', 1, [0, 2, 3]), ('a', 4, []), ('b', 5, [])]
+    assert [len(s) for s in formed] == [4, 1, 1]
+    assert squads.form([], [], 5) == []
+
+
+def test_form_splits_large_groups():
+    game_map = parse([ship(0, ship_id, 20 + 2 * ship_id, 50) for ship_id in range(10)])
+    formed = squads.form(list(game_map.get_me().all_ships()), [None] * 10, radius=5, max_size=4)
+    assert [len(s) for s in formed] == [4, 4, 2]
+    assert sorted(s.leader.id for s in formed) == [1, 5, 8]
+
+
+def test_follow_ignores_commands_without_thrust():
+    game_map = parse([ship(0, 0, 50, 50), ship(0, 1, 53, 50)])
+    leader, member = game_map.get_me().all_ships()
+    assert squads.follow(squads.Squad(None, leader, [member]), 'd 0 1', game_map, 3) == {}
+
+
+def test_thrust_of():
+    dx, dy = squads.thrust_of('t 3 7 90')
+    assert dx == pytest.approx(0) and dy == pytest.approx(7)
+    assert squads.thrust_of('d 3 1') is None
+    assert squads.thrust_of(None) is None
+
+
+@pytest.mark.parametrize('count', (1, 6, 7, 20, 50))
+def test_slots_are_spaced_and_nearest_first(count):
+    formation = squads.slots(count, 3)
+    assert formation.shape == (count, 2)
+    distances = np.hypot(formation[:, 0], formation[:, 1])
+    assert np.all(np.diff(distances) >= -1e-9)
+    assert distances.min() >= 3 - 1e-9
+    apart = np.hypot(formation[:, None, 0] - formation[:, 0], formation[:, None, 1] - formation[:, 1])
+    assert np.all(apart[~np.eye(count, dtype=bool)] >= 3 - 1e-9)
+
+
+def assert_no_contacts(squad, commands, command):
+    ships = [squad.leader] + squad.members
+    thrusts = [squads.thrust_of(commands.get(s.id, command if s is squad.leader else None)) or (0, 0)
+               for s in ships]
+    x = np.array([s.x for s in ships])
+    y = np.array([s.y for s in ships])
+    vx = np.array([t[0] for t in thrusts])
+    vy = np.array([t[1] for t in thrusts])
+    assert np.all(np.hypot(vx, vy) <= constants.MAX_SPEED + 1e-9)
+    i, j, t = collision.first_contacts(x, y, vx, vy)
+    # Pairs that start out touching are only a contact if they close in further
+    closing = (x[j] - x[i]) * (vx[j] - vx[i]) + (y[j] - y[i]) * (vy[j] - vy[i]) < 0
+    assert np.all((t == 0) & ~closing)
+
+
+def test_formation_in_place_moves_as_one():
+    spacing = 3
+    formation = squads.slots(6, spacing)
+    game_map = parse([ship(0, 0, 100, 80)] + [ship(0, k + 1, 100 + dx, 80 + dy)
+                                              for k, (dx, dy) in enumerate(formation.tolist())])
+    leader, *members = game_map.get_me().all_ships()
+    squad = squads.Squad(None, leader, members)
+    command = leader.thrust(constants.MAX_SPEED, 0)
+    commands = squads.follow(squad, command, game_map, spacing)
+    assert leader.id not in commands
+    for member in members:
+        dx, dy = squads.thrust_of(commands[member.id])
+        # headings are whole degrees and magnitudes whole numbers, so a member may fall a little behind
+        assert dx == pytest.approx(constants.MAX_SPEED, abs=0.5) and dy == pytest.approx(0, abs=0.5)
+    assert_no_contacts(squad, commands, command)
+
+
+def test_scattered_members_never_touch():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        positions = rng.uniform(60, 100, (12, 2))
+        positions = [p for k, p in enumerate(positions)
+                     if all(math.dist(p, q) > 1.2 for q in positions[:k])]
+        game_map = parse([ship(0, k, x, y) for k, (x, y) in enumerate(positions)])
+        leader, *members = game_map.get_me().all_ships()
+        squad = squads.Squad(None, leader, members)
+        command = leader.thrust(constants.MAX_SPEED, int(rng.integers(0, 360)))
+        commands = squads.follow(squad, command, game_map, 3)
+        assert_no_contacts(squad, commands, command)